@@ -1,8 +1,12 @@
+import glob
+import importlib
 import json
 import os.path
 import re
+import sys
 from datetime import datetime
-from typing import Any, Callable, Literal
+from types import ModuleType
+from typing import Any, Callable, Iterator, Literal
 
 from mcdreforged import Serializable
 
@@ -73,6 +77,31 @@ class SimpleLogger:
 logger = SimpleLogger()
 
 
+def import_mcdrpost_util(name: str) -> ModuleType | None:
+    """从 MCDRpost 插件中导入工具模块 (``mcdrpost.utils.<name>``)
+
+    会在 ``plugins`` 目录中查找 MCDRpost 的插件文件或文件夹, 找不到时返回 None
+    """
+    try:
+        return importlib.import_module(f'mcdrpost.utils.{name}')
+    except ImportError:
+        pass
+    for path in sorted(glob.glob('plugins/MCDRpost*')):
+        sys.path.insert(0, path)
+        try:
+            return importlib.import_module(f'mcdrpost.utils.{name}')
+        except ImportError:
+            sys.path.remove(path)
+    return None
+
+
+json_stream = import_mcdrpost_util('json_stream')
+"""流式 JSON 读写模块"""
+
+snbt = import_mcdrpost_util('snbt')
+"""SNBT 解析模块, 找不到时使用 :func:`fix_nbt_format` 把 NBT 修复为 JSON"""
+
+
 class OldOrdersData:
     def __init__(self, data_file_path: str):
         self.players = []
@@ -89,6 +118,25 @@ class OldOrdersData:
             self.orders.pop('players')
             self.orders.pop('ids')
 
+    def load_players(self):
+        """只读取玩家列表, 订单会被跳过"""
+        for _ in self.iter_orders():
+            pass
+
+    def iter_orders(self) -> Iterator[tuple[str, dict]]:
+        """逐个读取订单, 不会把整个文件读入内存, 需要 :data:`json_stream`"""
+        with open(self.json_file_path, 'r', encoding='utf-8') as f:
+            reader = json_stream.JsonStreamReader(f)
+            for key in reader.iter_object():
+                value = reader.read_value()
+                if key == 'players':
+                    self.players = value
+                elif key == 'ids':
+                    self.ids = value
+                else:
+                    yield key, value
+            reader.finish()
+
 
 def is_in_mcdr_dir() -> bool:
     """判断当前目录是否为 MCDR 服务器的根目录"""
@@ -96,7 +144,10 @@ def is_in_mcdr_dir() -> bool:
 
 
 def fix_nbt_format(nbt_content: str) -> str:
-    """修复 NBT 格式使其符合JSON规范。"""
+    """修复 NBT 格式使其符合JSON规范。
+
+    只在找不到 MCDRpost 的 SNBT 解析器 (:data:`snbt`) 时使用
+    """
     if not nbt_content:
         return "{}"
 
@@ -139,6 +190,13 @@ def parse_nbt_content(nbt_content: str) -> dict:
     if not nbt_content:
         return {}
 
+    if snbt is not None:
+        try:
+            return snbt.loads(f"{{{nbt_content}}}")
+        except snbt.SnbtError as e:
+            logger.warning(f"NBT解析错误: {e}")
+            return {"raw_nbt": nbt_content}
+
     try:
         # 首先尝试直接解析
         return json.loads(f"{{{nbt_content}}}")
@@ -179,7 +237,7 @@ def parse_item(item_string: str) -> tuple[int, str, str, dict[str, Any]] | None:
         (1, 'minecraft', 'diamond_pickaxe', {'Enchantments': [{'lvl': 3, 'id': 'minecraft:unbreaking'}]})
 
         >>> parse_item('create:wrench{Unbreakable: 1b} 3')
-        (3, 'create', 'wrench', {'Unbreakable': '1b'})
+        (3, 'create', 'wrench', {'Unbreakable': 1b})
 
         >>> parse_item('minecraft:apple 64')
         (64, 'minecraft', 'apple', {})
@@ -234,6 +292,51 @@ def parse_item(item_string: str) -> tuple[int, str, str, dict[str, Any]] | None:
     return None
 
 
+def convert_order(order_id: str, old_order: dict) -> Order:
+    parse_res = parse_item(old_order['item'])
+
+    if parse_res is None:
+        logger.warning(f"非法的物品：{old_order['item']}")
+        logger.warning("使用 minecraft:air 代替")
+        item: Item = AIR
+    else:
+        count, namespace, item_id, nbt_dict = parse_res
+        item: Item = Item(
+            id=f'{namespace}:{item_id}',
+            count=count,
+            components=nbt_dict
+        )
+
+    return Order(
+        id=int(order_id),
+        time=old_order['time'],
+        sender=old_order['sender'],
+        receiver=old_order['receiver'],
+        comment=old_order['info'],
+        item=item
+    )
+
+
+def migrate_streaming(old_data: OldOrdersData, output_path: str) -> None:
+    """逐个转换并写入订单, 内存占用与订单数量无关
+
+    旧版数据文件中玩家列表和订单在同一层, 所以会读取两遍: 第一遍只读取玩家列表
+    """
+    logger.info("正在加载旧版数据文件")
+    old_data.load_players()
+
+    logger.info("正在转换数据结构 ...")
+    logger.info(f"正在保存数据到 {output_path} ...")
+    json_stream.write_order_data(
+        output_path,
+        old_data.players,
+        (
+            (order_id, convert_order(order_id, old_order).serialize())
+            for order_id, old_order in old_data.iter_orders()
+        ),
+    )
+
+
 def main() -> None:
     if not is_in_mcdr_dir():
         raise RuntimeError("当前目录不是 MCDR 服务器的根目录，请把脚本放在 MCDR 的根目录运行")
@@ -246,39 +349,23 @@ def main() -> None:
         data_file_path = './config/MCDRpost/PostOrders.json'
 
     old_data = OldOrdersData(data_file_path)
-    logger.info("正在加载旧版数据文件")
-    try:
-        old_data.load_json()
-    except FileNotFoundError:
+    if not os.path.isfile(data_file_path):
         logger.error("未找到旧版数据文件，请检查文件路径是否正确")
-        raise
+        raise FileNotFoundError(data_file_path)
+
+    if json_stream is not None:
+        migrate_streaming(old_data, 'config/MCDRpost/orders.json')
+        return
+
+    logger.info("正在加载旧版数据文件")
+    old_data.load_json()
 
     logger.info("正在转换数据结构 ...")
 
-    new_order_data: dict[str, Order] = {}
-    for order_id, old_order in old_data.orders.items():
-        parse_res = parse_item(old_order['item'])
-
-        if parse_res is None:
-            logger.warning(f"非法的物品：{old_order['item']}")
-            logger.warning("使用 minecraft:air 代替")
-            item: Item = AIR
-        else:
-            count, namespace, item_id, nbt_dict = parse_res
-            item: Item = Item(
-                id=f'{namespace}:{item_id}',
-                count=count,
-                components=nbt_dict
-            )
-
-        new_order_data[order_id] = Order(
-            id=int(order_id),
-            time=old_order['time'],
-            sender=old_order['sender'],
-            receiver=old_order['receiver'],
-            comment=old_order['info'],
-            item=item
-        )
+    new_order_data: dict[str, Order] = {
+        order_id: convert_order(order_id, old_order)
+        for order_id, old_order in old_data.orders.items()
+    }
 
     new_data = NewOrderData(
         players=old_data.players,
@@ -6,8 +6,6 @@
 当然，如果想要使用自定义的命令来得到物品信息也可以，但请不要忘记转换成 Item 类型
 """
 
-from typing import Callable
-
 from mcdrpost.api.default_version_handler import DefaultVersionHandler
 from mcdrpost.constants import AIR, OFFHAND_CODE
 from mcdrpost.data_structure import Item
@@ -18,16 +16,17 @@ from mcdrpost.version_handler.sound_player.abstract_sound_player import (
     AbstractSoundPlayer,
 )
 from mcdrpost.version_handler.sound_player.impl import NewSoundPlayer, OldSoundPlayer
+from mcdrpost.version_handler.version_range import Checker, VersionRange
 
 
 def register_handler(
-        handler: type[AbstractVersionHandler], checker: Callable[[Environment], bool]
+        handler: type[AbstractVersionHandler], checker: Checker
 ) -> None:
     """向 MCDRpost 注册 Handler
 
     Args:
         handler (type[AbstractVersionHandler]): Handler 类
-        checker (Callable[[Environment], bool]): 检查器
+        checker (VersionRange | Callable[[Environment], bool]): 检查器, 只依赖服务器版本时建议使用 :class:`VersionRange`
     """
     VersionManager.register_handler(handler, checker)
 
@@ -40,6 +39,7 @@ __all__ = [
     "AbstractVersionHandler",
     "DefaultVersionHandler",
     "register_handler",
+    "VersionRange",
     # custom handler: custom sound
     "AbstractSoundPlayer",
     "NewSoundPlayer",
@@ -22,7 +22,7 @@ class DefaultVersionHandler(AbstractVersionHandler):
         return Item(id=item["id"], count=item["Count"], components=item.get("tag", {}))
 
     def replace(self, player: str, item: Item) -> None:
-        self.server.execute(
+        self.execute(
             f"item replace entity {player} {OFFHAND_CODE} with {self.item2str(item)}"
         )
 
@@ -5,6 +5,26 @@ from mcdreforged import Serializable
 from mcdrpost.utils.exception import InvalidConfig, InvalidPermission, InvalidPrefix
 
 
+def _check_type(section: str, attr_name: str, attr_value: Any, expected_type: type | tuple[type, ...]) -> None:
+    """检查配置项的类型, ``float`` 类型的配置项也接受整数
+
+    Args:
+        section (str): 配置项所在的部分, 用于错误信息
+        attr_name (str): 配置项名称
+        attr_value (Any): 配置项的值
+        expected_type (type | tuple[type, ...]): 期望的类型
+
+    Raises:
+        InvalidConfig: 类型不符合时抛出
+    """
+    if expected_type is float:
+        expected_type = (int, float)
+    if not isinstance(attr_value, expected_type):
+        raise InvalidConfig(
+            f"{section}.{attr_name} must be {expected_type}, found: {type(attr_value)}"
+        )
+
+
 class CommandPermissions(Serializable):
     """命令权限配置
 
@@ -19,6 +39,8 @@ class CommandPermissions(Serializable):
         list_player (int): 列出玩家命令权限等级
         list_orders (int): 列出订单命令权限等级
         player (int): 玩家命令权限等级
+        broadcast (int): 群发命令权限等级
+        stats (int): 查看运行统计命令权限等级
     """
 
     root: int = 0
@@ -29,6 +51,8 @@ class CommandPermissions(Serializable):
     list_orders: int = 2
     player: int = 3
     reload: int = 3
+    broadcast: int = 3
+    stats: int = 3
 
     def validate_attribute(self, attr_name: str, attr_value: Any, **kwargs):
         if not isinstance(attr_value, int):
@@ -60,6 +84,192 @@ class PrefixConfig(Serializable):
                 raise InvalidPrefix("more_prefix must be a list of str or empty list")
 
 
+class StorageConfig(Serializable):
+    """订单数据存储配置
+
+    Attributes:
+        backend (str): 存储后端, ``json`` 或 ``sqlite``
+        journal (bool): 是否启用操作日志, 启用后每次修改只追加一条记录而不是重写整个订单文件
+        compact_threshold (int): 操作日志达到多少条记录时在后台合并进订单文件
+        fsync (bool): 每次写入操作日志后是否强制落盘
+        save_delay (float): 订单被修改后等待多久没有新的修改再在后台保存, 单位为秒, 0 表示立即同步保存
+        max_save_delay (float): 订单被修改后最多等待多久就必须保存, 单位为秒
+        lazy_load (bool): 是否按需加载订单, 启用后加载时只读取索引需要的字段, 订单在使用时才会被验证
+        snapshot_format (str): 订单文件的格式, ``json`` (``orders.json``) 或 ``binary`` (``orders.bin``)
+    """
+
+    backend: str = "json"
+    journal: bool = False
+    compact_threshold: int = 1000
+    fsync: bool = True
+    save_delay: float = 1
+    max_save_delay: float = 10
+    lazy_load: bool = False
+    snapshot_format: str = "json"
+
+    def validate_attribute(self, attr_name: str, attr_value: Any, **kwargs):
+        _check_type("storage", attr_name, attr_value, self.get_field_annotations()[attr_name])
+        if attr_name == "backend" and attr_value not in ("json", "sqlite"):
+            raise InvalidConfig(
+                f"storage.backend must be 'json' or 'sqlite', found: {attr_value}"
+            )
+        if attr_name == "snapshot_format" and attr_value not in ("json", "binary"):
+            raise InvalidConfig(
+                f"storage.snapshot_format must be 'json' or 'binary', found: {attr_value}"
+            )
+        if attr_name == "compact_threshold" and attr_value <= 0:
+            raise InvalidConfig(
+                f"storage.compact_threshold must be positive, found: {attr_value}"
+            )
+        if attr_name in ("save_delay", "max_save_delay") and attr_value < 0:
+            raise InvalidConfig(
+                f"storage.{attr_name} must not be negative, found: {attr_value}"
+            )
+
+
+class QueryConfig(Serializable):
+    """向服务端查询数据 (如玩家副手物品) 的配置
+
+    Attributes:
+        workers (int): 查询线程的数量, 启用 RCON 时也是 MCDRpost 自己的 RCON 连接数量
+        queue_size (int): 最多有多少个查询在排队等待, 超过时新的查询会被拒绝
+        timeout (float): 等待查询结果的超时时间, 单位为秒
+        rcon_pool (bool): 是否使用 MCDRpost 自己的 RCON 连接池, 关闭时使用 MCDR 的 RCON 连接
+    """
+
+    workers: int = 4
+    queue_size: int = 32
+    timeout: float = 5
+    rcon_pool: bool = True
+
+    def validate_attribute(self, attr_name: str, attr_value: Any, **kwargs):
+        _check_type("query", attr_name, attr_value, self.get_field_annotations()[attr_name])
+        if attr_name in ("workers", "queue_size", "timeout") and attr_value <= 0:
+            raise InvalidConfig(
+                f"query.{attr_name} must be positive, found: {attr_value}"
+            )
+
+
+class PipelineConfig(Serializable):
+    """寄件和收件命令的执行配置, 见 :class:`~mcdrpost.utils.keyed_executor.KeyedExecutor`
+
+    Attributes:
+        enabled (bool): 是否在插件自己的线程中执行寄件和收件, 关闭时在 MCDR 的任务执行线程中执行
+        workers (int): 执行命令的线程数, 同一个玩家的命令总是在同一个线程中依次执行
+        queue_size (int): 最多有多少条命令在排队等待, 超过时新的命令会被拒绝
+    """
+
+    enabled: bool = True
+    workers: int = 2
+    queue_size: int = 64
+
+    def validate_attribute(self, attr_name: str, attr_value: Any, **kwargs):
+        _check_type("pipeline", attr_name, attr_value, self.get_field_annotations()[attr_name])
+        if attr_name in ("workers", "queue_size") and attr_value <= 0:
+            raise InvalidConfig(
+                f"pipeline.{attr_name} must be positive, found: {attr_value}"
+            )
+
+
+class RateLimitRule(Serializable):
+    """一类命令的频率限制, 见 :class:`~mcdrpost.utils.rate_limiter.RateLimiter`
+
+    Attributes:
+        rate (float): 每秒恢复的次数
+        burst (int): 最多连续执行的次数
+    """
+
+    rate: float = 0.5
+    burst: int = 5
+
+    def validate_attribute(self, attr_name: str, attr_value: Any, **kwargs):
+        _check_type("rate_limit", attr_name, attr_value, self.get_field_annotations()[attr_name])
+        if attr_value <= 0:
+            raise InvalidConfig(
+                f"rate_limit.{attr_name} must be positive, found: {attr_value}"
+            )
+
+
+class RateLimitConfig(Serializable):
+    """玩家命令的频率限制配置
+
+    Attributes:
+        enabled (bool): 是否启用频率限制
+        post (RateLimitRule): 寄件和群发命令的限制
+        receive (RateLimitRule): 收件和取消命令 (包括批量收件和取消) 的限制
+    """
+
+    enabled: bool = True
+    post: RateLimitRule = RateLimitRule.get_default()
+    receive: RateLimitRule = RateLimitRule.get_default()
+
+    def validate_attribute(self, attr_name: str, attr_value: Any, **kwargs):
+        _check_type("rate_limit", attr_name, attr_value, self.get_field_annotations()[attr_name])
+
+
+class ExpiryConfig(Serializable):
+    """订单过期配置
+
+    过期时间从寄件时开始计算. ``item_ttl`` 的键是物品 ID, 可以省略 ``minecraft:`` 命名空间,
+    值为 0 表示这种物品的订单永不过期
+
+    Attributes:
+        ttl (float): 订单的有效期, 单位为天, 0 表示永不过期
+        item_ttl (dict[str, float]): 按物品 ID 覆盖的有效期, 单位为天
+        action (str): 订单过期后的处理方式, ``return`` 退回寄件人, ``archive`` 移入 ``orders.archive.jsonl``
+        sweep_interval (float): 两次清理过期订单之间的最短间隔, 单位为秒
+    """
+
+    ttl: float = 0
+    item_ttl: dict[str, float] = {}
+    action: str = "return"
+    sweep_interval: float = 60
+
+    def validate_attribute(self, attr_name: str, attr_value: Any, **kwargs):
+        # item_ttl 的注解是泛型, 不能直接用于 isinstance
+        expected_type = dict if attr_name == "item_ttl" else self.get_field_annotations()[attr_name]
+        _check_type("expiry", attr_name, attr_value, expected_type)
+        if attr_name == "action" and attr_value not in ("return", "archive"):
+            raise InvalidConfig(
+                f"expiry.action must be 'return' or 'archive', found: {attr_value}"
+            )
+        if attr_name == "ttl" and attr_value < 0:
+            raise InvalidConfig(
+                f"expiry.ttl must not be negative, found: {attr_value}"
+            )
+        if attr_name == "sweep_interval" and attr_value <= 0:
+            raise InvalidConfig(
+                f"expiry.sweep_interval must be positive, found: {attr_value}"
+            )
+        if attr_name == "item_ttl":
+            for item_id, ttl in cast(dict, attr_value).items():
+                if not isinstance(ttl, (int, float)) or ttl < 0:
+                    raise InvalidConfig(
+                        f"expiry.item_ttl must be non-negative numbers, found: {item_id} = {ttl}"
+                    )
+
+    @property
+    def enabled(self) -> bool:
+        """是否有订单会过期"""
+        return self.ttl > 0 or any(ttl > 0 for ttl in self.item_ttl.values())
+
+    def ttl_of(self, item_id: str) -> float | None:
+        """物品的订单的有效期
+
+        Args:
+            item_id (str): 物品 ID
+
+        Returns:
+            float | None: 有效期, 单位为秒, 永不过期时返回 None
+        """
+        ttl = self.item_ttl.get(item_id)
+        if ttl is None and item_id.startswith("minecraft:"):
+            ttl = self.item_ttl.get(item_id[len("minecraft:"):])
+        if ttl is None:
+            ttl = self.ttl
+        return ttl * 86400 if ttl > 0 else None
+
+
 class Configuration(Serializable):
     """插件配置
 
@@ -69,7 +279,14 @@ class Configuration(Serializable):
         auto_fix (bool): 是否自动修复无效订单
         auto_register (bool):是否自动为新玩家注册
         receiving_tip_delay (float): 登录之后收件箱提示的延迟时间，单位为秒
+        list_page_size (int): 订单列表每页显示的订单数量
+        stage_timing (bool): 是否记录寄件和收件各个阶段的耗时, 见 ``!!po stats``
         permissions (CommandPermissions): 命令权限配置
+        storage (StorageConfig): 订单数据存储配置
+        query (QueryConfig): 向服务端查询数据的配置
+        expiry (ExpiryConfig): 订单过期配置
+        rate_limit (RateLimitConfig): 玩家命令的频率限制配置
+        pipeline (PipelineConfig): 寄件和收件命令的执行配置
     """
 
     max_storage: int = 5
@@ -77,7 +294,14 @@ class Configuration(Serializable):
     auto_fix: bool = False
     auto_register: bool = True
     receiving_tip_delay: float = 3
+    list_page_size: int = 10
+    stage_timing: bool = True
     permissions: CommandPermissions = CommandPermissions.get_default()
+    storage: StorageConfig = StorageConfig.get_default()
+    query: QueryConfig = QueryConfig.get_default()
+    expiry: ExpiryConfig = ExpiryConfig.get_default()
+    rate_limit: RateLimitConfig = RateLimitConfig.get_default()
+    pipeline: PipelineConfig = PipelineConfig.get_default()
 
     # Deprecated but for compatibility
     command_permission: CommandPermissions = CommandPermissions.get_default()
@@ -91,3 +315,7 @@ class Configuration(Serializable):
             raise InvalidConfig(
                 f"Config {attr_name} is invalid, expected {expected_type} but found {type(attr_value)}"
             )
+        if attr_name == "list_page_size" and attr_value <= 0:
+            raise InvalidConfig(
+                f"list_page_size must be positive, found: {attr_value}"
+            )
@@ -7,6 +7,12 @@ CONFIG_FILE_NAME: Literal["config.yml"] = "config.yml"
 CONFIG_FILE_TYPE: Literal["yaml"] = "yaml"
 ORDER_DATA_FILE_NAME: Literal["orders.json"] = "orders.json"
 ORDERS_DATA_FILE_TYPE: Literal["json"] = "json"
+ORDER_JOURNAL_FILE_NAME: Literal["orders.journal"] = "orders.journal"
+ORDER_DATABASE_FILE_NAME: Literal["orders.db"] = "orders.db"
+ORDER_BINARY_DATA_FILE_NAME: Literal["orders.bin"] = "orders.bin"
+ORDER_EXPORT_FILE_NAME: Literal["orders.export.json"] = "orders.export.json"
+ORDER_ARCHIVE_FILE_NAME: Literal["orders.archive.jsonl"] = "orders.archive.jsonl"
+STATS_FILE_NAME: Literal["stats.json"] = "stats.json"
 
 SIMPLE_HELP_MESSAGE = {
     "en_us": "post/teleport weapon hands items",
@@ -28,7 +34,8 @@ class Deprecations:
 class Commands:
     REPLACE_OLD = "replaceitem entity {0} weapon.offhand {1}"
     REPLACE_NEW = "item replace entity {0} weapon.offhand with {1}"
-    GET_ITEM = "data get entity {0} Inventory[{Slot:-106b}]"
+    GET_ITEM = "data get entity {0} Inventory[{{Slot:-106b}}]"
+    GIVE = "give {0} {1}"
     PLAY_SOUND_NEW = "execute at {0} run {1} player {0}"
     PLAY_SOUND_OLD = "execute {0} ~ ~ ~ playsound {1} player {0}"
 
@@ -3,6 +3,8 @@ from typing import Any
 
 from mcdreforged import Serializable
 
+from mcdrpost.utils import snbt
+
 
 class Item(Serializable):
     """物品数据类，表示 Minecraft 中的物品
@@ -40,6 +42,15 @@ class Item(Serializable):
         if attr_name == "count" and attr_value <= 0:
             raise ValueError(f"Invalid item: count must be positive ({attr_value})")
 
+    def on_deserialization(self, **kwargs):
+        self.components = snbt.from_json(self.components)
+
+    def serialize(self) -> dict:
+        # Byte 等带类型的值写入 JSON 后会变成普通的数字, 见 snbt.to_json
+        data = super().serialize()
+        data["components"] = snbt.to_json(self.components)
+        return data
+
 
 class OrderInfo(Serializable):
     """订单信息"""
@@ -59,6 +70,12 @@ class OrderInfo(Serializable):
     item: Item
     """物品"""
 
+    def serialize(self) -> dict:
+        # MCDR 不会调用嵌套对象的 serialize
+        data = super().serialize()
+        data["item"] = self.item.serialize()
+        return data
+
 
 class Order(Serializable):
     """订单"""
@@ -81,6 +98,11 @@ class Order(Serializable):
     item: Item
     """物品"""
 
+    def serialize(self) -> dict:
+        data = super().serialize()
+        data["item"] = self.item.serialize()
+        return data
+
     def validate_attribute(self, attr_name: str, attr_value: Any, **kwargs):
         if attr_name == "id" and attr_value <= 0:
             raise ValueError(f"Invalid order: id must be positive (found {attr_value})")
@@ -97,3 +119,8 @@ class OrderData(Serializable):
 
     orders: dict[str, Order] = {}
     """订单数据"""
+
+    def serialize(self) -> dict:
+        data = super().serialize()
+        data["orders"] = {key: order.serialize() for key, order in self.orders.items()}
+        return data
@@ -1,9 +1,24 @@
 import re
 
-from pydantic import BaseModel, Field, PositiveInt, field_validator
+from typing import Any, Self
 
+from pydantic import BaseModel, Field, PositiveInt, field_serializer, field_validator
 
-class Item(BaseModel):
+from mcdrpost.utils import snbt
+
+
+class _SerializableModel(BaseModel):
+    """为 pydantic 模型提供与 ``mcdreforged.Serializable`` 相同的序列化接口"""
+
+    def serialize(self) -> dict:
+        return self.model_dump(mode="json")
+
+    @classmethod
+    def deserialize(cls, data: dict, **kwargs) -> Self:
+        return cls.model_validate(data)
+
+
+class Item(_SerializableModel):
     """物品数据类，表示 Minecraft 中的物品
 
     .. note::
@@ -36,8 +51,18 @@ class Item(BaseModel):
             raise ValueError(f"Invalid item: invalid item name with illegal char(s) ({name})")
         return value
 
+    @field_validator('components', mode='before')
+    @classmethod
+    def decode_components(cls, value: Any) -> Any:
+        return snbt.from_json(value)
+
+    @field_serializer('components', when_used='json')
+    def encode_components(self, value: dict) -> dict:
+        # Byte 等带类型的值写入 JSON 后会变成普通的数字, 见 snbt.to_json
+        return snbt.to_json(value)
+
 
-class OrderInfo(BaseModel):
+class OrderInfo(_SerializableModel):
     """订单信息"""
 
     time: str
@@ -56,7 +81,7 @@ class OrderInfo(BaseModel):
     """物品"""
 
 
-class Order(BaseModel):
+class Order(_SerializableModel):
     """订单"""
 
     id: PositiveInt
@@ -78,7 +103,7 @@ class Order(BaseModel):
     """物品"""
 
 
-class OrderData(BaseModel):
+class OrderData(_SerializableModel):
     """订单数据存储结构
 
     orders.json 的结构在这里定义
@@ -6,15 +6,26 @@ from mcdrpost.utils.version import MinecraftVersion
 class Environment:
     def __init__(self, server: PluginServerInterface) -> None:
         self._server = server
+        self._server_version: MinecraftVersion | None = None
 
     @property
     def _info(self):
         return self._server.get_server_information()
 
+    def snapshot(self) -> None:
+        """重新读取服务器版本, 在服务器启动时调用
+
+        在此之后 :attr:`server_version` 会一直返回这次读取的结果, 而不是每次都重新解析版本号
+        """
+        self._server_version = MinecraftVersion(self._info.version)
+
     @property
     def server_version(self) -> MinecraftVersion:
-        """Minecraft 服务器版本"""
-        return MinecraftVersion(self._info.version)
+        """Minecraft 服务器版本, 见 :meth:`snapshot`"""
+        version = self._server_version
+        if version is None:
+            version = self._server_version = MinecraftVersion(self._info.version)
+        return version
 
     @property
     def mcdr_handler(self) -> str:
@@ -1,6 +1,7 @@
-from typing import TYPE_CHECKING, cast
+from typing import Callable, Iterable, Literal as Literal_, TYPE_CHECKING, cast
 
 from mcdreforged import (
+    CommandContext,
     CommandSource,
     GreedyText,
     InfoCommandSource,
@@ -16,6 +17,7 @@ from mcdrpost.constants import SIMPLE_HELP_MESSAGE
 from mcdrpost.manager.post_manager import PostManager
 from mcdrpost.utils.command.command_helper import CommandHelper
 from mcdrpost.utils.command.pre_handler import CommandPreHandler
+from mcdrpost.utils.metrics import metrics
 from mcdrpost.utils.node_addition import add_requirements
 from mcdrpost.utils.translation import TranslationKeys
 
@@ -61,14 +63,70 @@ class CommandManager:
             self._server.register_help_message(prefix, SIMPLE_HELP_MESSAGE)
             self._server.register_command(self.generate_command_node(prefix))
 
+    # suggestions
+    @staticmethod
+    def typed(ctx: CommandContext, arg: str) -> str:
+        """补全时玩家已经输入的参数前缀
+
+        参数能够解析时 MCDR 已经把它放进了上下文, 否则 (如输入了非数字的订单号) 它还在未读取的命令中
+        """
+        if arg in ctx:
+            return str(ctx[arg])
+        return ctx.command_remaining.partition(" ")[0]
+
+    def suggest_players(self, arg: str) -> Callable[[CommandSource, CommandContext], Iterable[str]]:
+        """补全已注册的玩家"""
+        return lambda src, ctx: self.data_manager.suggest_players(self.typed(ctx, arg))
+
+    def suggest_player_list(self, arg: str) -> Callable[[CommandSource, CommandContext], Iterable[str]]:
+        """补全 ``a,b,c`` 形式的玩家列表中的最后一个玩家"""
+
+        def suggest(_src: CommandSource, ctx: CommandContext) -> Iterable[str]:
+            head, sep, last = self.typed(ctx, arg).rpartition(",")
+            players = self.data_manager.suggest_players(last)
+            if not sep:
+                return players
+            return [f"{head},{player}" for player in players]
+
+        return suggest
+
+    def suggest_order_ids(
+            self, arg: str, role: Literal_["sender", "receiver"]
+    ) -> Callable[[CommandSource, CommandContext], Iterable[str]]:
+        """补全玩家寄出 (``sender``) 或者待收 (``receiver``) 的订单 ID, 控制台没有订单可以补全"""
+
+        def suggest(src: CommandSource, ctx: CommandContext) -> Iterable[str]:
+            player = cast(InfoCommandSource, src).get_info().player
+            if player is None:
+                return ()
+            return self.data_manager.suggest_order_ids(player, role, self.typed(ctx, arg))
+
+        return suggest
+
     # nodes
+    @staticmethod
+    def paged(node: Literal, output: Callable[[InfoCommandSource, int, str], None]) -> Literal:
+        """给列表命令加上可选的页码和筛选条件: ``<node> [<page>] [<filters>]``
+
+        MCDR 的参数节点解析失败时不会尝试其他的兄弟节点, 所以页码和筛选条件放在同一个参数中, 由这里拆分
+        """
+
+        def run(src: CommandSource, ctx: CommandContext) -> None:
+            page, filters = 1, ctx.get("args", "").strip()
+            first, _, rest = filters.partition(" ")
+            if first.lstrip("-").isdigit():
+                page, filters = int(first), rest
+            output(cast(InfoCommandSource, src), page, filters)
+
+        return node.runs(run).then(GreedyText("args").runs(run))
+
     def gen_post_node(self, node_name: str) -> Literal:
         return add_requirements(
             Literal(node_name)
             .runs(lambda src: src.reply(TranslationKeys.post_fail_receiver_unregistered.rtr()))
             .then(
                 Text("receiver")
-                .suggests(self.data_manager.get_players)
+                .suggests(self.suggest_players("receiver"))
                 .runs(self.pre_handler.post)
                 .then(GreedyText("comment").runs(self.pre_handler.post))
             ),
@@ -78,7 +136,7 @@ class CommandManager:
 
     def gen_post_list_node(self, node_name: str) -> Literal:
         return add_requirements(
-            Literal(node_name).runs(lambda src: self._helper.output_post_list(src)),
+            self.paged(Literal(node_name), self._helper.output_post_list),
             permission=self._perm.post,
             require_player=True,
         )
@@ -89,15 +147,17 @@ class CommandManager:
             .runs(lambda src: src.reply(TranslationKeys.receive_fail_undefined_id.rtr()))
             .then(
                 Integer("orderid")
-                .suggests(
-                    lambda src: [
-                        str(i)
-                        for i in self.data_manager.get_orderid_by_receiver(
-                            src.get_info().player
-                        )
-                    ]
-                )
+                .suggests(self.suggest_order_ids("orderid", "receiver"))
                 .runs(self.pre_handler.receive)
+                .then(Integer("to_orderid").runs(self.pre_handler.receive_range))
+            )
+            .then(Literal("all").runs(self.pre_handler.receive_all))
+            .then(
+                Literal("from").then(
+                    Text("player")
+                    .suggests(self.suggest_players("player"))
+                    .runs(self.pre_handler.receive_from)
+                )
             ),
             permission=self._perm.receive,
             require_player=True,
@@ -105,11 +165,7 @@ class CommandManager:
 
     def gen_receive_list_node(self, node_name: str) -> Literal:
         return add_requirements(
-            Literal(node_name).runs(
-                lambda src: self._helper.output_receive_list(
-                    cast(InfoCommandSource, src)
-                )
-            ),
+            self.paged(Literal(node_name), self._helper.output_receive_list),
             permission=self._perm.receive,
             require_player=True,
         )
@@ -120,20 +176,45 @@ class CommandManager:
             .runs(lambda src: src.reply(TranslationKeys.cancel_fail_undefined_id.tr()))
             .then(
                 Integer("orderid")
-                .suggests(
-                    lambda src: [
-                        str(i)
-                        for i in self.data_manager.get_orderid_by_sender(
-                            src.get_info().player
-                        )
-                    ]
-                )
+                .suggests(self.suggest_order_ids("orderid", "sender"))
                 .runs(self.pre_handler.cancel)
+                .then(Integer("to_orderid").runs(self.pre_handler.cancel_range))
+            )
+            .then(Literal("all").runs(self.pre_handler.cancel_all))
+            .then(
+                Literal("to").then(
+                    Text("player")
+                    .suggests(self.suggest_players("player"))
+                    .runs(self.pre_handler.cancel_to)
+                )
             ),
             permission=self._perm.cancel,
             require_player=True,
         )
 
+    def gen_broadcast_node(self, node_name: str) -> Literal:
+        def targets(callback) -> list[Literal | Text]:
+            # 没有 receivers 参数时表示所有已注册的玩家
+            return [
+                Literal("all").runs(callback).then(GreedyText("comment").runs(callback)),
+                Text("receivers")
+                .suggests(self.suggest_player_list("receivers"))
+                .runs(callback)
+                .then(GreedyText("comment").runs(callback)),
+            ]
+
+        node = Literal(node_name).runs(lambda src: src.reply(TranslationKeys.error_incomplete_receiver.rtr()))
+        split = Literal("split").runs(lambda src: src.reply(TranslationKeys.error_incomplete_receiver.rtr()))
+        for child in targets(self.pre_handler.broadcast):
+            node.then(child)
+        for child in targets(self.pre_handler.broadcast_split):
+            split.then(child)
+        return add_requirements(
+            node.then(split),
+            permission=self._perm.broadcast,
+            require_player=True,
+        )
+
     def gen_list_node(self, node_name: str) -> Literal:
         return (
             Literal(node_name)
@@ -149,37 +230,27 @@ class CommandManager:
                 )
             )
             .then(
-                Literal("orders")
-                .requires(lambda src: src.has_permission(self._perm.list_orders))
-                .on_error(
-                    RequirementNotMet,
-                    lambda src: src.reply(TranslationKeys.error_no_perm.rtr()),
-                    handled=True,
-                )
-                .runs(
-                    lambda src: self._helper.output_all_orders(
-                        cast(InfoCommandSource, src)
-                    )
+                self.paged(
+                    Literal("orders")
+                    .requires(lambda src: src.has_permission(self._perm.list_orders))
+                    .on_error(
+                        RequirementNotMet,
+                        lambda src: src.reply(TranslationKeys.error_no_perm.rtr()),
+                        handled=True,
+                    ),
+                    self._helper.output_all_orders,
                 )
             )
             .then(
                 add_requirements(
-                    Literal("receive").runs(
-                        lambda src: self._helper.output_receive_list(
-                            cast(InfoCommandSource, src)
-                        )
-                    ),
+                    self.paged(Literal("receive"), self._helper.output_receive_list),
                     permission=self._perm.receive,
                     require_player=True,
                 )
             )
             .then(
                 add_requirements(
-                    Literal("post").runs(
-                        lambda src: self._helper.output_post_list(
-                            cast(InfoCommandSource, src)
-                        )
-                    ),
+                    self.paged(Literal("post"), self._helper.output_post_list),
                     permission=self._perm.post,
                     require_player=True,
                 )
@@ -206,18 +277,35 @@ class CommandManager:
                 .runs(lambda src: src.reply(TranslationKeys.error_incomplete_general.rtr()))
                 .then(
                     Text("player_id")
-                    .suggests(self.data_manager.get_players)
+                    .suggests(self.suggest_players("player_id"))
                     .runs(self.pre_handler.remove_player)
                 )
             )
         )
 
+    def gen_stats_node(self, node_name: str) -> Literal:
+        return (
+            Literal(node_name)
+            .requires(lambda src: src.has_permission(self._perm.stats))
+            .on_error(
+                RequirementNotMet,
+                lambda src: src.reply(TranslationKeys.error_no_perm.rtr()),
+                handled=True,
+            )
+            .runs(self._helper.output_stats)
+            .then(Literal("dump").runs(self._helper.dump_stats))
+        )
+
     def gen_reload_node(self, prefix) -> Literal:
         """deprecated in 2026.2.15"""
 
         def reload(src: CommandSource):
             self.coo.config_manager.reload()
             self.coo.data_manager.reload()
+            self.coo.version_manager.start_query_executor(self.coo.config.query)
+            self.pre_handler.configure_rate_limit(self.coo.config.rate_limit)
+            self._post_manager.start_pipeline(self.coo.config.pipeline)
+            metrics.timing = self.coo.config.stage_timing
             src.reply(TranslationKeys.config_reloaded.rtr())
             src.reply(TranslationKeys.data_loaded.rtr())
 
@@ -255,8 +343,11 @@ class CommandManager:
             .then(self.gen_receive_list_node("receive_list"))
             .then(self.gen_cancel_node("c"))
             .then(self.gen_cancel_node("cancel"))
+            .then(self.gen_broadcast_node("bc"))
+            .then(self.gen_broadcast_node("broadcast"))
             .then(self.gen_list_node("ls"))
             .then(self.gen_list_node("list"))
             .then(self.gen_player_node("player"))
+            .then(self.gen_stats_node("stats"))
             # .then(self.gen_reload_node("reload"))
         )
@@ -1,9 +1,22 @@
-from collections import defaultdict
-from typing import DefaultDict, TYPE_CHECKING
+import itertools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Literal, TYPE_CHECKING
 
 from mcdrpost import constants
-from mcdrpost.data_structure import Order, OrderData, OrderInfo
-from mcdrpost.utils.exception import InvalidOrder
+from mcdrpost.data_structure import Order, OrderInfo
+from mcdrpost.storage.abstract_storage import AbstractOrderStorage
+from mcdrpost.storage.expiry_queue import ExpiryQueue, ExpiryScheduler
+from mcdrpost.storage.json_storage import JsonOrderStorage
+from mcdrpost.storage.order_query import OrderPage, OrderQuery
+from mcdrpost.storage.order_record import to_timestamp
+from mcdrpost.storage.prefix_index import IdPrefixIndex, PrefixIndex
+from mcdrpost.storage.sqlite_storage import SqliteOrderStorage
+from mcdrpost.utils.general import get_formatted_time
+from mcdrpost.utils.metrics import metrics
 from mcdrpost.utils.translation import TranslationKeys
 
 if TYPE_CHECKING:
@@ -11,7 +24,24 @@ if TYPE_CHECKING:
 
 
 class DataManager:
-    """订单管理器"""
+    """订单管理器
+
+    数据的存取由存储后端 (:class:`~mcdrpost.storage.abstract_storage.AbstractOrderStorage`) 完成,
+    使用哪一个后端由配置 ``storage.backend`` 决定
+
+    .. versionchanged:: v3.4.1
+        支持 SQLite 存储后端
+    """
+
+    STORAGE_BACKENDS: dict[str, type[AbstractOrderStorage]] = {
+        "json": JsonOrderStorage,
+        "sqlite": SqliteOrderStorage,
+    }
+
+    QUERY_CACHE_SIZE = 32
+    """最多缓存多少个列表查询的结果"""
+    QUERY_CACHE_TTL = 60
+    """带有时间条件的查询结果的有效期, 单位为秒, 其他查询结果在订单被修改之前一直有效"""
 
     def __init__(self, coo: "MCDRpostCoordinator") -> None:
         """初始化
@@ -24,74 +54,108 @@ class DataManager:
         self._server = coo.server
         self._logger = coo.logger
 
-        # index
-        self._sender_index: DefaultDict[str, list[int]] = defaultdict(list)
-        self._receiver_index: DefaultDict[str, list[int]] = defaultdict(list)
+        # storage, 数据在 reload() 中加载
+        self._storage: AbstractOrderStorage = self.__create_storage()
 
-        # load data
-        self._order_data: OrderData = self._server.load_config_simple(
-            constants.ORDER_DATA_FILE_NAME,
-            target_class=OrderData,
-            file_format=constants.ORDERS_DATA_FILE_TYPE,
-            echo_in_console=False,
-        )
+        # 正在被批量收件/取消处理的订单 -> (寄件人, 收件人), 见 reserve_orders()
+        self._reservation_lock = threading.Lock()
+        self._reserved: dict[int, tuple[str, str]] = {}
 
-    def build_index(self) -> None:
-        """构建索引"""
-        self._sender_index.clear()
-        self._receiver_index.clear()
-        for order in self._order_data.orders.values():
-            self._sender_index[order.sender].append(order.id)
-            self._receiver_index[order.receiver].append(order.id)
+        # 命令补全的缓存, 在订单和玩家被修改时增量更新, 见 suggest_players() 和 suggest_order_ids()
+        self._suggestion_lock = threading.Lock()
+        self._player_suggestions = PrefixIndex()
+        # (寄件人/收件人, 玩家) -> 订单 ID 的字符串, 在第一次补全这个玩家的订单时创建
+        self._order_suggestions: dict[tuple[str, str], IdPrefixIndex] = {}
 
-    def check_orders(self) -> None:
-        """检查订单
+        # 列表查询的缓存, 订单每次被修改时 revision 都会改变, 旧的缓存随之失效
+        self._revisions = itertools.count()
+        self._revision = next(self._revisions)
+        self._query_lock = threading.Lock()
+        self._query_cache: OrderedDict[OrderQuery, tuple[int, float, list[int]]] = OrderedDict()
 
-        主要是订单的 ID 能不能对上索引
+        # 订单的过期时间, 在 reload() 中按配置 expiry 构建, 未启用时为 None
+        self._expiry: ExpiryQueue | None = None
+        self._expiry_scheduler: ExpiryScheduler | None = None
 
-        .. versionchanged:: v3.1.1
-            修复时使用索引作为订单 ID
-        """
-        is_fixed = False
-        for order_id, order in self._order_data.orders.items():
-            if str(order.id) == order_id:
-                continue
-            if not self.coo.config.auto_fix:
-                raise InvalidOrder(
-                    TranslationKeys.data_validation_failed.rtr(order_id, order.id)
-                )
-            self._logger.error(
-                TranslationKeys.data_validation_failed.rtr(order_id, order.id)
-            )
-            self._logger.error(TranslationKeys.data_auto_fix.rtr(order_id))
-            self._order_data.orders[order_id].id = int(order_id)
-            is_fixed = True
-
-        if is_fixed:
-            self.save()
+    def __touch(self) -> None:
+        """订单被修改时调用"""
+        self._revision = next(self._revisions)
+
+    def __create_storage(self) -> AbstractOrderStorage:
+        return self.STORAGE_BACKENDS[self.coo.config.storage.backend](self.coo)
+
+    @property
+    def storage(self) -> AbstractOrderStorage:
+        """当前使用的存储后端"""
+        return self._storage
 
     def reload(self) -> None:
+        """(重新)加载订单数据, 会按照当前配置重新选择存储后端
+
+        原来的后端在关闭时会写入还在等待后台保存的修改, 所以重新加载不会丢失已经提交的修改
+        """
         self._logger.info(TranslationKeys.data_loaded.rtr())
-        self._order_data = self._server.load_config_simple(
-            constants.ORDER_DATA_FILE_NAME,
-            target_class=OrderData,
-            file_format=constants.ORDERS_DATA_FILE_TYPE,
-            echo_in_console=False,
-        )
-        self.check_orders()
-        self.build_index()
+        self._storage.close()
+        self._storage = self.__create_storage()
+        self._storage.load()
+        self.__touch()
+        with self._suggestion_lock:
+            self._player_suggestions = PrefixIndex(self._storage.get_players())
+            self._order_suggestions.clear()
+        self.__build_expiry()
 
     def save(self) -> None:
-        self._logger.info(TranslationKeys.data_saved.rtr())
-        # 直接对订单进行排序
-        self._order_data.orders = dict(
-            sorted(self._order_data.orders.items(), key=lambda item: int(item[0]))
-        )
-        self._server.save_config_simple(
-            self._order_data,
-            constants.ORDER_DATA_FILE_NAME,
-            file_format=constants.ORDERS_DATA_FILE_TYPE,
+        """立即持久化全部订单数据"""
+        with metrics.span("stage.save"):
+            self._storage.save()
+
+    def commit(self) -> None:
+        """持久化自上次提交以来的修改, 由存储后端决定是否延迟写入"""
+        with metrics.span("stage.commit"):
+            self._storage.commit()
+
+    def close(self) -> None:
+        """释放存储后端的资源, 在插件卸载时调用
+
+        .. note::
+            只会写入已经 :meth:`commit` 的修改, 请在调用前先调用 :meth:`save`
+        """
+        self.__stop_expiry()
+        self._storage.close()
+
+    def export_json(self, path: str | None = None) -> int:
+        """把全部订单导出为与 ``orders.json`` 相同格式的文件
+
+        Args:
+            path (str | None): 导出的文件路径, 默认为数据文件夹中的 ``orders.export.json``
+
+        Returns:
+            int: 导出的订单数量
+        """
+        if path is None:
+            path = os.path.join(self._server.get_data_folder(), constants.ORDER_EXPORT_FILE_NAME)
+        return self._storage.export_json(path)
+
+    def stats(self) -> dict[str, int | str]:
+        """订单、索引和缓存的大小, 用于 ``!!po stats``"""
+        data_folder = self._server.get_data_folder()
+        data_files = (
+            constants.ORDER_DATA_FILE_NAME, constants.ORDER_BINARY_DATA_FILE_NAME,
+            constants.ORDER_JOURNAL_FILE_NAME, constants.ORDER_DATABASE_FILE_NAME,
         )
+        return {
+            "backend": self.coo.config.storage.backend,
+            "players": len(self._player_suggestions),
+            "orders": len(self._storage.get_order_ids()),
+            "reserved": len(self._reserved),
+            "expiring": len(self._expiry) if self._expiry is not None else 0,
+            "query_cache": len(self._query_cache),
+            "suggestion_indexes": len(self._order_suggestions),
+            "data_bytes": sum(
+                os.path.getsize(path) for path in (os.path.join(data_folder, name) for name in data_files)
+                if os.path.isfile(path)
+            ),
+        }
 
     def is_player_registered(self, player: str) -> bool:
         """检查玩家是否已经注册
@@ -102,34 +166,24 @@ class DataManager:
         Returns:
             bool: 是否已经注册
         """
-        return player in self._order_data.players
+        return self._storage.is_player_registered(player)
 
     def add_player(self, player: str) -> bool:
-        if player in self._order_data.players:
+        if not self._storage.add_player(player):
             return False
-        self._order_data.players.append(player)
+        with self._suggestion_lock:
+            self._player_suggestions.add(player)
         return True
 
     def remove_player(self, player: str) -> bool:
-        if player not in self._order_data.players:
+        if not self._storage.remove_player(player):
             return False
-        self._order_data.players.remove(player)
+        with self._suggestion_lock:
+            self._player_suggestions.discard(player)
         return True
 
     def get_players(self) -> list[str]:
-        return self._order_data.players
-
-    def __get_next_id(self) -> int:
-        """获取最小的有效 ID"""
-        if not self._order_data.orders:
-            return 1
-
-        order_id = 1
-        id_set = set(o.id for o in self._order_data.orders.values())
-        while order_id in id_set:
-            order_id += 1
-
-        return order_id
+        return self._storage.get_players()
 
     def add_order(self, order: OrderInfo) -> int:
         """添加订单
@@ -145,60 +199,339 @@ class DataManager:
         """
         if not isinstance(order, OrderInfo):
             raise TypeError("不支持非 OrderInfo 类型的订单信息")
+        order_id = self._storage.add_order(order)
+        self.__touch()
+        self.__update_order_suggestions([(order_id, order.sender, order.receiver)], added=True)
+        self.__schedule_expiry([(order_id, to_timestamp(order.time), order.item.id)])
+        return order_id
+
+    def add_orders(self, orders: list[OrderInfo]) -> list[int]:
+        """在一次存储操作中添加多个订单, 之后只需要调用一次 :meth:`commit`
+
+        Args:
+            orders (list[OrderInfo]): 订单信息
 
-        order_id = self.__get_next_id()
-        self._order_data.orders[str(order_id)] = Order(
-            **order.serialize(),
-            id=order_id,
+        Returns:
+            list[int]: 与 ``orders`` 一一对应的订单 ID
+
+        Raises:
+            TypeError: 订单信息类型错误
+        """
+        if not all(isinstance(order, OrderInfo) for order in orders):
+            raise TypeError("不支持非 OrderInfo 类型的订单信息")
+        order_ids = self._storage.add_orders(orders)
+        self.__touch()
+        self.__update_order_suggestions(
+            [(order_id, order.sender, order.receiver) for order_id, order in zip(order_ids, orders)], added=True
         )
-        self._sender_index[order.sender].append(order_id)
-        self._sender_index[order.sender].sort()
-        self._receiver_index[order.receiver].append(order_id)
-        self._receiver_index[order.receiver].sort()
-        return order_id
+        self.__schedule_expiry(
+            (order_id, to_timestamp(order.time), order.item.id) for order_id, order in zip(order_ids, orders)
+        )
+        return order_ids
 
     def remove_order(self, order_id: int) -> bool:
-        if str(order_id) not in self._order_data.orders:
+        try:
+            # 更新补全缓存需要知道寄件人和收件人
+            order = self._storage.get_order(order_id)
+        except KeyError:
             return False
-        order = self._order_data.orders[str(order_id)]
-
-        self._sender_index[order.sender].remove(order_id)
-        self._receiver_index[order.receiver].remove(order_id)
-        del self._order_data.orders[str(order_id)]
+        if not self._storage.remove_order(order_id):
+            return False
+        self.__touch()
+        self.__update_order_suggestions([(order_id, order.sender, order.receiver)], added=False)
+        self.__unschedule_expiry([order_id])
         return True
 
     def get_order(self, order_id: int) -> Order:
-        return self._order_data.orders[str(order_id)]
+        return self._storage.get_order(order_id)
 
     def get_orders(self) -> list[Order]:
-        return list(self._order_data.orders.values())
+        return self._storage.get_orders()
 
     def contain_order(self, order_id: int) -> bool:
-        return str(order_id) in self._order_data.orders
+        return self._storage.contain_order(order_id)
 
     def get_orderid_by_sender(self, sender: str) -> list[int]:
-        return self._sender_index[sender]
+        return self._storage.get_orderid_by_sender(sender)
 
     def get_orderid_by_receiver(self, receiver: str) -> list[int]:
-        return self._receiver_index[receiver]
+        return self._storage.get_orderid_by_receiver(receiver)
+
+    def is_sender(self, order_id: int, player: str) -> bool:
+        """玩家是不是订单的寄件人"""
+        return self._storage.is_sender(order_id, player)
+
+    def is_receiver(self, order_id: int, player: str) -> bool:
+        """玩家是不是订单的收件人"""
+        return self._storage.is_receiver(order_id, player)
+
+    def count_orders_by_sender(self, sender: str) -> int:
+        return self._storage.count_orders_by_sender(sender)
 
     def get_orders_by_sender(self, sender: str) -> list[Order]:
-        return [
-            self._order_data.orders[str(order_id)]
-            for order_id in self._sender_index[sender]
-        ]
+        return self._storage.get_orders_by_sender(sender)
 
     def get_orders_by_receiver(self, receiver: str) -> list[Order]:
-        return [
-            self._order_data.orders[str(order_id)]
-            for order_id in self._receiver_index[receiver]
-        ]
+        return self._storage.get_orders_by_receiver(receiver)
 
     def has_unreceived_order(self, player: str) -> bool:
-        return bool(self._receiver_index[player])
+        return self._storage.has_unreceived_order(player)
+
+    # suggestions
+    def suggest_players(self, prefix: str = "") -> list[str]:
+        """按名称顺序获取以 ``prefix`` 开头的已注册玩家, 用于命令补全, 不需要访问存储后端"""
+        with self._suggestion_lock:
+            return self._player_suggestions.startswith(prefix)
+
+    def suggest_order_ids(self, player: str, role: Literal["sender", "receiver"], prefix: str = "") -> list[str]:
+        """按数值顺序获取玩家寄出 (``sender``) 或者待收 (``receiver``) 的、以 ``prefix`` 开头的订单 ID, 用于命令补全
+
+        每个玩家的缓存在第一次补全时从索引创建, 之后随着订单的增删增量更新
+        """
+        key = (role, player)
+        with self._suggestion_lock:
+            index = self._order_suggestions.get(key)
+            if index is None:
+                if role == "sender":
+                    order_ids = self._storage.get_orderid_by_sender(player)
+                else:
+                    order_ids = self._storage.get_orderid_by_receiver(player)
+                index = self._order_suggestions[key] = IdPrefixIndex(order_ids)
+            return index.startswith(prefix)
+
+    def __update_order_suggestions(self, orders: Iterable[tuple[int, str, str]], added: bool) -> None:
+        """订单被修改之后更新已经创建的补全缓存
+
+        Args:
+            orders (Iterable[tuple[int, str, str]]): (订单 ID, 寄件人, 收件人)
+            added (bool): 订单是被添加还是被删除
+        """
+        with self._suggestion_lock:
+            for order_id, sender, receiver in orders:
+                for key in (("sender", sender), ("receiver", receiver)):
+                    index = self._order_suggestions.get(key)
+                    if index is None:
+                        continue
+                    if added:
+                        index.add(order_id)
+                    else:
+                        index.discard(order_id)
+
+    # listing
+    def find_order_ids(self, query: OrderQuery) -> list[int]:
+        """按条件筛选并排序订单, 结果会被缓存
+
+        Returns:
+            list[int]: 排好序的订单 ID, 这个列表可能会被缓存共享, 不要修改它
+        """
+        now = time.monotonic()
+        with self._query_lock:
+            cached = self._query_cache.get(query)
+            if cached is not None:
+                revision, created, order_ids = cached
+                if revision == self._revision and (not query.has_age_filter or now - created < self.QUERY_CACHE_TTL):
+                    self._query_cache.move_to_end(query)
+                    return order_ids
+            # 查询期间订单被修改时, 这个结果在下一次查询时就会失效
+            revision = self._revision
+
+        order_ids = self._storage.find_order_ids(query)
+        with self._query_lock:
+            self._query_cache[query] = (revision, now, order_ids)
+            self._query_cache.move_to_end(query)
+            while len(self._query_cache) > self.QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        return order_ids
+
+    def get_order_page(self, query: OrderQuery, page: int, page_size: int) -> OrderPage:
+        """获取列表的一页, 只会读取这一页的订单
+
+        Args:
+            query (OrderQuery): 筛选和排序条件
+            page (int): 页码, 从 1 开始, 超出范围时取最近的一页
+            page_size (int): 每页的订单数量
+        """
+        order_ids = self.find_order_ids(query)
+        pages = max(1, -(-len(order_ids) // page_size))
+        page = min(max(page, 1), pages)
+        orders = []
+        for order_id in order_ids[(page - 1) * page_size:page * page_size]:
+            try:
+                orders.append(self._storage.get_order(order_id))
+            except KeyError:
+                # 订单刚刚被删除
+                continue
+        return OrderPage(orders, page, pages, len(order_ids))
 
     def pop_order(self, order_id: int) -> Order:
-        order = self.get_order(order_id)
-        self.remove_order(order_id)
-        self.save()
+        """删除并返回订单
+
+        Raises:
+            KeyError: 订单不存在, 或者已经被预留
+        """
+        with self._reservation_lock:
+            if order_id in self._reserved:
+                raise KeyError(order_id)
+            order = self._storage.pop_order(order_id)
+        self.__touch()
+        self.__update_order_suggestions([(order_id, order.sender, order.receiver)], added=False)
+        self.__unschedule_expiry([order_id])
         return order
+
+    # reservation
+    def is_reserved(self, order_id: int) -> bool:
+        """订单是否已经被 :meth:`reserve_orders` 预留"""
+        return order_id in self._reserved
+
+    def reserve_orders(self, order_ids: Iterable[int]) -> list[Order]:
+        """原子地预留多个订单, 用于批量收件和取消
+
+        已经被预留或者不存在的订单会被跳过. 被预留的订单仍然在中转站中, 但不能再被 :meth:`pop_order` 取出,
+        处理完成之后必须调用 :meth:`complete_reservation` 或 :meth:`release_reservation`
+
+        Args:
+            order_ids (Iterable[int]): 订单 ID
+
+        Returns:
+            list[Order]: 成功预留的订单
+        """
+        orders = []
+        with self._reservation_lock:
+            for order_id in order_ids:
+                if order_id in self._reserved or not self._storage.contain_order(order_id):
+                    continue
+                order = self._storage.get_order(order_id)
+                orders.append(order)
+                self._reserved[order_id] = (order.sender, order.receiver)
+        return orders
+
+    def complete_reservation(self, order_ids: Iterable[int]) -> int:
+        """删除已经处理完成的预留订单, 并只提交一次修改
+
+        Returns:
+            int: 删除的订单数量
+        """
+        order_ids = list(order_ids)
+        with self._reservation_lock:
+            removed = self._storage.remove_orders(order_ids)
+            parties = [(order_id, *self._reserved.pop(order_id)) for order_id in order_ids if order_id in self._reserved]
+        self.__touch()
+        self.__update_order_suggestions(parties, added=False)
+        self.__unschedule_expiry(order_ids)
+        self._storage.commit()
+        return removed
+
+    def release_reservation(self, order_ids: Iterable[int]) -> None:
+        """取消预留, 订单恢复为可以正常收取的状态"""
+        with self._reservation_lock:
+            for order_id in order_ids:
+                self._reserved.pop(order_id, None)
+
+    # expiry
+    def __build_expiry(self) -> None:
+        """按配置 ``expiry`` 为所有订单计算过期时间, 并启动清理线程"""
+        self.__stop_expiry()
+        config = self.coo.config.expiry
+        if not config.enabled:
+            self._expiry = None
+            return
+        entries = []
+        for row in self._storage.get_order_rows():
+            ttl = config.ttl_of(row.item)
+            # 无法解析的时间为 0, 这样的订单不会过期
+            if ttl is not None and row.time > 0:
+                entries.append((row.id, row.time + ttl))
+        self._expiry = ExpiryQueue(entries)
+        self._expiry_scheduler = ExpiryScheduler(
+            self._expiry, self.expire_orders, config.sweep_interval, self._logger
+        )
+        self._expiry_scheduler.start()
+
+    def __stop_expiry(self) -> None:
+        if self._expiry_scheduler is not None:
+            self._expiry_scheduler.stop()
+            self._expiry_scheduler = None
+
+    def __schedule_expiry(self, orders: Iterable[tuple[int, float, str]]) -> None:
+        """为新的订单计算过期时间
+
+        Args:
+            orders (Iterable[tuple[int, float, str]]): (订单 ID, 寄件时间戳, 物品 ID)
+        """
+        queue = self._expiry
+        if queue is None:
+            return
+        config = self.coo.config.expiry
+        for order_id, timestamp, item_id in orders:
+            ttl = config.ttl_of(item_id)
+            if ttl is not None and timestamp > 0:
+                queue.push(order_id, timestamp + ttl)
+        if self._expiry_scheduler is not None:
+            self._expiry_scheduler.wake()
+
+    def __unschedule_expiry(self, order_ids: Iterable[int]) -> None:
+        queue = self._expiry
+        if queue is None:
+            return
+        for order_id in order_ids:
+            queue.discard(order_id)
+
+    def expire_orders(self, now: float | None = None) -> tuple[int, int]:
+        """处理所有已经过期的订单, 由清理线程定期调用
+
+        按配置 ``expiry.action`` 把订单退回寄件人 (寄件人和收件人都变成原来的寄件人, 有效期重新计算),
+        或者追加到 ``orders.archive.jsonl`` 中. 已经退回过的订单再次过期时总是被归档,
+        所以中转站中的订单数量不会无限增长. 一次清理中的所有订单只提交一次修改
+
+        正在被批量收件或取消的订单会被跳过, 在下一次清理时再处理
+
+        Args:
+            now (float | None): 当前的时间戳, 默认为 ``time.time()``
+
+        Returns:
+            tuple[int, int]: 退回和归档的订单数量
+        """
+        queue = self._expiry
+        if queue is None:
+            return 0, 0
+        if now is None:
+            now = time.time()
+        due = queue.pop_due(now)
+        if not due:
+            return 0, 0
+
+        orders = self.reserve_orders(due)
+        reserved = [order.id for order in orders]
+        skipped = set(due).difference(reserved)
+        for order_id in skipped:
+            if self._storage.contain_order(order_id):
+                queue.push(order_id, now)
+
+        if self.coo.config.expiry.action == "return":
+            returned = [order for order in orders if order.sender != order.receiver]
+            archived = [order for order in orders if order.sender == order.receiver]
+        else:
+            returned, archived = [], orders
+        try:
+            if archived:
+                self.__archive(archived)
+            if returned:
+                formatted_now = get_formatted_time()
+                self.add_orders([
+                    OrderInfo(sender=order.sender, receiver=order.sender, item=order.item, comment=order.comment,
+                              time=formatted_now)
+                    for order in returned
+                ])
+        except Exception:
+            self.release_reservation(reserved)
+            raise
+        self.complete_reservation(reserved)
+        self._logger.info(TranslationKeys.data_expired.rtr(len(returned), len(archived)))
+        return len(returned), len(archived)
+
+    def __archive(self, orders: list[Order]) -> None:
+        """把订单追加到归档文件中, 每行一个订单"""
+        path = os.path.join(self._server.get_data_folder(), constants.ORDER_ARCHIVE_FILE_NAME)
+        lines = "".join(json.dumps(order.serialize(), ensure_ascii=False) + "\n" for order in orders)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(lines)
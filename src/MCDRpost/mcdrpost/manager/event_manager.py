@@ -4,6 +4,7 @@ from typing import Any, TYPE_CHECKING
 from mcdreforged import Info, PluginServerInterface, new_thread
 
 from mcdrpost.configuration import Configuration
+from mcdrpost.utils.metrics import metrics
 from mcdrpost.utils.translation import TranslationKeys
 
 # for doc building
@@ -44,13 +45,21 @@ class EventManager:
         """
         self.config_manager.reload()
         self.data_manager.reload()
+        self.version_manager.start_query_executor(self.config.query)
+        self.command_manager.pre_handler.configure_rate_limit(self.config.rate_limit)
+        self.coo.post_manager.start_pipeline(self.config.pipeline)
+        metrics.timing = self.config.stage_timing
         self.command_manager.register()
         if server.is_server_running():
             self.on_server_startup(server)
 
     def on_unload(self, _server: PluginServerInterface) -> None:
         """事件: 插件卸载--保存订单信息"""
+        # 先等待正在执行的寄件和收件完成
+        self.coo.post_manager.stop_pipeline()
         self.data_manager.save()
+        self.data_manager.close()
+        self.version_manager.stop_query_executor()
 
     def on_player_joined(
             self, server: PluginServerInterface, player: str, _info: Info
@@ -61,7 +70,7 @@ class EventManager:
                 # 还未注册的玩家
                 self.data_manager.add_player(player)
                 server.logger.info(TranslationKeys.data_auto_register.rtr(player))
-                self.data_manager.save()
+                self.data_manager.commit()
                 return
 
             # 通知权限在admin以上的管理员有新玩家加入
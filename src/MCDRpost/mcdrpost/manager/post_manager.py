@@ -1,12 +1,15 @@
-from typing import Literal, TYPE_CHECKING
+from concurrent.futures import Future
+from typing import Callable, Literal, TYPE_CHECKING
 
 from mcdreforged import InfoCommandSource, PlayerCommandSource, PluginServerInterface
 
 from mcdrpost import constants
-from mcdrpost.configuration import Configuration
+from mcdrpost.configuration import Configuration, PipelineConfig
 from mcdrpost.data_structure import Item, OrderInfo
-from mcdrpost.utils.exception import InvalidItem
+from mcdrpost.utils.exception import InvalidItem, QueryError, TaskRejected
 from mcdrpost.utils.general import get_formatted_time
+from mcdrpost.utils.keyed_executor import KeyedExecutor
+from mcdrpost.utils.metrics import metrics
 from mcdrpost.utils.translation import TranslationKeys
 
 if TYPE_CHECKING:
@@ -14,19 +17,89 @@ if TYPE_CHECKING:
 
 
 class PostManager:
-    """插件核心功能处理"""
+    """插件核心功能处理
+
+    指标 (见 :mod:`mcdrpost.utils.metrics`):
+
+    - ``orders.posted`` ``orders.received`` ``orders.cancelled``: 寄出、收取和取消的订单数量
+    - ``command.failed``: 因为条件不满足 (如副手为空、单号无效) 而失败的命令数量
+    - ``stage.mutate`` ``stage.deliver``: 修改订单数据和执行替换物品、音效命令的耗时
+    """
 
     def __init__(self, coo: "MCDRpostCoordinator") -> None:
         self.coordinator = coo
         self.server: PluginServerInterface = coo.server
         self.version_manager = coo.version_manager
         self.data_manager = coo.data_manager
+        self.pipeline: KeyedExecutor | None = None
+
+        self._posted = metrics.counter("orders.posted")
+        self._received = metrics.counter("orders.received")
+        self._cancelled = metrics.counter("orders.cancelled")
+        self._failed = metrics.counter("command.failed")
 
     @property
     def config(self) -> Configuration:
         return self.coordinator.config
 
+    # Pipeline
+    def start_pipeline(self, config: PipelineConfig) -> None:
+        """按照配置(重新)创建执行寄件和收件命令的线程, 原来的线程会在当前的命令完成后关闭
+
+        Args:
+            config (PipelineConfig): 执行配置
+        """
+        self.stop_pipeline()
+        if config.enabled:
+            self.pipeline = KeyedExecutor(config.workers, config.queue_size)
+
+    def stop_pipeline(self) -> None:
+        """关闭执行命令的线程, 等待正在执行的命令完成, 还在排队的命令会被取消. 在插件卸载时调用"""
+        pipeline, self.pipeline = self.pipeline, None
+        if pipeline is not None:
+            pipeline.shutdown()
+
+    def submit(self, src: PlayerCommandSource, func: Callable[..., object], *args) -> None:
+        """在玩家的执行线程中执行命令, 不等待命令完成
+
+        同一个玩家的命令按顺序依次执行, 结果由命令自己回复给玩家. 没有启用执行线程时直接执行
+
+        Args:
+            src (PlayerCommandSource): 命令源
+            func (Callable): 要执行的操作, 如 :meth:`post`
+            *args: 传递给 ``func`` 的参数
+        """
+        pipeline = self.pipeline
+        if pipeline is None:
+            func(*args)
+            return
+        try:
+            future = pipeline.submit(src.player, func, *args)
+        except TaskRejected:
+            src.reply(TranslationKeys.query_busy.rtr())
+            return
+        future.add_done_callback(self.__log_failure)
+
+    def __log_failure(self, future: "Future") -> None:
+        if future.cancelled():
+            return
+        exc = future.exception()
+        if exc is not None:
+            self.server.logger.error(TranslationKeys.command_failed.rtr(), exc_info=exc)
+
     # Helper methods
+    def __reject(self, src: PlayerCommandSource, message) -> None:
+        """回复命令失败的原因"""
+        self._failed.inc()
+        src.reply(message)
+
+    @staticmethod
+    def __normalize_comment(comment: str | None) -> str:
+        """没有备注时使用默认备注, 翻译结果可能是 RText, 统一转换为纯文本"""
+        if comment is None:
+            return str(TranslationKeys.post_default_comment.tr())
+        return comment
+
     def replace(self, player: str, item: Item) -> None:
         """替换玩家的副手物品
 
@@ -67,10 +140,7 @@ class PostManager:
         """
         if self.config.max_storage == -1:
             return False
-        return (
-                len(self.data_manager.get_orderid_by_sender(player))
-                >= self.config.max_storage
-        )
+        return self.data_manager.count_orders_by_sender(player) >= self.config.max_storage
 
     def post(
             self, src: PlayerCommandSource, receiver: str, comment: str | None = None
@@ -85,45 +155,135 @@ class PostManager:
         sender = src.player
 
         if self.is_storage_full(sender):
-            src.reply(TranslationKeys.post_fail_reached_max_storage.rtr(self.config.max_storage))
+            self.__reject(src, TranslationKeys.post_fail_reached_max_storage.rtr(self.config.max_storage))
             return
 
         if sender == receiver:
-            src.reply(TranslationKeys.post_fail_send_to_self.rtr())
+            self.__reject(src, TranslationKeys.post_fail_send_to_self.rtr())
             return
 
-        if comment is None:
-            comment = TranslationKeys.post_default_comment.tr()
+        comment = self.__normalize_comment(comment)
 
         try:
             item = self.get_offhand_item(sender)
         except InvalidItem:
-            src.reply(TranslationKeys.post_fail_invalid_item.rtr())
+            self.__reject(src, TranslationKeys.post_fail_invalid_item.rtr())
+            return
+        except QueryError:
+            self.__reject(src, TranslationKeys.query_busy.rtr())
             return
         except Exception:
             src.reply(TranslationKeys.error_occurred.rtr())
             raise
 
         if item is None:
-            src.reply(TranslationKeys.post_fail_invalid_item.rtr())
+            self.__reject(src, TranslationKeys.post_fail_invalid_item.rtr())
             return
 
         # create order
-        order_id = self.data_manager.add_order(
-            OrderInfo(
-                sender=sender,
-                receiver=receiver,
-                item=item,
-                comment=comment,
-                time=get_formatted_time(),
+        with metrics.span("stage.mutate"):
+            order_id = self.data_manager.add_order(
+                OrderInfo(
+                    sender=sender,
+                    receiver=receiver,
+                    item=item,
+                    comment=comment,
+                    time=get_formatted_time(),
+                )
             )
-        )
 
-        self.replace(sender, constants.AIR)
+        with metrics.span("stage.deliver"), self.version_manager.batch():
+            self.replace(sender, constants.AIR)
+            self.version_manager.play_sound.successfully_post(sender, receiver)
+        self._posted.inc()
         src.reply(TranslationKeys.post_success_sender.rtr())
         self.server.tell(receiver, TranslationKeys.post_success_receiver.rtr(order_id))
-        self.version_manager.play_sound.successfully_post(sender, receiver)
-        self.data_manager.save()
+        self.data_manager.commit()
+
+    def post_many(
+            self,
+            src: PlayerCommandSource,
+            receivers: list[str] | None,
+            comment: str | None = None,
+            split: bool = False,
+    ) -> int:
+        """把副手物品寄给多个收件人, 用于活动奖励等场景
+
+        所有订单在一次存储操作中创建, 只提交一次修改; 给收件人的音效也在同一批命令中发送.
+        群发需要 ``broadcast`` 权限, 不受 ``max_storage`` 限制
+
+        Args:
+            src (PlayerCommandSource): 寄件人的相关信息
+            receivers (list[str] | None): 收件人 ID, None 表示所有已注册的玩家
+            comment (str | None): 备注信息
+            split (bool): 为 True 时把副手的物品平分给所有收件人, 除不尽的部分由靠前的收件人各多分一个;
+                否则每个收件人都会收到与副手相同的物品
+
+        Returns:
+            int: 创建的订单数量
+        """
+        sender = src.player
+
+        if receivers is None:
+            receivers = self.data_manager.get_players()
+        else:
+            unregistered = [player for player in receivers if not self.data_manager.is_player_registered(player)]
+            if unregistered:
+                self.__reject(src, TranslationKeys.post_fail_receiver_unregistered.rtr(", ".join(unregistered)))
+                return 0
+        # 去重并保持顺序, 不能寄给自己
+        receivers = [player for player in dict.fromkeys(receivers) if player != sender]
+        if not receivers:
+            self.__reject(src, TranslationKeys.broadcast_fail_no_receiver.rtr())
+            return 0
+
+        comment = self.__normalize_comment(comment)
+
+        try:
+            item = self.get_offhand_item(sender)
+        except InvalidItem:
+            self.__reject(src, TranslationKeys.post_fail_invalid_item.rtr())
+            return 0
+        except QueryError:
+            self.__reject(src, TranslationKeys.query_busy.rtr())
+            return 0
+        except Exception:
+            src.reply(TranslationKeys.error_occurred.rtr())
+            raise
+
+        if item is None:
+            self.__reject(src, TranslationKeys.post_fail_invalid_item.rtr())
+            return 0
+
+        if split:
+            if item.count < len(receivers):
+                self.__reject(src, TranslationKeys.broadcast_fail_not_enough_items.rtr(item.count, len(receivers)))
+                return 0
+            base, extra = divmod(item.count, len(receivers))
+            counts = [base + 1] * extra + [base] * (len(receivers) - extra)
+        else:
+            counts = [item.count] * len(receivers)
+
+        # 数量相同的订单共用同一个物品对象, 最多只有两种数量
+        items = {count: Item(id=item.id, count=count, components=item.components) for count in set(counts)}
+        now = get_formatted_time()
+        with metrics.span("stage.mutate"):
+            order_ids = self.data_manager.add_orders([
+                OrderInfo(sender=sender, receiver=receiver, item=items[count], comment=comment, time=now)
+                for receiver, count in zip(receivers, counts)
+            ])
+
+        with metrics.span("stage.deliver"), self.version_manager.batch():
+            self.replace(sender, constants.AIR)
+            for receiver in receivers:
+                self.version_manager.play_sound.has_something_to_receive(receiver)
+        self._posted.inc(len(order_ids))
+        self.data_manager.commit()
+
+        src.reply(TranslationKeys.broadcast_success.rtr(len(order_ids)))
+        for receiver, order_id in zip(receivers, order_ids):
+            self.server.tell(receiver, TranslationKeys.post_success_receiver.rtr(order_id))
+        return len(order_ids)
 
     def receive(
             self, src: PlayerCommandSource, order_id: int, typ: Literal["cancel", "receive"]
@@ -141,29 +301,127 @@ class PostManager:
         player = src.player
 
         # 副手有东西 拒绝接收
-        if not self.check_offhand_empty(player):
-            src.reply(TranslationKeys.receive_fail_hands_not_cleared.rtr())
+        try:
+            offhand_empty = self.check_offhand_empty(player)
+        except QueryError:
+            self.__reject(src, TranslationKeys.query_busy.rtr())
+            return False
+        if not offhand_empty:
+            self.__reject(src, TranslationKeys.receive_fail_hands_not_cleared.rtr())
             return False
 
-        if not self.data_manager.contain_order(order_id):
-            src.reply(TranslationKeys.receive_fail_undefined_id.rtr())
+        if not self.data_manager.contain_order(order_id) or self.data_manager.is_reserved(order_id):
+            self.__reject(src, TranslationKeys.receive_fail_undefined_id.rtr())
             return False
 
         # 不是 TA
-        if (
-                typ == "receive"
-                and order_id not in self.data_manager.get_orderid_by_receiver(player)
-        ):
-            src.reply(TranslationKeys.receive_fail_no_right.rtr())
+        if typ == "receive" and not self.data_manager.is_receiver(order_id, player):
+            self.__reject(src, TranslationKeys.receive_fail_no_right.rtr())
             return False
-        elif (
-                typ == "cancel"
-                and order_id not in self.data_manager.get_orderid_by_sender(player)
-        ):
-            src.reply(TranslationKeys.cancel_fail_no_right.rtr())
+        elif typ == "cancel" and not self.data_manager.is_sender(order_id, player):
+            self.__reject(src, TranslationKeys.cancel_fail_no_right.rtr())
             return False
 
-        order = self.data_manager.pop_order(order_id)
-        self.replace(player, order.item)
-        self.version_manager.play_sound.successfully_receive(player)
+        # 先预留订单, 物品无法给予时订单仍然留在中转站
+        orders = self.data_manager.reserve_orders([order_id])
+        if not orders:
+            # 订单刚刚被其他命令取走
+            self.__reject(src, TranslationKeys.receive_fail_undefined_id.rtr())
+            return False
+        try:
+            with metrics.span("stage.deliver"), self.version_manager.batch():
+                self.replace(player, orders[0].item)
+                self.version_manager.play_sound.successfully_receive(player)
+        except InvalidItem:
+            self.data_manager.release_reservation([order_id])
+            self.server.logger.warning(TranslationKeys.deliver_refused.rtr(order_id))
+            self.__reject(src, TranslationKeys.error_occurred.rtr())
+            return False
+        except Exception:
+            self.data_manager.release_reservation([order_id])
+            raise
+        with metrics.span("stage.mutate"):
+            self.data_manager.complete_reservation([order_id])
+        (self._received if typ == "receive" else self._cancelled).inc()
         return True
+
+    def receive_many(
+            self,
+            src: PlayerCommandSource,
+            typ: Literal["cancel", "receive"],
+            id_range: tuple[int, int] | None = None,
+            counterpart: str | None = None,
+    ) -> int:
+        """批量接收订单, 物品通过 ``give`` 放入背包
+
+        订单会先被原子地预留, 全部给予之后只提交一次修改; 未能给予的订单会被退回中转站,
+        无法确认是否已经给予的订单 (如 RCON 回复丢失) 保持预留, 直到插件重新加载
+
+        Args:
+            src (PlayerCommandSource): 命令源
+            typ (Literal["cancel", "receive"]): 类型, 收件或者取消
+            id_range (tuple[int, int] | None): 只处理 ID 在这个闭区间内的订单, None 表示全部
+            counterpart (str | None): 只处理这个玩家寄出 (收件时) 或者寄给这个玩家 (取消时) 的订单
+
+        Returns:
+            int: 成功接收的订单数量
+        """
+        player = src.player
+        no_order = TranslationKeys.receive_fail_no_order if typ == "receive" else TranslationKeys.cancel_fail_no_order
+
+        if not self.version_manager.supports_give():
+            self.__reject(src, TranslationKeys.bulk_fail_unsupported.rtr())
+            return 0
+
+        if counterpart is not None:
+            # 按对方筛选需要订单内容
+            if typ == "receive":
+                candidates = self.data_manager.get_orders_by_receiver(player)
+                order_ids = [order.id for order in candidates if order.sender == counterpart]
+            else:
+                candidates = self.data_manager.get_orders_by_sender(player)
+                order_ids = [order.id for order in candidates if order.receiver == counterpart]
+        elif typ == "receive":
+            order_ids = self.data_manager.get_orderid_by_receiver(player)
+        else:
+            order_ids = self.data_manager.get_orderid_by_sender(player)
+        if id_range is not None:
+            low, high = min(id_range), max(id_range)
+            order_ids = [order_id for order_id in order_ids if low <= order_id <= high]
+
+        orders = self.data_manager.reserve_orders(order_ids)
+        if not orders:
+            self.__reject(src, no_order.rtr())
+            return 0
+
+        try:
+            with metrics.span("stage.deliver"):
+                results = self.version_manager.give_items(player, [order.item for order in orders])
+        except QueryError:
+            self.data_manager.release_reservation(order.id for order in orders)
+            self.__reject(src, TranslationKeys.query_busy.rtr())
+            return 0
+        except Exception:
+            self.data_manager.release_reservation(order.id for order in orders)
+            src.reply(TranslationKeys.error_occurred.rtr())
+            raise
+
+        delivered = [order.id for order, ok in zip(orders, results) if ok]
+        failed = [order.id for order, ok in zip(orders, results) if ok is False]
+        # 无法确认是否已经给予的订单既不删除也不退回, 保持预留直到插件重新加载, 以免同一个物品被领取两次
+        unconfirmed = [order.id for order, ok in zip(orders, results) if ok is None]
+        self.data_manager.release_reservation(failed)
+        if delivered:
+            with metrics.span("stage.mutate"):
+                self.data_manager.complete_reservation(delivered)
+            self.version_manager.play_sound.successfully_receive(player)
+            (self._received if typ == "receive" else self._cancelled).inc(len(delivered))
+            success = TranslationKeys.receive_bulk_success if typ == "receive" else TranslationKeys.cancel_bulk_success
+            src.reply(success.rtr(len(delivered)))
+        if failed:
+            self.__reject(src, TranslationKeys.bulk_fail_not_delivered.rtr(len(failed), ", ".join(map(str, failed))))
+        if unconfirmed:
+            ids = ", ".join(map(str, unconfirmed))
+            self.server.logger.warning(TranslationKeys.bulk_unconfirmed.rtr(player, ids))
+            self.__reject(src, TranslationKeys.bulk_fail_unconfirmed.rtr(len(unconfirmed), ids))
+        return len(delivered)
@@ -1,17 +1,20 @@
 """版本管理器，根据 Minecraft 版本提供相应的功能实现"""
 
-from typing import Callable, final
+from typing import final
 
 from mcdreforged import PluginServerInterface
 
+from mcdrpost.configuration import QueryConfig
 from mcdrpost.data_structure import Item
 from mcdrpost.environment import Environment
+from mcdrpost.utils.query_executor import QueryExecutor, RconPool
+from mcdrpost.utils.version import VersionKey
 from mcdrpost.version_handler.abstract_version_handler import AbstractVersionHandler
+from mcdrpost.version_handler.command_batch import CommandBatch
 from mcdrpost.version_handler.sound_player.abstract_sound_player import (
     AbstractSoundPlayer,
 )
-
-Checker = Callable[[Environment], bool]
+from mcdrpost.version_handler.version_range import Checker, DecisionTable
 
 
 class VersionManager:
@@ -22,10 +25,15 @@ class VersionManager:
 
     Attributes:
         environment (Environment): 环境信息对象，包含服务器版本等信息
+        query_executor (QueryExecutor | None): 查询执行器, 见 :meth:`start_query_executor`
     """
 
     _handlers: list[tuple[Checker, AbstractVersionHandler]] = []
     _builtin_handlers: list[tuple[Checker, AbstractVersionHandler]] = []
+    _table: DecisionTable | None = None
+    """所有 handler 的决策表, 注册新的 handler 时重新生成"""
+    _resolved: dict[VersionKey, AbstractVersionHandler] = {}
+    """只由 :class:`~mcdrpost.version_handler.version_range.VersionRange` 决定的选择结果"""
 
     @classmethod
     @final
@@ -36,12 +44,14 @@ class VersionManager:
 
         Args:
             handler (type[AbstractVersionHandler]): 要注册的 handler 类
-            checker (Callable[[Environment], bool]): 判断 handler 是否应该使用
+            checker (VersionRange | Callable[[Environment], bool]): 判断 handler 是否应该使用
         """
         if handler.is_builtin():
             cls._builtin_handlers.append((checker, handler()))
         else:
             cls._handlers.append((checker, handler()))
+        cls._table = None
+        cls._resolved.clear()
 
     def __init__(self, server: PluginServerInterface) -> None:
         """初始化版本管理器
@@ -54,11 +64,41 @@ class VersionManager:
         self._handler: AbstractVersionHandler | None = (
             None  # 服务器运行时必然存在 Handler
         )
+        self.query_executor: QueryExecutor | None = None
+
+    def start_query_executor(self, config: QueryConfig) -> None:
+        """按照配置(重新)创建查询执行器, 原来的执行器会被关闭
+
+        启用 ``query.rcon_pool`` 并且 MCDR 开启了 RCON 时, 执行器会使用自己的 RCON 连接池
+
+        Args:
+            config (QueryConfig): 查询配置
+        """
+        self.stop_query_executor()
+        rcon_pool = None
+        if config.rcon_pool:
+            rcon = self._server.get_mcdr_config().get("rcon", {})
+            if rcon.get("enable"):
+                rcon_pool = RconPool(
+                    rcon["address"], rcon["port"], rcon["password"],
+                    size=config.workers, timeout=config.timeout, logger=self._server.logger,
+                )
+        self.query_executor = QueryExecutor(config.workers, config.queue_size, config.timeout, rcon_pool)
+        if self._handler is not None:
+            self._handler.query_executor = self.query_executor
+
+    def stop_query_executor(self) -> None:
+        """关闭查询执行器, 在插件卸载时调用"""
+        if self.query_executor is not None:
+            self.query_executor.shutdown()
+            self.query_executor = None
+        if self._handler is not None:
+            self._handler.query_executor = None
 
     def refresh(self) -> None:
         """刷新版本相关函数引用
 
-        根据当前服务器版本，更新内部函数引用
+        重新读取服务器版本, 根据当前服务器版本更新内部函数引用, 在服务器启动时调用
 
         .. note::
             插件会优先使用外部注册的 Handler
@@ -66,19 +106,44 @@ class VersionManager:
         Raises:
             RuntimeError: 如果没有找到合适的 VersionHandler 的话
         """
-        for checker, handler in self._handlers:
-            if checker(self.environment):
-                self._handler = handler
-                return
-
-        for checker, handler in self._builtin_handlers:
-            if checker(self.environment):
-                self._handler = handler
-                return
-
-        raise RuntimeError(
-            f"No correct handler found for version {self.environment.server_version}"
-        )
+        self.environment.snapshot()
+        handler = self.resolve_handler()
+        self._handler = handler
+        handler.query_executor = self.query_executor
+
+    def resolve_handler(self) -> AbstractVersionHandler:
+        """选择当前服务器版本使用的 Handler
+
+        检查器为 :class:`~mcdrpost.version_handler.version_range.VersionRange` 时通过决策表二分查找;
+        只由它们决定的结果会按版本缓存, 同一版本再次选择时只需要一次字典查找
+
+        Raises:
+            RuntimeError: 如果没有找到合适的 VersionHandler 的话
+        """
+        key = self.environment.server_version.key
+        handler = self._resolved.get(key)
+        if handler is not None:
+            return handler
+
+        entries = self._handlers + self._builtin_handlers
+        table = VersionManager._table
+        if table is None:
+            table = VersionManager._table = DecisionTable([checker for checker, _ in entries])
+        found = table.lookup(key)
+        # 排在决策表结果之前的普通检查器优先
+        for index in table.plain:
+            if found != -1 and index > found:
+                break
+            if entries[index][0](self.environment):
+                return entries[index][1]
+        if found == -1:
+            raise RuntimeError(
+                f"No correct handler found for version {self.environment.server_version}"
+            )
+        handler = entries[found][1]
+        if not table.plain or table.plain[0] > found:
+            self._resolved[key] = handler
+        return handler
 
     # 下面是是依赖版本的函数
     def replace(self, player: str, item: Item) -> None:
@@ -102,6 +167,24 @@ class VersionManager:
             raise RuntimeError("version handler is not initialized")
         return self._handler.get_offhand_item(player)
 
+    def supports_give(self) -> bool:
+        """当前的处理器是否支持批量给予物品"""
+        if self._handler is None:
+            raise RuntimeError("version handler is not initialized")
+        return self._handler.supports_give()
+
+    def give_items(self, player: str, items: list[Item]) -> list[bool | None]:
+        """把多个物品放入玩家背包, 见 :meth:`AbstractVersionHandler.give_items`"""
+        if self._handler is None:
+            raise RuntimeError("version handler is not initialized")
+        return self._handler.give_items(player, items)
+
+    def batch(self) -> CommandBatch:
+        """批量执行命令, 见 :meth:`AbstractVersionHandler.batch`"""
+        if self._handler is None:
+            raise RuntimeError("version handler is not initialized")
+        return self._handler.batch()
+
     @property
     def play_sound(self) -> AbstractSoundPlayer:
         if self._handler is None:
@@ -0,0 +1 @@
+"""订单数据的持久化相关实现"""
@@ -0,0 +1,219 @@
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Iterable
+
+from mcdreforged import PluginServerInterface
+
+from mcdrpost.data_structure import Order, OrderInfo
+from mcdrpost.storage.order_query import OrderQuery, OrderRow, intersect_sorted
+from mcdrpost.storage.order_record import to_timestamp
+from mcdrpost.utils.json_stream import write_order_data
+
+if TYPE_CHECKING:
+    from mcdrpost.coordinator import MCDRpostCoordinator
+
+
+class AbstractOrderStorage(ABC):
+    """订单存储后端
+
+    :class:`~mcdrpost.manager.data_manager.DataManager` 的所有数据操作都会交给存储后端完成,
+    使用哪一个后端由配置 ``storage.backend`` 决定
+
+    Attributes:
+        coo (MCDRpostCoordinator): 协调器
+    """
+
+    def __init__(self, coo: "MCDRpostCoordinator") -> None:
+        self.coo: "MCDRpostCoordinator" = coo
+        self._server: PluginServerInterface = coo.server
+        self._logger = coo.logger
+
+    # lifecycle
+    @abstractmethod
+    def load(self) -> None:
+        """加载订单数据"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def save(self) -> None:
+        """立即持久化全部订单数据, 调用返回时数据已经写入磁盘"""
+        raise NotImplementedError
+
+    def commit(self) -> None:
+        """持久化自上次提交以来的修改, 后端可以选择延迟或者合并写入"""
+        self.save()
+
+    def close(self) -> None:
+        """释放后端持有的资源, 已经 :meth:`commit` 但是被延迟写入的修改必须在这之前写入"""
+
+    def export_json(self, path: str) -> int:
+        """把全部订单导出为与 ``orders.json`` 相同格式的文件
+
+        Returns:
+            int: 导出的订单数量
+        """
+        orders = self.get_orders()
+        write_order_data(path, self.get_players(), ((str(order.id), order.serialize()) for order in orders))
+        return len(orders)
+
+    # players
+    @abstractmethod
+    def is_player_registered(self, player: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def add_player(self, player: str) -> bool:
+        """注册玩家
+
+        Returns:
+            bool: 玩家之前没有注册时返回 True
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def remove_player(self, player: str) -> bool:
+        """删除玩家
+
+        Returns:
+            bool: 玩家之前已经注册时返回 True
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_players(self) -> list[str]:
+        """按注册顺序获取已注册的玩家"""
+        raise NotImplementedError
+
+    # orders
+    @abstractmethod
+    def add_order(self, order: OrderInfo) -> int:
+        """添加订单, 使用最小的未被占用的 ID
+
+        Returns:
+            int: 订单 ID
+        """
+        raise NotImplementedError
+
+    def add_orders(self, orders: list[OrderInfo]) -> list[int]:
+        """添加多个订单, 不会提交修改, 调用者应当在之后调用一次 :meth:`commit`
+
+        Returns:
+            list[int]: 与 ``orders`` 一一对应的订单 ID
+        """
+        return [self.add_order(order) for order in orders]
+
+    @abstractmethod
+    def remove_order(self, order_id: int) -> bool:
+        """删除订单
+
+        Returns:
+            bool: 订单存在时返回 True
+        """
+        raise NotImplementedError
+
+    def remove_orders(self, order_ids: Iterable[int]) -> int:
+        """删除多个订单, 不会提交修改, 调用者应当在之后调用一次 :meth:`commit`
+
+        Returns:
+            int: 实际删除的订单数量
+        """
+        return sum(1 for order_id in order_ids if self.remove_order(order_id))
+
+    @abstractmethod
+    def get_order(self, order_id: int) -> Order:
+        """获取订单
+
+        Raises:
+            KeyError: 订单不存在
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_orders(self) -> list[Order]:
+        """按 ID 升序获取所有订单"""
+        raise NotImplementedError
+
+    def get_order_ids(self) -> list[int]:
+        """按顺序获取所有订单的 ID"""
+        return sorted(order.id for order in self.get_orders())
+
+    def find_order_ids(self, query: OrderQuery) -> list[int]:
+        """按条件筛选并排序订单
+
+        寄件人和收件人通过索引筛选, 只有其余的条件需要读取订单内容
+
+        Returns:
+            list[int]: 排好序的订单 ID
+        """
+        if query.sender is not None and query.receiver is not None:
+            ids = intersect_sorted(self.get_orderid_by_sender(query.sender), self.get_orderid_by_receiver(query.receiver))
+        elif query.sender is not None:
+            ids = self.get_orderid_by_sender(query.sender)
+        elif query.receiver is not None:
+            ids = self.get_orderid_by_receiver(query.receiver)
+        else:
+            ids = self.get_order_ids()
+        if not query.needs_content:
+            return ids[::-1] if query.descending else list(ids)
+        return query.apply(self._order_rows(ids))
+
+    def get_order_rows(self) -> Iterable[OrderRow]:
+        """按顺序获取所有订单的 ID、时间、寄件人、收件人和物品 ID, 用于构建索引"""
+        return self._order_rows(self.get_order_ids())
+
+    def _order_rows(self, order_ids: Iterable[int]) -> Iterable[OrderRow]:
+        """:meth:`find_order_ids` 使用的订单字段, 已经被删除的订单会被跳过"""
+        for order_id in order_ids:
+            try:
+                order = self.get_order(order_id)
+            except KeyError:
+                continue
+            yield OrderRow(order.id, to_timestamp(order.time), order.sender, order.receiver, order.item.id)
+
+    @abstractmethod
+    def contain_order(self, order_id: int) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_orderid_by_sender(self, sender: str) -> list[int]:
+        """按升序获取寄件人的所有订单 ID"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_orderid_by_receiver(self, receiver: str) -> list[int]:
+        """按升序获取收件人的所有订单 ID"""
+        raise NotImplementedError
+
+    def is_sender(self, order_id: int, player: str) -> bool:
+        """玩家是不是订单的寄件人"""
+        return order_id in self.get_orderid_by_sender(player)
+
+    def is_receiver(self, order_id: int, player: str) -> bool:
+        """玩家是不是订单的收件人"""
+        return order_id in self.get_orderid_by_receiver(player)
+
+    def count_orders_by_sender(self, sender: str) -> int:
+        """寄件人在中转站中的订单数量"""
+        return len(self.get_orderid_by_sender(sender))
+
+    def get_orders_by_sender(self, sender: str) -> list[Order]:
+        return [self.get_order(i) for i in self.get_orderid_by_sender(sender)]
+
+    def get_orders_by_receiver(self, receiver: str) -> list[Order]:
+        return [self.get_order(i) for i in self.get_orderid_by_receiver(receiver)]
+
+    def has_unreceived_order(self, player: str) -> bool:
+        return bool(self.get_orderid_by_receiver(player))
+
+    def pop_order(self, order_id: int) -> Order:
+        """删除并返回订单, 随后提交修改
+
+        Raises:
+            KeyError: 订单不存在
+        """
+        order = self.get_order(order_id)
+        self.remove_order(order_id)
+        self.commit()
+        return order
+
+
+__all__ = ["AbstractOrderStorage"]
@@ -0,0 +1,358 @@
+"""订单数据的二进制快照格式 (``orders.bin``)
+
+与 ``orders.json`` 保存相同的数据, 但体积更小, 读取时也不需要解析文本. 文件结构::
+
+    magic         b"MPOS"
+    version       u8
+    string table  varint 数量, 然后是每个字符串 (varint 字节数 + UTF-8)
+    players       varint 数量, 然后是每个玩家名在字符串表中的下标
+    index         varint 订单数量, 然后是每个订单的索引项 (定长, 见 :data:`INDEX_ENTRY`)
+    records       每个订单 (值), 位置和长度记录在索引项中
+
+索引项依次是订单 ID、寄件人和收件人在字符串表中的下标、键在字符串表中的下标、记录的偏移量和字节数,
+键与订单 ID 相同时 (正常情况) 键的下标为 :data:`NO_REF`; 订单 ID 不是正整数或者寄件人/收件人不是字符串时,
+寄件人的下标为 :data:`NO_REF`, 这个订单会在加载时被立即解码.
+按需加载时只需要用 :func:`struct.iter_unpack` 读取索引, 完整的订单会在第一次使用时再解码,
+见 :meth:`BinarySnapshotReader.iter_deferred`
+
+值的编码类似 msgpack, 以一个字节的类型标记开头:
+
+============  =====================================================
+标记           内容
+============  =====================================================
+``NONE``      无
+``FALSE``     无
+``TRUE``      无
+``INT``       zigzag 编码的 varint
+``FLOAT``     8 字节大端 IEEE 754
+``STR``       varint 字节数 + UTF-8
+``REF``       字符串表中的下标
+``LIST``      varint 元素数量 + 每个元素 (值)
+``DICT``      varint 键值对数量 + 每个键 (字符串表下标) 和值 (值)
+============  =====================================================
+
+所有字典的键和不超过 :data:`INTERN_MAX_LENGTH` 个字符的字符串都会被放进字符串表,
+所以玩家名、物品 ID 和组件名称在文件中只会出现一次
+"""
+
+import os
+import struct
+from typing import Any, BinaryIO, Iterable, Iterator
+
+from mcdrpost.storage.lazy_orders import DeferredOrder
+
+MAGIC = b"MPOS"
+VERSION = 1
+INTERN_MAX_LENGTH = 64
+
+INDEX_ENTRY = struct.Struct("<IIIIQI")
+"""索引项: 订单 ID, 寄件人, 收件人, 键, 记录偏移量, 记录字节数"""
+NO_REF = 0xFFFFFFFF
+
+NONE, FALSE, TRUE, INT, FLOAT, STR, REF, LIST, DICT = range(9)
+
+_double = struct.Struct(">d")
+
+
+def _write_varint(buf: bytearray, value: int) -> None:
+    while value > 0x7F:
+        buf.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buf.append(value)
+
+
+def _read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    byte = data[pos]
+    if byte < 0x80:
+        return byte, pos + 1
+    result = byte & 0x7F
+    shift = 7
+    while True:
+        pos += 1
+        byte = data[pos]
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos + 1
+        shift += 7
+
+
+class _Encoder:
+    def __init__(self) -> None:
+        self.strings: list[str] = []
+        self._index: dict[str, int] = {}
+
+    def intern(self, value: str) -> int:
+        index = self._index.get(value)
+        if index is None:
+            index = self._index[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+    def encode(self, buf: bytearray, value: Any) -> None:
+        # bool 是 int 的子类, 需要先判断
+        if value is None:
+            buf.append(NONE)
+        elif value is True:
+            buf.append(TRUE)
+        elif value is False:
+            buf.append(FALSE)
+        elif isinstance(value, str):
+            if len(value) <= INTERN_MAX_LENGTH:
+                buf.append(REF)
+                _write_varint(buf, self.intern(value))
+            else:
+                raw = value.encode("utf-8")
+                buf.append(STR)
+                _write_varint(buf, len(raw))
+                buf += raw
+        elif isinstance(value, int):
+            buf.append(INT)
+            _write_varint(buf, value * 2 if value >= 0 else -value * 2 - 1)
+        elif isinstance(value, float):
+            buf.append(FLOAT)
+            buf += _double.pack(value)
+        elif isinstance(value, dict):
+            buf.append(DICT)
+            _write_varint(buf, len(value))
+            for key, item in value.items():
+                if not isinstance(key, str):
+                    raise TypeError(f"Keys must be str, not {type(key).__name__}")
+                _write_varint(buf, self.intern(key))
+                self.encode(buf, item)
+        elif isinstance(value, (list, tuple)):
+            buf.append(LIST)
+            _write_varint(buf, len(value))
+            for item in value:
+                self.encode(buf, item)
+        else:
+            raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+class _Decoder:
+    def __init__(self, data: bytes, strings: list[str]) -> None:
+        self.data = data
+        self.strings = strings
+
+    def decode(self, pos: int) -> tuple[Any, int]:
+        data = self.data
+        tag = data[pos]
+        pos += 1
+        if tag == REF:
+            # 字符串表不超过 128 项时下标只有一个字节, 跳过 _read_varint 的函数调用
+            index = data[pos]
+            if index < 0x80:
+                return self.strings[index], pos + 1
+            index, pos = _read_varint(data, pos)
+            return self.strings[index], pos
+        if tag == DICT:
+            size, pos = _read_varint(data, pos)
+            strings = self.strings
+            decode = self.decode
+            compound: dict[str, Any] = {}
+            for _ in range(size):
+                index = data[pos]
+                if index < 0x80:
+                    pos += 1
+                else:
+                    index, pos = _read_varint(data, pos)
+                compound[strings[index]], pos = decode(pos)
+            return compound, pos
+        if tag == INT:
+            value, pos = _read_varint(data, pos)
+            return (value >> 1) if not value & 1 else -((value + 1) >> 1), pos
+        if tag == LIST:
+            size, pos = _read_varint(data, pos)
+            items: list[Any] = []
+            for _ in range(size):
+                item, pos = self.decode(pos)
+                items.append(item)
+            return items, pos
+        if tag == STR:
+            size, pos = _read_varint(data, pos)
+            return data[pos:pos + size].decode("utf-8"), pos + size
+        if tag == FLOAT:
+            return _double.unpack_from(data, pos)[0], pos + 8
+        if tag == NONE:
+            return None, pos
+        if tag == TRUE:
+            return True, pos
+        if tag == FALSE:
+            return False, pos
+        raise ValueError(f"Unknown tag {tag} at {pos - 1}")
+
+
+def _index_entry(encoder: _Encoder, key: str, order: Any, offset: int, length: int) -> bytes:
+    order_id = order.get("id") if isinstance(order, dict) else None
+    sender = order.get("sender") if isinstance(order, dict) else None
+    receiver = order.get("receiver") if isinstance(order, dict) else None
+    if (
+            type(order_id) is int and 0 < order_id < NO_REF
+            and isinstance(sender, str) and isinstance(receiver, str)
+    ):
+        key_ref = NO_REF if key == str(order_id) else encoder.intern(key)
+        return INDEX_ENTRY.pack(
+            order_id, encoder.intern(sender), encoder.intern(receiver), key_ref, offset, length
+        )
+    return INDEX_ENTRY.pack(0, NO_REF, NO_REF, encoder.intern(key), offset, length)
+
+
+def write_binary_snapshot(
+        path: str,
+        players: Iterable[str],
+        orders: Iterable[tuple[str, Any]],
+        *,
+        fsync: bool = True,
+) -> None:
+    """把订单数据写入二进制快照
+
+    和 :func:`~mcdrpost.utils.json_stream.write_order_data` 一样先写入 ``<path>.tmp`` 再替换原文件
+
+    Args:
+        path (str): 快照文件路径
+        players (Iterable[str]): 已注册玩家
+        orders (Iterable[tuple[str, Any]]): (键, 序列化后的订单), 只会遍历一次
+        fsync (bool): 替换之前是否强制把临时文件落盘
+    """
+    encoder = _Encoder()
+    # 字符串表要写在最前面, 所以先把订单编码到内存中
+    index = bytearray()
+    records = bytearray()
+    count = 0
+    for key, order in orders:
+        offset = len(records)
+        encoder.encode(records, order)
+        index += _index_entry(encoder, key, order, offset, len(records) - offset)
+        count += 1
+
+    head = bytearray(MAGIC)
+    head.append(VERSION)
+    player_refs = [encoder.intern(player) for player in players]
+    _write_varint(head, len(encoder.strings))
+    for string in encoder.strings:
+        raw = string.encode("utf-8")
+        _write_varint(head, len(raw))
+        head += raw
+    _write_varint(head, len(player_refs))
+    for ref in player_refs:
+        _write_varint(head, ref)
+    _write_varint(head, count)
+
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(head)
+            f.write(index)
+            f.write(records)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.isfile(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class _DeferredRecord(DeferredOrder):
+    __slots__ = ("_reader", "_pos", "_end")
+
+    def __init__(
+            self, order_id: int, sender: str, receiver: str, reader: "BinarySnapshotReader", pos: int, end: int
+    ) -> None:
+        self.id = order_id
+        self.sender = sender
+        self.receiver = receiver
+        self._reader = reader
+        self._pos = pos
+        self._end = end
+
+    def load(self) -> dict[str, Any]:
+        return self._reader.decode_order(self._pos, self._end)
+
+
+class BinarySnapshotReader:
+    """读取二进制快照, 用法与 :class:`~mcdrpost.utils.json_stream.OrderDataReader` 相同
+
+    快照会被整个读入内存 (它比对应的 JSON 小得多), 订单在遍历时才会被逐个解码
+    """
+
+    def __init__(self, fp: BinaryIO) -> None:
+        data = fp.read()
+        if len(data) <= len(MAGIC) or data[:len(MAGIC)] != MAGIC:
+            raise ValueError("Not a MCDRpost order snapshot")
+        if data[len(MAGIC)] != VERSION:
+            raise ValueError(f"Unsupported snapshot version: {data[len(MAGIC)]}")
+        pos = len(MAGIC) + 1
+        try:
+            size, pos = _read_varint(data, pos)
+            strings = []
+            for _ in range(size):
+                length, pos = _read_varint(data, pos)
+                strings.append(data[pos:pos + length].decode("utf-8"))
+                pos += length
+            size, pos = _read_varint(data, pos)
+            self.players: list[str] = []
+            for _ in range(size):
+                index, pos = _read_varint(data, pos)
+                self.players.append(strings[index])
+            count, pos = _read_varint(data, pos)
+        except IndexError:
+            raise ValueError("Truncated snapshot") from None
+
+        self._index = memoryview(data)[pos:pos + count * INDEX_ENTRY.size]
+        self._records_start = pos + count * INDEX_ENTRY.size
+        if len(self._index) != count * INDEX_ENTRY.size:
+            raise ValueError("Truncated snapshot")
+        self._decoder = _Decoder(data, strings)
+
+    def decode_order(self, pos: int, end: int) -> Any:
+        """解码位于 ``data[pos:end]`` 的订单"""
+        try:
+            order, pos = self._decoder.decode(pos)
+        except IndexError:
+            pos = -1
+        if pos != end:
+            raise ValueError(f"Corrupted order record ending at {end}")
+        return order
+
+    def __iter_index(self) -> Iterator[tuple[int, int, int, str, int, int]]:
+        """产生 (订单 ID, 寄件人下标, 收件人下标, 键, 记录起始位置, 记录结束位置)"""
+        strings = self._decoder.strings
+        start = self._records_start
+        size = len(self._decoder.data)
+        # 记录是连续写入的, 最后一条记录应该刚好结束在文件末尾
+        records_end = start
+        try:
+            for order_id, sender, receiver, key, offset, length in INDEX_ENTRY.iter_unpack(self._index):
+                pos = start + offset
+                records_end = max(records_end, pos + length)
+                if records_end > size:
+                    raise ValueError("Truncated snapshot")
+                yield order_id, sender, receiver, str(order_id) if key == NO_REF else strings[key], pos, pos + length
+        except IndexError:
+            raise ValueError("Corrupted snapshot index") from None
+        if records_end != size:
+            raise ValueError(f"Extra data at {records_end}")
+
+    def iter_orders(self) -> Iterator[tuple[str, Any]]:
+        """逐个解码订单, 产生 (键, 原始数据)"""
+        for _, _, _, key, pos, end in self.__iter_index():
+            yield key, self.decode_order(pos, end)
+
+    def iter_deferred(self) -> Iterator[tuple[str, Any]]:
+        """只读取索引, 产生 (键, :class:`DeferredOrder`)
+
+        索引中没有订单 ID、寄件人和收件人的订单会被立即解码, 产生 (键, 原始数据)
+        """
+        strings = self._decoder.strings
+        try:
+            for order_id, sender, receiver, key, pos, end in self.__iter_index():
+                if sender == NO_REF:
+                    yield key, self.decode_order(pos, end)
+                else:
+                    yield key, _DeferredRecord(order_id, strings[sender], strings[receiver], self, pos, end)
+        except IndexError:
+            raise ValueError("Corrupted snapshot index") from None
+
+
+__all__ = ["write_binary_snapshot", "BinarySnapshotReader"]
@@ -0,0 +1,153 @@
+import heapq
+import threading
+import time
+from logging import Logger
+from typing import Callable, Iterable
+
+from mcdrpost.utils.translation import TranslationKeys
+
+
+class ExpiryQueue:
+    """订单的过期时间队列
+
+    用最小堆保存 ``(过期时间, 订单 ID)``, 取出到期的订单是 O(k log n) 的, 不需要扫描所有订单.
+    删除订单时只从字典中移除, 堆中的旧条目在到达堆顶时才被丢弃; 订单 ID 被重新分配时,
+    旧条目的过期时间与字典中的不一致, 同样会被丢弃
+
+    线程安全
+    """
+
+    def __init__(self, entries: Iterable[tuple[int, float]] = ()) -> None:
+        """初始化
+
+        Args:
+            entries (Iterable[tuple[int, float]]): (订单 ID, 过期时间) , 时间为时间戳
+        """
+        self._lock = threading.Lock()
+        self._deadlines: dict[int, float] = dict(entries)
+        self._heap: list[tuple[float, int]] = [(deadline, order_id) for order_id, deadline in self._deadlines.items()]
+        heapq.heapify(self._heap)
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, order_id: int) -> bool:
+        return order_id in self._deadlines
+
+    def deadline(self, order_id: int) -> float | None:
+        """订单的过期时间, 不会过期的订单返回 None"""
+        return self._deadlines.get(order_id)
+
+    def push(self, order_id: int, deadline: float) -> None:
+        """添加订单, 已经存在的订单会使用新的过期时间"""
+        with self._lock:
+            self._deadlines[order_id] = deadline
+            heapq.heappush(self._heap, (deadline, order_id))
+            self.__compact()
+
+    def discard(self, order_id: int) -> None:
+        """移除订单, 订单不存在时什么也不做"""
+        with self._lock:
+            self._deadlines.pop(order_id, None)
+
+    def next_deadline(self) -> float | None:
+        """最早的过期时间, 队列为空时返回 None"""
+        with self._lock:
+            self.__drop_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float) -> list[int]:
+        """取出所有过期时间不晚于 ``now`` 的订单
+
+        Returns:
+            list[int]: 按过期时间排序的订单 ID
+        """
+        due: list[int] = []
+        with self._lock:
+            while True:
+                self.__drop_stale()
+                if not self._heap or self._heap[0][0] > now:
+                    return due
+                _, order_id = heapq.heappop(self._heap)
+                del self._deadlines[order_id]
+                due.append(order_id)
+
+    def __drop_stale(self) -> None:
+        heap = self._heap
+        while heap and self._deadlines.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+
+    def __compact(self) -> None:
+        # 大量订单被删除后, 堆中的旧条目可能远多于有效的条目
+        if len(self._heap) > 2 * len(self._deadlines) + 64:
+            self._heap = [(deadline, order_id) for order_id, deadline in self._deadlines.items()]
+            heapq.heapify(self._heap)
+
+
+class ExpiryScheduler:
+    """过期订单的清理线程
+
+    在最早的订单过期时调用 ``sweep_func``, 但两次清理之间至少间隔 ``interval`` 秒,
+    所以这段时间内过期的订单会在同一次清理中被批量处理
+
+    Attributes:
+        interval (float): 两次清理之间的最短间隔, 单位为秒
+    """
+
+    def __init__(
+            self, queue: ExpiryQueue, sweep_func: Callable[[], object], interval: float, logger: Logger
+    ) -> None:
+        self.interval = interval
+        self._queue = queue
+        self._sweep_func = sweep_func
+        self._logger = logger
+
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._last_sweep = time.time()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        with self._cond:
+            if self._thread is not None or self._stopped:
+                return
+            self._thread = threading.Thread(target=self.__run, name="MCDRpost | expiry scheduler", daemon=True)
+            self._thread.start()
+
+    def wake(self) -> None:
+        """有订单加入队列时调用, 使线程重新计算下一次清理的时间"""
+        with self._cond:
+            self._cond.notify()
+
+    def stop(self) -> None:
+        """停止清理线程, 正在进行的清理会先完成"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def __run(self) -> None:
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                deadline = self._queue.next_deadline()
+                if deadline is None:
+                    self._cond.wait()
+                    continue
+                target = max(deadline, self._last_sweep + self.interval)
+                now = time.time()
+                if now < target:
+                    # 过期时间是系统时间, 分段等待以免系统时间被调整后错过
+                    self._cond.wait(min(target - now, self.interval))
+                    continue
+
+            try:
+                self._sweep_func()
+            except Exception:
+                self._logger.exception(TranslationKeys.data_expire_failed.rtr())
+            self._last_sweep = time.time()
+
+
+__all__ = ["ExpiryQueue", "ExpiryScheduler"]
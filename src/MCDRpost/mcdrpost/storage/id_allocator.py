@@ -0,0 +1,60 @@
+import heapq
+from typing import Iterable
+
+
+class IdAllocator:
+    """订单 ID 分配器
+
+    总是分配最小的未被占用的正整数 ID, 与之前逐个探测的实现结果相同, 但分配和回收都是 O(log n)
+
+    内部维护一个空闲区间的最小堆和一个高水位线 (已分配过的最大 ID),
+    堆中的区间都不超过高水位线, 高水位线以上的 ID 全部空闲, 所以堆顶就是最小的空闲 ID
+    """
+
+    def __init__(self, used_ids: Iterable[int] = ()) -> None:
+        self._free: list[tuple[int, int]] = []
+        self._high_water_mark = 0
+        self.reset(used_ids)
+
+    @property
+    def high_water_mark(self) -> int:
+        return self._high_water_mark
+
+    def reset(self, used_ids: Iterable[int]) -> None:
+        """根据已经被占用的 ID 重建分配器, O(n log n)
+
+        Args:
+            used_ids (Iterable[int]): 已经被占用的 ID
+        """
+        self._free = []
+        expected = 1
+        for used in sorted(set(used_ids)):
+            if used > expected:
+                self._free.append((expected, used - 1))
+            expected = used + 1
+        # 区间按起点有序, 本身就是一个合法的堆
+        self._high_water_mark = expected - 1
+
+    def allocate(self) -> int:
+        """分配最小的空闲 ID"""
+        if not self._free:
+            self._high_water_mark += 1
+            return self._high_water_mark
+
+        start, end = self._free[0]
+        if start == end:
+            heapq.heappop(self._free)
+        else:
+            heapq.heapreplace(self._free, (start + 1, end))
+        return start
+
+    def release(self, order_id: int) -> None:
+        """回收 ID, 调用者需要保证这个 ID 确实已经被分配
+
+        Args:
+            order_id (int): 被回收的 ID
+        """
+        heapq.heappush(self._free, (order_id, order_id))
+
+
+__all__ = ["IdAllocator"]
@@ -0,0 +1,179 @@
+"""订单操作日志 (write-ahead journal)
+
+每一次对订单数据的修改都会以一行 JSON 的形式追加到日志文件中, 而不是重写整个 ``orders.json``,
+在压缩 (compact) 时再把日志合并进快照
+
+日志记录的格式::
+
+    {"op": "add_order", "order": {...}}
+    {"op": "add_orders", "orders": [{...}, ...]}
+    {"op": "remove_order", "id": 1}
+    {"op": "add_player", "player": "xieyuen"}
+    {"op": "remove_player", "player": "xieyuen"}
+
+``add_orders`` 只占一行, 批量寄件要么全部被重放, 要么 (写到一半时崩溃) 全部被丢弃
+
+所有操作都是幂等的 (覆盖或删除某个键), 所以即使快照已经包含了某些记录, 重放它们也不会出错
+"""
+
+import json
+import os
+import threading
+from typing import Any, Literal, TextIO
+
+from mcdrpost.data_structure import Order, OrderData
+from mcdrpost.storage.lazy_orders import LazyOrderData
+
+JournalOp = Literal["add_order", "add_orders", "remove_order", "add_player", "remove_player"]
+
+
+class OrderJournal:
+    """订单操作日志
+
+    压缩时会先把当前日志轮换 (rotate) 为 ``<path>.old``, 待快照写入完成后再删除它,
+    这样在任何时刻崩溃, 快照 + ``.old`` + 当前日志 都能够恢复出完整的数据
+
+    Attributes:
+        path (str): 日志文件路径
+        fsync (bool): 是否在每次追加后调用 ``os.fsync``
+    """
+
+    ROTATED_SUFFIX = ".old"
+
+    def __init__(self, path: str, fsync: bool = True) -> None:
+        self.path = path
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._file: TextIO | None = None
+        self._size = 0
+        self._rotated_size = 0
+
+    @property
+    def rotated_path(self) -> str:
+        return self.path + self.ROTATED_SUFFIX
+
+    @property
+    def size(self) -> int:
+        """当前日志中 (包括尚未删除的轮换日志) 的记录条数"""
+        return self._size + self._rotated_size
+
+    def exists(self) -> bool:
+        """磁盘上是否存在尚未合并进快照的日志"""
+        return os.path.isfile(self.path) or os.path.isfile(self.rotated_path)
+
+    def append(self, op: JournalOp, **payload: Any) -> None:
+        """追加一条记录
+
+        Args:
+            op (JournalOp): 操作类型
+            **payload: 操作的参数
+        """
+        line = json.dumps({"op": op, **payload}, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line + "\n")
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._size += 1
+
+    def replay(self, data: OrderData | LazyOrderData) -> tuple[int, int | None]:
+        """把日志重放到订单数据上
+
+        Args:
+            data (OrderData | LazyOrderData): 从快照中加载的订单数据
+
+        Returns:
+            tuple[int, int | None]: 重放的记录数, 以及损坏的行号 (没有损坏时为 None)
+        """
+        corrupted: int | None = None
+        with self._lock:
+            counts = []
+            for path in (self.rotated_path, self.path):
+                count = 0
+                if os.path.isfile(path) and corrupted is None:
+                    with open(path, "r", encoding="utf-8") as f:
+                        for lineno, line in enumerate(f, start=1):
+                            if not line.strip():
+                                continue
+                            try:
+                                self.__apply(data, json.loads(line))
+                            except (ValueError, KeyError, TypeError):
+                                # 写到一半时崩溃, 之后的内容都不可信
+                                corrupted = lineno
+                                break
+                            count += 1
+                counts.append(count)
+            self._rotated_size, self._size = counts
+        return self.size, corrupted
+
+    @staticmethod
+    def __apply(data: OrderData | LazyOrderData, record: dict[str, Any]) -> None:
+        op = record["op"]
+        if op == "add_order":
+            order = Order.deserialize(record["order"])
+            data.orders[str(order.id)] = order
+        elif op == "add_orders":
+            orders = [Order.deserialize(order) for order in record["orders"]]
+            for order in orders:
+                data.orders[str(order.id)] = order
+        elif op == "remove_order":
+            data.orders.pop(str(record["id"]), None)
+        elif op == "add_player":
+            if record["player"] not in data.players:
+                data.players.append(record["player"])
+        elif op == "remove_player":
+            if record["player"] in data.players:
+                data.players.remove(record["player"])
+        else:
+            raise ValueError(f"Unknown journal op: {op}")
+
+    def rotate(self) -> None:
+        """把当前日志轮换为 ``.old``, 之后的记录会写入新的日志文件
+
+        调用者需要保证调用期间没有并发的修改, 并在快照写入之后调用 :meth:`discard_rotated`
+        """
+        with self._lock:
+            self.__close()
+            if not os.path.isfile(self.path):
+                return
+            if os.path.isfile(self.rotated_path):
+                # 上一次压缩没有完成, 把两份日志按顺序合并
+                with open(self.rotated_path, "a", encoding="utf-8") as dst, \
+                        open(self.path, "r", encoding="utf-8") as src:
+                    dst.write(src.read())
+                os.remove(self.path)
+            else:
+                os.replace(self.path, self.rotated_path)
+            self._rotated_size += self._size
+            self._size = 0
+
+    def discard_rotated(self) -> None:
+        """删除已经合并进快照的轮换日志"""
+        with self._lock:
+            if os.path.isfile(self.rotated_path):
+                os.remove(self.rotated_path)
+            self._rotated_size = 0
+
+    def clear(self) -> None:
+        """删除所有日志"""
+        with self._lock:
+            self.__close()
+            for path in (self.rotated_path, self.path):
+                if os.path.isfile(path):
+                    os.remove(path)
+            self._size = 0
+            self._rotated_size = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self.__close()
+
+    def __close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+__all__ = ["OrderJournal", "JournalOp"]
@@ -0,0 +1,459 @@
+import os
+import threading
+from typing import Any, Iterable, TYPE_CHECKING, override
+
+from mcdreforged import new_thread
+
+from mcdrpost import constants
+from mcdrpost.configuration import StorageConfig
+from mcdrpost.data_structure import Order, OrderData, OrderInfo
+from mcdrpost.storage.abstract_storage import AbstractOrderStorage
+from mcdrpost.storage.binary_snapshot import BinarySnapshotReader, write_binary_snapshot
+from mcdrpost.storage.id_allocator import IdAllocator
+from mcdrpost.storage.journal import JournalOp, OrderJournal
+from mcdrpost.storage.lazy_orders import LazyOrderData, LazyOrders
+from mcdrpost.storage.order_query import OrderQuery, OrderRow
+from mcdrpost.storage.player_registry import PlayerRegistry
+from mcdrpost.storage.save_scheduler import SaveScheduler
+from mcdrpost.storage.sorted_index import PlayerOrderIndex
+from mcdrpost.utils.exception import InvalidOrder
+from mcdrpost.utils.json_stream import OrderDataReader, write_order_data
+from mcdrpost.utils.translation import TranslationKeys
+
+if TYPE_CHECKING:
+    from mcdrpost.coordinator import MCDRpostCoordinator
+
+
+class JsonOrderStorage(AbstractOrderStorage):
+    """把全部订单保存在内存中, 并持久化到 ``orders.json`` 的存储后端
+
+    订单文件也可以使用二进制格式 (``orders.bin``), 由 ``storage.snapshot_format`` 决定,
+    见 :mod:`mcdrpost.storage.binary_snapshot`; 切换格式后, 第一次加载时会自动转换
+
+    支持操作日志和后台保存, 见 :class:`~mcdrpost.storage.journal.OrderJournal`
+    和 :class:`~mcdrpost.storage.save_scheduler.SaveScheduler`
+
+    订单保存在 :class:`~mcdrpost.storage.lazy_orders.LazyOrders` 中, 启用 ``storage.lazy_load`` 时,
+    加载时只读取构建索引需要的字段, 订单在被收取、取消或者列出时才会被验证
+    """
+
+    SNAPSHOT_FILE_NAMES: dict[str, str] = {
+        "json": constants.ORDER_DATA_FILE_NAME,
+        "binary": constants.ORDER_BINARY_DATA_FILE_NAME,
+    }
+
+    def __init__(self, coo: "MCDRpostCoordinator") -> None:
+        super().__init__(coo)
+
+        # index
+        self._sender_index = PlayerOrderIndex()
+        self._receiver_index = PlayerOrderIndex()
+        self._id_allocator = IdAllocator()
+        self._players = PlayerRegistry()
+
+        # persistence
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+        self._journal: OrderJournal | None = None
+        self._save_scheduler: SaveScheduler | None = None
+
+        self._order_data: LazyOrderData = LazyOrderData()
+        self._orders: LazyOrders = self._order_data.orders
+
+    @property
+    def _storage_config(self) -> StorageConfig:
+        return self.coo.config.storage
+
+    @property
+    def order_data(self) -> LazyOrderData:
+        """内存中的全部订单数据, 结构与 ``OrderData`` 相同
+
+        其中的 ``orders`` 是 :class:`~mcdrpost.storage.lazy_orders.LazyOrders`, 用法与字典相同
+        """
+        with self._lock:
+            self.__sync_players()
+            return self._order_data
+
+    def __sync_players(self) -> None:
+        """把玩家注册表写回 ``order_data.players``, 保持原有的列表格式"""
+        self._order_data.players = list(self._players)
+
+    def __snapshot_path(self, snapshot_format: str) -> str:
+        return os.path.join(self._server.get_data_folder(), self.SNAPSHOT_FILE_NAMES[snapshot_format])
+
+    def __load_snapshot(self) -> OrderData:
+        return self._server.load_config_simple(
+            constants.ORDER_DATA_FILE_NAME,
+            target_class=OrderData,
+            file_format=constants.ORDERS_DATA_FILE_TYPE,
+            echo_in_console=False,
+        )
+
+    def __load_stream(self, snapshot_format: str, lazy: bool) -> LazyOrderData | None:
+        """逐个读取订单文件中的订单, 见 :mod:`mcdrpost.utils.json_stream`
+
+        Args:
+            snapshot_format (str): 订单文件的格式
+            lazy (bool): 是否只读取构建索引需要的字段, 不验证订单
+
+        Returns:
+            LazyOrderData | None: ``orders.json`` 不存在或者无法解析时返回 None, 交给 :meth:`__load_snapshot` 处理
+
+        Raises:
+            ValueError: 二进制快照已损坏, 它没有可以回退的加载方式
+        """
+        path = self.__snapshot_path(snapshot_format)
+        if not os.path.isfile(path):
+            return None
+        if snapshot_format == "binary":
+            with open(path, "rb") as f:
+                snapshot_reader = BinarySnapshotReader(f)
+            if lazy:
+                orders = LazyOrders.from_raw(snapshot_reader.iter_deferred())
+            else:
+                orders = LazyOrders((key, Order.deserialize(raw)) for key, raw in snapshot_reader.iter_orders())
+            return LazyOrderData(snapshot_reader.players, orders)
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                json_reader = OrderDataReader(f)
+                if lazy:
+                    orders = LazyOrders.from_raw(json_reader.iter_orders())
+                else:
+                    orders = LazyOrders((key, Order.deserialize(raw)) for key, raw in json_reader.iter_orders())
+        except (ValueError, TypeError, AttributeError):
+            return None
+        return LazyOrderData(json_reader.players, orders)
+
+    def build_index(self) -> None:
+        """构建索引、玩家注册表和 ID 分配器"""
+        self._players = PlayerRegistry(self._order_data.players)
+        self._sender_index.clear()
+        self._receiver_index.clear()
+        order_ids = []
+        for _, order in self._orders.skeletons():
+            self._sender_index.add(order.sender, order.id)
+            self._receiver_index.add(order.receiver, order.id)
+            order_ids.append(order.id)
+        self._id_allocator.reset(order_ids)
+
+    def check_orders(self) -> None:
+        """检查订单
+
+        主要是订单的 ID 能不能对上索引
+
+        .. versionchanged:: v3.1.1
+            修复时使用索引作为订单 ID
+        """
+        is_fixed = False
+        for order_id, order in self._orders.skeletons():
+            if str(order.id) == order_id:
+                continue
+            if not self.coo.config.auto_fix:
+                raise InvalidOrder(
+                    TranslationKeys.data_validation_failed.rtr(order_id, order.id)
+                )
+            self._logger.error(
+                TranslationKeys.data_validation_failed.rtr(order_id, order.id)
+            )
+            self._logger.error(TranslationKeys.data_auto_fix.rtr(order_id))
+            self._orders.set_id(order_id, int(order_id))
+            is_fixed = True
+
+        if is_fixed:
+            self.save()
+
+    @override
+    def load(self) -> None:
+        """加载订单数据
+
+        订单文件加载完成后会把操作日志中尚未合并的记录重放到数据上
+        """
+        snapshot_format = self._storage_config.snapshot_format
+        lazy = self._storage_config.lazy_load
+        with self._lock:
+            converted_from: str | None = None
+            if os.path.isfile(self.__snapshot_path(snapshot_format)):
+                data = self.__load_stream(snapshot_format, lazy)
+            else:
+                # 切换了订单文件的格式, 从另一种格式的文件中读取
+                other_format = "json" if snapshot_format == "binary" else "binary"
+                data = self.__load_stream(other_format, lazy)
+                if data is not None:
+                    converted_from = other_format
+            if data is None:
+                data = LazyOrderData.of(self.__load_snapshot()) if snapshot_format == "json" else LazyOrderData()
+            self._order_data = data
+            self._orders = data.orders
+
+            journal = OrderJournal(
+                os.path.join(self._server.get_data_folder(), constants.ORDER_JOURNAL_FILE_NAME),
+                fsync=self._storage_config.fsync,
+            )
+            replayed, corrupted = journal.replay(self._order_data)
+            if corrupted is not None:
+                self._logger.warning(TranslationKeys.data_journal_corrupted.rtr(corrupted))
+            if replayed:
+                self._logger.info(TranslationKeys.data_journal_replayed.rtr(replayed))
+            self._journal = journal if self._storage_config.journal else None
+            self._save_scheduler = (
+                SaveScheduler(
+                    self.save,
+                    self._storage_config.save_delay,
+                    self._storage_config.max_save_delay,
+                    self._logger,
+                )
+                if self._storage_config.save_delay > 0
+                else None
+            )
+
+        self.check_orders()
+        with self._lock:
+            self.build_index()
+
+        # 关闭了日志模式或者日志已损坏, 立即把日志合并进订单文件
+        if journal.exists() and (self._journal is None or corrupted is not None):
+            self.save()
+            journal.clear()
+
+        if converted_from is not None:
+            self.save()
+            old_path = self.__snapshot_path(converted_from)
+            # 保留旧文件作为备份, 避免之后切换回去时读到过时的数据
+            os.replace(old_path, old_path + ".bak")
+            self._logger.info(
+                TranslationKeys.data_imported.rtr(len(self._orders), self.SNAPSHOT_FILE_NAMES[converted_from])
+            )
+
+    @override
+    def save(self) -> None:
+        """把全部订单数据写入订单文件
+
+        启用操作日志时, 这同时也是一次日志压缩
+        """
+        with self._save_lock:
+            self._logger.info(TranslationKeys.data_saved.rtr())
+            with self._lock:
+                # 直接对订单进行排序
+                self._orders.sort()
+                if self._save_scheduler is not None:
+                    self._save_scheduler.discard()
+                if self._journal is not None:
+                    self._journal.rotate()
+                self.__sync_players()
+                players = list(self._order_data.players)
+                entries = self._orders.snapshot()
+
+            # 在锁外逐个序列化并写入, 未加载的订单直接写回原始数据
+            snapshot_format = self._storage_config.snapshot_format
+            writer = write_binary_snapshot if snapshot_format == "binary" else write_order_data
+            writer(
+                self.__snapshot_path(snapshot_format),
+                players,
+                ((key, LazyOrders.serialize_entry(value)) for key, value in entries),
+                fsync=self._storage_config.fsync,
+            )
+            if self._journal is not None:
+                self._journal.discard_rotated()
+
+    @override
+    def commit(self) -> None:
+        """持久化自上次提交以来的修改
+
+        启用操作日志时, 修改在发生时就已经写入了日志, 不需要再重写订单文件;
+        启用后台保存时, 只会标记数据已被修改, 由保存线程合并多次修改后写入, 不会阻塞调用者
+        """
+        if self._journal is not None:
+            return
+        if self._save_scheduler is not None:
+            self._save_scheduler.mark_dirty()
+            return
+        self.save()
+
+    @override
+    def close(self) -> None:
+        """停止后台保存线程并关闭操作日志, 已经提交但是还在等待后台保存的修改会先被写入"""
+        scheduler = self._save_scheduler
+        if scheduler is not None:
+            scheduler.stop()
+            if scheduler.dirty:
+                self.save()
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+
+    @override
+    def export_json(self, path: str) -> int:
+        with self._lock:
+            self.__sync_players()
+            players = list(self._order_data.players)
+            entries = sorted(self._orders.snapshot(), key=lambda entry: int(entry[0]))
+        write_order_data(path, players, ((key, LazyOrders.serialize_entry(value)) for key, value in entries))
+        return len(entries)
+
+    def __record(self, op: JournalOp, **payload: Any) -> None:
+        """向操作日志追加一条记录, 日志过长时在后台压缩"""
+        if self._journal is None:
+            return
+        self._journal.append(op, **payload)
+        if self._journal.size >= self._storage_config.compact_threshold:
+            self.__compact()
+
+    @new_thread("MCDRpost | compact journal")
+    def __compact(self) -> None:
+        if self._save_lock.locked():
+            # 已经有压缩正在进行
+            return
+        self.save()
+
+    @override
+    def is_player_registered(self, player: str) -> bool:
+        return player in self._players
+
+    @override
+    def add_player(self, player: str) -> bool:
+        with self._lock:
+            if not self._players.add(player):
+                return False
+            self.__record("add_player", player=player)
+        return True
+
+    @override
+    def remove_player(self, player: str) -> bool:
+        with self._lock:
+            if not self._players.remove(player):
+                return False
+            self.__record("remove_player", player=player)
+        return True
+
+    @override
+    def get_players(self) -> list[str]:
+        return self._players.to_list()
+
+    @override
+    def add_order(self, order: OrderInfo) -> int:
+        with self._lock:
+            order_id = self._id_allocator.allocate()
+            new_order = Order(
+                **order.serialize(),
+                id=order_id,
+            )
+            self._orders[str(order_id)] = new_order
+            self._sender_index.add(order.sender, order_id)
+            self._receiver_index.add(order.receiver, order_id)
+            self.__record("add_order", order=new_order.serialize())
+        return order_id
+
+    @override
+    def add_orders(self, orders: list[OrderInfo]) -> list[int]:
+        with self._lock:
+            new_orders = []
+            for order in orders:
+                new_order = Order(**order.serialize(), id=self._id_allocator.allocate())
+                self._orders[str(new_order.id)] = new_order
+                self._sender_index.add(order.sender, new_order.id)
+                self._receiver_index.add(order.receiver, new_order.id)
+                new_orders.append(new_order)
+            if new_orders:
+                # 只写入一条日志记录 (一次 fsync)
+                self.__record("add_orders", orders=[order.serialize() for order in new_orders])
+        return [order.id for order in new_orders]
+
+    @override
+    def remove_order(self, order_id: int) -> bool:
+        with self._lock:
+            if str(order_id) not in self._orders:
+                return False
+            order = self._orders.skeleton(str(order_id))
+
+            self._sender_index.remove(order.sender, order_id)
+            self._receiver_index.remove(order.receiver, order_id)
+            del self._orders[str(order_id)]
+            self._id_allocator.release(order_id)
+            self.__record("remove_order", id=order_id)
+        return True
+
+    @override
+    def remove_orders(self, order_ids: Iterable[int]) -> int:
+        # 在一次加锁中完成, 其他线程不会看到只删除了一部分的状态
+        with self._lock:
+            return super().remove_orders(order_ids)
+
+    @override
+    def get_order(self, order_id: int) -> Order:
+        return self._orders[str(order_id)]
+
+    @override
+    def get_orders(self) -> list[Order]:
+        return list(self._orders.values())
+
+    @override
+    def get_order_ids(self) -> list[int]:
+        with self._lock:
+            return sorted(map(int, self._orders))
+
+    @override
+    def find_order_ids(self, query: OrderQuery) -> list[int]:
+        # 加锁, 避免筛选过程中订单被删除
+        with self._lock:
+            return super().find_order_ids(query)
+
+    @override
+    def _order_rows(self, order_ids: Iterable[int]) -> Iterable[OrderRow]:
+        # 直接使用内存中的记录, 不需要转换成 Order
+        for order_id in order_ids:
+            record = self._orders.record(str(order_id))
+            yield OrderRow(record.id, record.timestamp, record.sender, record.receiver, record.item_id)
+
+    @override
+    def contain_order(self, order_id: int) -> bool:
+        return str(order_id) in self._orders
+
+    @override
+    def get_orderid_by_sender(self, sender: str) -> list[int]:
+        return self._sender_index.get(sender)
+
+    @override
+    def get_orderid_by_receiver(self, receiver: str) -> list[int]:
+        return self._receiver_index.get(receiver)
+
+    @override
+    def is_sender(self, order_id: int, player: str) -> bool:
+        return self._sender_index.contains(player, order_id)
+
+    @override
+    def is_receiver(self, order_id: int, player: str) -> bool:
+        return self._receiver_index.contains(player, order_id)
+
+    @override
+    def count_orders_by_sender(self, sender: str) -> int:
+        return self._sender_index.count(sender)
+
+    @override
+    def get_orders_by_sender(self, sender: str) -> list[Order]:
+        return [
+            self._orders[str(order_id)]
+            for order_id in self._sender_index.get(sender)
+        ]
+
+    @override
+    def get_orders_by_receiver(self, receiver: str) -> list[Order]:
+        return [
+            self._orders[str(order_id)]
+            for order_id in self._receiver_index.get(receiver)
+        ]
+
+    @override
+    def has_unreceived_order(self, player: str) -> bool:
+        return self._receiver_index.count(player) > 0
+
+    @override
+    def pop_order(self, order_id: int) -> Order:
+        with self._lock:
+            order = self.get_order(order_id)
+            self.remove_order(order_id)
+        self.commit()
+        return order
+
+
+__all__ = ["JsonOrderStorage"]
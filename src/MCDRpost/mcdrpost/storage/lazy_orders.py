@@ -0,0 +1,205 @@
+"""按需加载的订单表"""
+
+from typing import Any, Iterable, Iterator, Mapping, MutableMapping, NamedTuple
+
+from mcdrpost.data_structure import Order, OrderData
+from mcdrpost.storage.order_record import OrderRecord, RecordPool
+
+
+class OrderSkeleton(NamedTuple):
+    """构建索引所需要的订单字段"""
+
+    id: int
+    sender: str
+    receiver: str
+
+
+class DeferredOrder:
+    """还没有被解码的订单, 只知道构建索引所需要的字段
+
+    子类实现 :meth:`load`, 见 :meth:`~mcdrpost.storage.binary_snapshot.BinarySnapshotReader.iter_deferred`
+    """
+
+    __slots__ = ("id", "sender", "receiver")
+
+    def __init__(self, order_id: int, sender: str, receiver: str) -> None:
+        self.id = order_id
+        self.sender = sender
+        self.receiver = receiver
+
+    @property
+    def skeleton(self) -> OrderSkeleton:
+        return OrderSkeleton(self.id, self.sender, self.receiver)
+
+    def load(self) -> dict[str, Any]:
+        """解码并返回订单的原始数据"""
+        raise NotImplementedError
+
+
+_Entry = OrderRecord | dict[str, Any] | DeferredOrder
+
+
+class LazyOrders(MutableMapping[str, Order]):
+    """订单 ID (字符串) -> 订单 的映射, 与 ``OrderData.orders`` 的用法相同
+
+    值可以是已经验证过的 :class:`~mcdrpost.storage.order_record.OrderRecord`,
+    也可以是从订单文件中读出来的原始字典或者尚未解码的 :class:`DeferredOrder`.
+    它们只有在第一次通过 ``orders[key]`` 访问时才会被验证并转换成记录,
+    构建索引、检查订单 ID 和保存时都不需要转换, 见 :meth:`skeletons` 和 :meth:`serialize`
+
+    内存中只保存紧凑的记录, ``orders[key]`` 每次都会返回一个新的 :class:`Order`, 修改它不会影响订单表,
+    需要修改订单时重新赋值 ``orders[key] = order``
+    """
+
+    __slots__ = ("_entries", "_pool")
+
+    def __init__(
+            self,
+            entries: Mapping[str, Order | _Entry] | Iterable[tuple[str, Order | _Entry]] = (),
+    ) -> None:
+        self._pool = RecordPool()
+        self._entries: dict[str, _Entry] = {}
+        if isinstance(entries, Mapping):
+            entries = entries.items()
+        for key, value in entries:
+            if isinstance(value, Order):
+                value = self._pool.create(value)
+            self._entries[key] = value
+
+    @classmethod
+    def from_raw(cls, raw_orders: Mapping[str, Any] | Iterable[tuple[str, Any]]) -> "LazyOrders":
+        """使用订单文件中的原始数据创建, 只检查构建索引需要的字段
+
+        缺少这些字段的订单会被立即验证, 以便尽早抛出验证错误
+
+        Args:
+            raw_orders: 订单 ID -> 原始数据, 也可以是 (订单 ID, 原始数据) 的迭代器
+        """
+        if isinstance(raw_orders, Mapping):
+            raw_orders = raw_orders.items()
+        orders = cls()
+        for key, raw in raw_orders:
+            if isinstance(raw, DeferredOrder):
+                orders._entries[key] = raw
+            elif (
+                    isinstance(raw, dict)
+                    and isinstance(raw.get("id"), int)
+                    and isinstance(raw.get("sender"), str)
+                    and isinstance(raw.get("receiver"), str)
+            ):
+                orders._entries[key] = raw
+            else:
+                orders._entries[key] = orders._pool.create(Order.deserialize(raw))
+        return orders
+
+    @property
+    def loaded_count(self) -> int:
+        """已经验证并转换成记录的订单数量"""
+        return sum(1 for value in self._entries.values() if isinstance(value, OrderRecord))
+
+    def skeleton(self, key: str) -> OrderSkeleton:
+        value = self._entries[key]
+        if isinstance(value, dict):
+            return OrderSkeleton(value["id"], value["sender"], value["receiver"])
+        return OrderSkeleton(value.id, value.sender, value.receiver)
+
+    def skeletons(self) -> Iterator[tuple[str, OrderSkeleton]]:
+        """遍历所有订单的索引字段, 不会加载订单"""
+        for key in self._entries:
+            yield key, self.skeleton(key)
+
+    def set_id(self, key: str, order_id: int) -> None:
+        """修改订单的 ID, 不会验证订单"""
+        value = self._entries[key]
+        if isinstance(value, DeferredOrder):
+            value = self._entries[key] = value.load()
+        if isinstance(value, dict):
+            value["id"] = order_id
+        else:
+            value.id = order_id
+
+    def serialize(self, key: str) -> dict[str, Any]:
+        """获取订单的序列化结果, 未加载的订单直接使用原始数据"""
+        return self.serialize_entry(self._entries[key])
+
+    @staticmethod
+    def serialize_entry(value: _Entry) -> dict[str, Any]:
+        if isinstance(value, DeferredOrder):
+            return value.load()
+        if isinstance(value, dict):
+            return value
+        return value.serialize()
+
+    def snapshot(self) -> list[tuple[str, _Entry]]:
+        """复制出当前的所有条目, 不会加载或者序列化订单
+
+        记录在创建之后只有 :meth:`set_id` 会修改它的 ID, 所以可以在不持有锁的情况下再用 :meth:`serialize_entry` 序列化
+        """
+        return list(self._entries.items())
+
+    def sort(self) -> None:
+        """按订单 ID 排序, 不会加载订单"""
+        self._entries = dict(sorted(self._entries.items(), key=lambda item: int(item[0])))
+
+    def record(self, key: str) -> OrderRecord:
+        """获取订单的记录, 未验证的订单会在这时验证"""
+        value = self._entries[key]
+        if isinstance(value, DeferredOrder):
+            value = value.load()
+        if isinstance(value, dict):
+            value = self._entries[key] = self._pool.create(Order.deserialize(value))
+        return value
+
+    def __getitem__(self, key: str) -> Order:
+        return self.record(key).to_order()
+
+    def __setitem__(self, key: str, value: Order) -> None:
+        self.__release(key)
+        self._entries[key] = self._pool.create(value)
+
+    def __delitem__(self, key: str) -> None:
+        self.__release(key)
+        del self._entries[key]
+
+    def __release(self, key: str) -> None:
+        value = self._entries.get(key)
+        if isinstance(value, OrderRecord):
+            self._pool.release(value)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self) -> str:
+        return f"LazyOrders({len(self._entries)} orders, {self.loaded_count} loaded)"
+
+
+class LazyOrderData:
+    """与 :class:`~mcdrpost.data_structure.OrderData` 的结构相同, 但订单保存在 :class:`LazyOrders` 中
+
+    Attributes:
+        players (list[str]): 已注册玩家名单
+        orders (LazyOrders): 订单数据
+    """
+
+    __slots__ = ("players", "orders")
+
+    def __init__(self, players: list[str] | None = None, orders: LazyOrders | None = None) -> None:
+        self.players: list[str] = players if players is not None else []
+        self.orders: LazyOrders = orders if orders is not None else LazyOrders()
+
+    @classmethod
+    def of(cls, data: OrderData) -> "LazyOrderData":
+        """把 ``OrderData`` 中的订单放进 :class:`LazyOrders`"""
+        return cls(list(data.players), LazyOrders(data.orders))
+
+    def __repr__(self) -> str:
+        return f"LazyOrderData({len(self.players)} players, {self.orders!r})"
+
+
+__all__ = ["OrderSkeleton", "DeferredOrder", "LazyOrders", "LazyOrderData"]
@@ -0,0 +1,160 @@
+"""订单列表的筛选和排序
+
+列表命令使用 ``key:value`` 形式的条件, 如 ``!!po ls orders 2 sender:Alice item:diamond older:7 sort:-time``,
+见 :meth:`OrderQuery.parse`
+"""
+
+import time
+from typing import Any, Iterable, NamedTuple
+
+from mcdrpost.data_structure import Order
+
+SORT_FIELDS = ("id", "time", "sender", "receiver", "item")
+"""可以用于排序的字段"""
+
+SECONDS_PER_DAY = 86400
+
+
+class OrderRow(NamedTuple):
+    """筛选和排序需要的订单字段"""
+
+    id: int
+    time: float
+    sender: str
+    receiver: str
+    item: str
+
+
+class OrderQuery(NamedTuple):
+    """订单的筛选和排序条件, 可以作为缓存的键
+
+    Attributes:
+        sender (str | None): 只保留这个玩家寄出的订单
+        receiver (str | None): 只保留寄给这个玩家的订单
+        item (str | None): 只保留这种物品 (完整的物品 ID)
+        older_than (int | None): 只保留在这么多秒之前 (或更早) 寄出的订单
+        newer_than (int | None): 只保留在这么多秒之内寄出的订单
+        sort (str): 排序字段, 见 :data:`SORT_FIELDS`
+        descending (bool): 是否倒序
+    """
+
+    sender: str | None = None
+    receiver: str | None = None
+    item: str | None = None
+    older_than: int | None = None
+    newer_than: int | None = None
+    sort: str = "id"
+    descending: bool = False
+
+    @classmethod
+    def parse(cls, text: str) -> "OrderQuery":
+        """解析 ``sender:<玩家> receiver:<玩家> item:<物品> older:<天数> newer:<天数> sort:[-]<字段>``
+
+        条件之间用空格分隔, 都可以省略; 物品没有命名空间时默认为 ``minecraft``, 排序字段前加 ``-`` 表示倒序
+
+        Raises:
+            ValueError: 无法识别的条件
+        """
+        fields: dict[str, Any] = {}
+        for token in text.split():
+            key, sep, value = token.partition(":")
+            if not sep or not value:
+                raise ValueError(token)
+            if key in ("sender", "receiver"):
+                fields[key] = value
+            elif key == "item":
+                fields[key] = value if ":" in value else "minecraft:" + value
+            elif key in ("older", "newer"):
+                days = float(value)
+                if not days >= 0:
+                    raise ValueError(token)
+                fields[key + "_than"] = int(days * SECONDS_PER_DAY)
+            elif key == "sort":
+                descending = value.startswith("-")
+                value = value.removeprefix("-")
+                if value not in SORT_FIELDS:
+                    raise ValueError(token)
+                fields["sort"] = value
+                fields["descending"] = descending
+            else:
+                raise ValueError(token)
+        return cls(**fields)
+
+    def format(self) -> str:
+        """:meth:`parse` 的逆操作, 用于生成翻页命令"""
+        tokens = []
+        if self.sender is not None:
+            tokens.append(f"sender:{self.sender}")
+        if self.receiver is not None:
+            tokens.append(f"receiver:{self.receiver}")
+        if self.item is not None:
+            tokens.append(f"item:{self.item}")
+        if self.older_than is not None:
+            tokens.append(f"older:{self.older_than / SECONDS_PER_DAY:g}")
+        if self.newer_than is not None:
+            tokens.append(f"newer:{self.newer_than / SECONDS_PER_DAY:g}")
+        if self.sort != "id" or self.descending:
+            tokens.append(f"sort:{'-' if self.descending else ''}{self.sort}")
+        return " ".join(tokens)
+
+    @property
+    def has_age_filter(self) -> bool:
+        return self.older_than is not None or self.newer_than is not None
+
+    @property
+    def needs_content(self) -> bool:
+        """是否需要订单内容才能完成筛选和排序, 为 False 时只使用索引就够了"""
+        return self.item is not None or self.has_age_filter or self.sort != "id"
+
+    def time_range(self, now: float | None = None) -> tuple[float, float]:
+        """寄出时间 (时间戳) 的闭区间"""
+        if now is None:
+            now = time.time()
+        low = float("-inf") if self.newer_than is None else now - self.newer_than
+        high = float("inf") if self.older_than is None else now - self.older_than
+        return low, high
+
+    def apply(self, rows: Iterable[OrderRow], now: float | None = None) -> list[int]:
+        """筛选并排序, 返回订单 ID
+
+        ``sender`` ``receiver`` 应该已经由调用者通过索引筛选过, 这里只处理其余的条件
+        """
+        low, high = self.time_range(now)
+        rows = [
+            row for row in rows
+            if (self.item is None or row.item == self.item) and low <= row.time <= high
+        ]
+        # 先按 ID 排序, 相同的值保持 ID 的顺序
+        rows.sort(key=lambda row: row.id)
+        if self.sort != "id":
+            rows.sort(key=lambda row: getattr(row, self.sort), reverse=self.descending)
+        elif self.descending:
+            rows.reverse()
+        return [row.id for row in rows]
+
+
+class OrderPage(NamedTuple):
+    """列表的一页
+
+    Attributes:
+        orders (list[Order]): 这一页的订单
+        page (int): 页码, 从 1 开始
+        pages (int): 总页数, 没有订单时也至少有一页
+        total (int): 符合条件的订单总数
+    """
+
+    orders: list[Order]
+    page: int
+    pages: int
+    total: int
+
+
+def intersect_sorted(left: list[int], right: list[int]) -> list[int]:
+    """两个有序 ID 列表的交集"""
+    if len(left) > len(right):
+        left, right = right, left
+    other = set(right)
+    return [value for value in left if value in other]
+
+
+__all__ = ["OrderPage", "OrderQuery", "OrderRow", "SORT_FIELDS", "intersect_sorted"]
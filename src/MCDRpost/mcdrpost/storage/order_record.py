@@ -0,0 +1,186 @@
+"""订单在内存中的紧凑表示"""
+
+import json
+import sys
+import time
+from typing import Any
+
+from mcdrpost.data_structure import Order
+from mcdrpost.utils import snbt
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+"""订单时间的格式, 与 :func:`~mcdrpost.utils.general.get_formatted_time` 相同"""
+
+
+def _parse_time(value: str) -> int | str:
+    """把时间字符串转换为时间戳, 无法原样还原的字符串保持不变"""
+    # time.strptime 太慢了, 格式固定为 "YYYY-mm-dd HH:MM:SS", 直接按位置切分
+    if len(value) != 19 or value[4] != "-" or value[7] != "-" or value[10] != " ":
+        return value
+    if value[13] != ":" or value[16] != ":":
+        return value
+    try:
+        timestamp = int(time.mktime((
+            int(value[0:4]), int(value[5:7]), int(value[8:10]),
+            int(value[11:13]), int(value[14:16]), int(value[17:19]),
+            0, 0, -1,
+        )))
+    except (ValueError, OverflowError):
+        return value
+    # 夏令时切换等情况下本地时间不一定能还原, 这时保存原始字符串
+    if time.strftime(TIME_FORMAT, time.localtime(timestamp)) != value:
+        return value
+    return timestamp
+
+
+def to_timestamp(value: str) -> float:
+    """把时间字符串转换为时间戳, 无法解析时返回 0"""
+    parsed = _parse_time(value)
+    if isinstance(parsed, int):
+        return parsed
+    try:
+        return time.mktime(time.strptime(value, TIME_FORMAT))
+    except (ValueError, OverflowError):
+        return 0
+
+
+class OrderRecord:
+    """内存中的订单
+
+    与 :class:`~mcdrpost.data_structure.Order` 保存相同的数据, 但:
+
+    - 使用 ``__slots__``, 并把物品展开到订单中, 不再有单独的 ``Item`` 对象
+    - 时间保存为整数时间戳
+    - 玩家名和物品 ID 被驻留 (intern), 相同的字符串只保存一份
+    - 相同的物品组件共享同一个字典, 见 :class:`RecordPool`
+
+    记录不应该被外部修改, 对外提供数据时使用 :meth:`to_order` 转换为 ``Order``
+    """
+
+    __slots__ = ("id", "time", "sender", "receiver", "comment", "item_id", "count", "components")
+
+    def __init__(
+            self,
+            order_id: int,
+            timestamp: int | str,
+            sender: str,
+            receiver: str,
+            comment: str,
+            item_id: str,
+            count: int,
+            components: dict,
+    ) -> None:
+        self.id = order_id
+        self.time = timestamp
+        self.sender = sender
+        self.receiver = receiver
+        self.comment = comment
+        self.item_id = item_id
+        self.count = count
+        self.components = components
+
+    @property
+    def formatted_time(self) -> str:
+        if isinstance(self.time, str):
+            return self.time
+        return time.strftime(TIME_FORMAT, time.localtime(self.time))
+
+    @property
+    def timestamp(self) -> float:
+        if isinstance(self.time, str):
+            return to_timestamp(self.time)
+        return self.time
+
+    def serialize(self) -> dict[str, Any]:
+        """与 ``Order.serialize()`` 的结果相同, 带类型的组件值按照 :func:`~mcdrpost.utils.snbt.to_json` 转换"""
+        return {
+            "id": self.id,
+            "time": self.formatted_time,
+            "sender": self.sender,
+            "receiver": self.receiver,
+            "comment": self.comment,
+            "item": {
+                "id": self.item_id,
+                "count": self.count,
+                "components": snbt.to_json(self.components),
+            },
+        }
+
+    def to_order(self) -> Order:
+        """转换为 :class:`~mcdrpost.data_structure.Order`, 物品组件会被复制, 修改它不会影响记录"""
+        data = self.serialize()
+        # 通过 JSON 复制, 带类型的值在 Order.deserialize 中还原
+        data["item"]["components"] = json.loads(json.dumps(data["item"]["components"]))
+        return Order.deserialize(data)
+
+    def __repr__(self) -> str:
+        return f"OrderRecord(id={self.id}, sender={self.sender!r}, receiver={self.receiver!r})"
+
+
+class RecordPool:
+    """创建 :class:`OrderRecord`, 并在记录之间共享相同的字符串和物品组件
+
+    共享的组件带有引用计数, 删除记录时调用 :meth:`release`, 不再被使用的组件会从池中移除
+    """
+
+    __slots__ = ("_components",)
+
+    def __init__(self) -> None:
+        # 组件 repr 的哈希 -> [组件, 引用计数] 的列表, 只保存哈希, 不保存 repr 本身
+        self._components: dict[int, list[list]] = {}
+
+    @staticmethod
+    def _key(components: dict) -> int:
+        # 使用 repr 而不是 ==: 1 == Byte(1), 但它们是不同的组件
+        return hash(repr(components))
+
+    def share_components(self, components: dict) -> dict:
+        """返回与 ``components`` 相同 (包括值的类型) 的共享字典, 并增加它的引用计数"""
+        text = repr(components)
+        key = hash(text)
+        candidates = self._components.setdefault(key, [])
+        for candidate in candidates:
+            if repr(candidate[0]) == text:
+                candidate[1] += 1
+                return candidate[0]
+        candidates.append([components, 1])
+        return components
+
+    def release(self, record: OrderRecord) -> None:
+        """记录被删除或者替换时调用, 减少它的组件的引用计数"""
+        key = self._key(record.components)
+        candidates = self._components.get(key)
+        if not candidates:
+            return
+        for index, candidate in enumerate(candidates):
+            if candidate[0] is record.components:
+                candidate[1] -= 1
+                if candidate[1] <= 0:
+                    del candidates[index]
+                    if not candidates:
+                        del self._components[key]
+                return
+
+    @property
+    def shared_count(self) -> int:
+        """池中不同组件的数量"""
+        return sum(len(candidates) for candidates in self._components.values())
+
+    def create(self, order: Order) -> OrderRecord:
+        """从已经验证过的订单创建记录"""
+        return OrderRecord(
+            order.id,
+            _parse_time(order.time),
+            sys.intern(order.sender),
+            sys.intern(order.receiver),
+            order.comment,
+            sys.intern(order.item.id),
+            order.item.count,
+            self.share_components(order.item.components),
+        )
+
+    def clear(self) -> None:
+        self._components.clear()
+
+
+__all__ = ["OrderRecord", "RecordPool", "TIME_FORMAT", "to_timestamp"]
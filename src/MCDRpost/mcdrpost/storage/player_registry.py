@@ -0,0 +1,68 @@
+"""已注册玩家的集合"""
+
+from typing import Iterable, Iterator
+
+
+class PlayerRegistry:
+    """已注册的玩家
+
+    使用插入有序的字典保存玩家, 成员判断、注册和删除都是 O(1) 的, 遍历时按注册顺序输出.
+    补全玩家名称使用的是 :class:`~mcdrpost.manager.data_manager.DataManager` 中的前缀索引
+
+    持久化时仍然使用 ``OrderData.players`` 的列表格式, 见 :meth:`to_list`
+    """
+
+    __slots__ = ("_players", "_snapshot")
+
+    def __init__(self, players: Iterable[str] = ()) -> None:
+        self._players: dict[str, None] = dict.fromkeys(players)
+        # get_players() 的缓存, 每次补全都会调用, 没有修改时不需要重新生成
+        self._snapshot: list[str] | None = None
+
+    def add(self, player: str) -> bool:
+        """注册玩家
+
+        Returns:
+            bool: 玩家之前没有注册时返回 True
+        """
+        if player in self._players:
+            return False
+        self._players[player] = None
+        self._snapshot = None
+        return True
+
+    def remove(self, player: str) -> bool:
+        """删除玩家
+
+        Returns:
+            bool: 玩家之前已经注册时返回 True
+        """
+        if player not in self._players:
+            return False
+        del self._players[player]
+        self._snapshot = None
+        return True
+
+    def __contains__(self, player: object) -> bool:
+        return player in self._players
+
+    def __len__(self) -> int:
+        return len(self._players)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._players)
+
+    def to_list(self) -> list[str]:
+        """按注册顺序获取所有玩家
+
+        返回的列表在下一次修改之前会被复用, 调用者不应该修改它
+        """
+        if self._snapshot is None:
+            self._snapshot = list(self._players)
+        return self._snapshot
+
+    def __repr__(self) -> str:
+        return f"PlayerRegistry({self.to_list()})"
+
+
+__all__ = ["PlayerRegistry"]
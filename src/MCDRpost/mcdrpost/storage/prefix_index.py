@@ -0,0 +1,126 @@
+"""命令补全使用的前缀索引"""
+
+from bisect import bisect_left
+from typing import Iterable
+
+from mcdrpost.storage.sorted_index import SortedIdSet
+
+
+class PrefixIndex:
+    """按字典序保存的字符串集合, 可以快速找出以某个前缀开头的所有元素
+
+    元素保存在一个有序的列表中, 添加和删除时二分查找位置后原地插入或删除, 不会复制整个集合.
+    查找返回新的列表, 不受之后的修改影响. 这个类不是线程安全的, 修改和查找需要由调用者加锁
+    """
+
+    __slots__ = ("_items",)
+
+    def __init__(self, items: Iterable[str] = ()) -> None:
+        self._items: list[str] = sorted(set(items))
+
+    def add(self, item: str) -> bool:
+        """添加元素
+
+        Returns:
+            bool: 元素之前不在集合中时返回 True
+        """
+        items = self._items
+        pos = bisect_left(items, item)
+        if pos < len(items) and items[pos] == item:
+            return False
+        items.insert(pos, item)
+        return True
+
+    def discard(self, item: str) -> bool:
+        """删除元素
+
+        Returns:
+            bool: 元素之前在集合中时返回 True
+        """
+        items = self._items
+        pos = bisect_left(items, item)
+        if pos == len(items) or items[pos] != item:
+            return False
+        del items[pos]
+        return True
+
+    def startswith(self, prefix: str) -> list[str]:
+        """按字典序获取以 ``prefix`` 开头的元素, O(log n + k)"""
+        items = self._items
+        if not prefix:
+            return items[:]
+        # 以 prefix 开头的字符串都在 [prefix, prefix 的最后一个字符加一) 之间
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return items[bisect_left(items, prefix):bisect_left(items, upper)]
+
+    def __contains__(self, item: object) -> bool:
+        if not isinstance(item, str):
+            return False
+        items = self._items
+        pos = bisect_left(items, item)
+        return pos < len(items) and items[pos] == item
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __bool__(self) -> bool:
+        return bool(self._items)
+
+    def __repr__(self) -> str:
+        return f"PrefixIndex({self._items})"
+
+
+class IdPrefixIndex:
+    """订单 ID 的前缀索引, 按数值顺序找出十进制表示以某个前缀开头的 ID
+
+    ID 保存在 :class:`~mcdrpost.storage.sorted_index.SortedIdSet` 中. 以 ``p`` 开头并且比 ``p`` 多 ``k`` 位的数
+    都在 ``[p * 10^k, (p + 1) * 10^k)`` 之间, 按 ``k`` 从小到大依次查找这些区间, 得到的 ID 已经是升序的.
+    这个类不是线程安全的, 修改和查找需要由调用者加锁
+    """
+
+    __slots__ = ("_ids",)
+
+    def __init__(self, ids: Iterable[int] = ()) -> None:
+        self._ids = SortedIdSet(ids)
+
+    def add(self, order_id: int) -> bool:
+        """添加 ID, 之前不在集合中时返回 True"""
+        return self._ids.add(order_id)
+
+    def discard(self, order_id: int) -> bool:
+        """删除 ID, 之前在集合中时返回 True"""
+        return self._ids.discard(order_id)
+
+    def startswith(self, prefix: str) -> list[str]:
+        """按数值顺序获取以 ``prefix`` 开头的 ID, O(d log n + k), ``d`` 是最大 ID 的位数"""
+        ids = self._ids
+        if not prefix:
+            return [str(order_id) for order_id in ids]
+        if not ids or not (prefix.isascii() and prefix.isdigit()):
+            return []
+        if prefix[0] == "0":
+            # 除了 0 本身, 十进制表示不会以 0 开头
+            return ["0"] if prefix == "0" and 0 in ids else []
+        low, high = int(prefix), int(prefix) + 1
+        last = ids.last()
+        result: list[str] = []
+        while low <= last:
+            result.extend(str(order_id) for order_id in ids.irange(low, high))
+            low *= 10
+            high *= 10
+        return result
+
+    def __contains__(self, order_id: object) -> bool:
+        return order_id in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __bool__(self) -> bool:
+        return bool(self._ids)
+
+    def __repr__(self) -> str:
+        return f"IdPrefixIndex({self._ids.to_list()})"
+
+
+__all__ = ["PrefixIndex", "IdPrefixIndex"]
@@ -0,0 +1,92 @@
+import threading
+import time
+from logging import Logger
+from typing import Callable
+
+from mcdrpost.utils.translation import TranslationKeys
+
+
+class SaveScheduler:
+    """防抖的后台保存调度器
+
+    数据被标记为脏之后, 在 ``delay`` 秒内没有新的修改, 或者距离第一次修改已经过去 ``max_delay`` 秒时,
+    在专门的线程上调用一次 ``save_func``, 所以一段时间内的多次修改只会触发一次写入
+
+    Attributes:
+        delay (float): 最后一次修改之后等待的时间, 单位为秒
+        max_delay (float): 第一次修改之后最多等待的时间, 单位为秒
+    """
+
+    def __init__(
+            self, save_func: Callable[[], None], delay: float, max_delay: float, logger: Logger
+    ) -> None:
+        self.delay = delay
+        self.max_delay = max(delay, max_delay)
+        self._save_func = save_func
+        self._logger = logger
+
+        self._cond = threading.Condition()
+        self._first_dirty: float | None = None
+        self._last_dirty: float | None = None
+        self._stopped = False
+        self._thread: threading.Thread | None = None
+
+    @property
+    def dirty(self) -> bool:
+        """是否有尚未保存的修改"""
+        return self._first_dirty is not None
+
+    def mark_dirty(self) -> None:
+        """标记数据已被修改, 不会阻塞调用者"""
+        with self._cond:
+            if self._stopped:
+                return
+            now = time.monotonic()
+            if self._first_dirty is None:
+                self._first_dirty = now
+            self._last_dirty = now
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self.__run, name="MCDRpost | save scheduler", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify()
+
+    def discard(self) -> None:
+        """清除脏标记, 在数据被其他途径完整保存时调用"""
+        with self._cond:
+            self._first_dirty = self._last_dirty = None
+
+    def stop(self) -> None:
+        """停止调度线程, 尚未保存的修改 **不会** 被保存"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def __run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._stopped and self._first_dirty is None:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+
+                first_dirty, last_dirty = self._first_dirty, self._last_dirty
+                if first_dirty is None or last_dirty is None:
+                    continue
+                deadline = min(last_dirty + self.delay, first_dirty + self.max_delay)
+                now = time.monotonic()
+                if now < deadline:
+                    self._cond.wait(deadline - now)
+                    continue
+                self._first_dirty = self._last_dirty = None
+
+            try:
+                self._save_func()
+            except Exception:
+                self._logger.exception(TranslationKeys.data_save_failed.rtr())
+
+
+__all__ = ["SaveScheduler"]
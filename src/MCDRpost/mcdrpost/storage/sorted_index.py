@@ -0,0 +1,167 @@
+"""玩家订单索引使用的有序集合"""
+
+from bisect import bisect_left, insort
+from typing import Iterator
+
+
+class SortedIdSet:
+    """有序的订单 ID 集合
+
+    元素被切分成若干个有序的小块 (每块不超过 ``2 * LOAD`` 个), 插入和删除只需要
+    在块的最大值上二分查找一次, 再在一个小块内移动元素; 另外用一个哈希集合保证成员判断是 O(1) 的.
+    遍历时按升序输出
+    """
+
+    LOAD = 256
+
+    __slots__ = ("_chunks", "_maxes", "_members")
+
+    def __init__(self, iterable=()) -> None:
+        self._chunks: list[list[int]] = []
+        self._maxes: list[int] = []
+        self._members: set[int] = set()
+        values = sorted(set(iterable))
+        if values:
+            self._members.update(values)
+            self._chunks = [values[i:i + self.LOAD] for i in range(0, len(values), self.LOAD)]
+            self._maxes = [chunk[-1] for chunk in self._chunks]
+
+    def add(self, value: int) -> bool:
+        """添加元素
+
+        Returns:
+            bool: 元素之前不在集合中时返回 True
+        """
+        if value in self._members:
+            return False
+        self._members.add(value)
+
+        if not self._chunks:
+            self._chunks.append([value])
+            self._maxes.append(value)
+            return True
+
+        pos = bisect_left(self._maxes, value)
+        if pos == len(self._maxes):
+            # 比所有元素都大, 放进最后一块
+            pos -= 1
+            self._chunks[pos].append(value)
+            self._maxes[pos] = value
+        else:
+            insort(self._chunks[pos], value)
+
+        if len(self._chunks[pos]) > 2 * self.LOAD:
+            chunk = self._chunks[pos]
+            self._chunks[pos:pos + 1] = [chunk[:self.LOAD], chunk[self.LOAD:]]
+            self._maxes[pos:pos + 1] = [chunk[self.LOAD - 1], chunk[-1]]
+        return True
+
+    def discard(self, value: int) -> bool:
+        """删除元素
+
+        Returns:
+            bool: 元素之前在集合中时返回 True
+        """
+        if value not in self._members:
+            return False
+        self._members.remove(value)
+
+        pos = bisect_left(self._maxes, value)
+        chunk = self._chunks[pos]
+        del chunk[bisect_left(chunk, value)]
+        if not chunk:
+            del self._chunks[pos]
+            del self._maxes[pos]
+        else:
+            self._maxes[pos] = chunk[-1]
+        return True
+
+    def __contains__(self, value: object) -> bool:
+        return value in self._members
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def __bool__(self) -> bool:
+        return bool(self._members)
+
+    def __iter__(self) -> Iterator[int]:
+        for chunk in self._chunks:
+            yield from chunk
+
+    def irange(self, low: int, high: int) -> Iterator[int]:
+        """按升序遍历 ``[low, high)`` 之间的元素, O(log n + k)"""
+        chunks = self._chunks
+        pos = bisect_left(self._maxes, low)
+        if pos == len(chunks):
+            return
+        start = bisect_left(chunks[pos], low)
+        while pos < len(chunks):
+            chunk = chunks[pos]
+            end = bisect_left(chunk, high)
+            yield from chunk[start:end]
+            if end < len(chunk):
+                return
+            pos += 1
+            start = 0
+
+    def last(self) -> int:
+        """最大的元素
+
+        Raises:
+            IndexError: 集合为空
+        """
+        return self._maxes[-1]
+
+    def to_list(self) -> list[int]:
+        """按升序复制出所有元素"""
+        result: list[int] = []
+        for chunk in self._chunks:
+            result.extend(chunk)
+        return result
+
+    def __repr__(self) -> str:
+        return f"SortedIdSet({self.to_list()})"
+
+
+class PlayerOrderIndex:
+    """玩家名 -> 订单 ID 的索引, 寄件人索引和收件人索引各使用一个"""
+
+    __slots__ = ("_index",)
+
+    def __init__(self) -> None:
+        self._index: dict[str, SortedIdSet] = {}
+
+    def add(self, player: str, order_id: int) -> None:
+        ids = self._index.get(player)
+        if ids is None:
+            ids = self._index[player] = SortedIdSet()
+        ids.add(order_id)
+
+    def remove(self, player: str, order_id: int) -> None:
+        ids = self._index.get(player)
+        if ids is None:
+            return
+        ids.discard(order_id)
+        if not ids:
+            # 不保留空集合, 避免玩家越来越多时索引只增不减
+            del self._index[player]
+
+    def get(self, player: str) -> list[int]:
+        """按升序获取玩家的所有订单 ID"""
+        ids = self._index.get(player)
+        return ids.to_list() if ids is not None else []
+
+    def contains(self, player: str, order_id: int) -> bool:
+        ids = self._index.get(player)
+        return ids is not None and order_id in ids
+
+    def count(self, player: str) -> int:
+        ids = self._index.get(player)
+        return len(ids) if ids is not None else 0
+
+    def clear(self) -> None:
+        self._index.clear()
+
+
+__all__ = ["SortedIdSet", "PlayerOrderIndex"]
@@ -0,0 +1,408 @@
+"""SQLite 存储后端
+
+订单保存在 ``orders.db`` 中, 每一次修改都是一条带索引的 SQL 语句, 启动时不需要解析和验证全部历史订单
+
+第一次启用时, 如果数据库为空, 会自动从 ``orders.json`` (以及尚未合并的操作日志) 中导入订单
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, TYPE_CHECKING, override
+
+from mcdrpost import constants
+from mcdrpost.data_structure import Item, Order, OrderData, OrderInfo
+from mcdrpost.storage.abstract_storage import AbstractOrderStorage
+from mcdrpost.storage.id_allocator import IdAllocator
+from mcdrpost.storage.lazy_orders import LazyOrderData
+from mcdrpost.storage.order_query import OrderQuery
+from mcdrpost.storage.order_record import TIME_FORMAT
+from mcdrpost.utils.translation import TranslationKeys
+
+if TYPE_CHECKING:
+    from mcdrpost.coordinator import MCDRpostCoordinator
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS players (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY,
+    time TEXT NOT NULL,
+    sender TEXT NOT NULL,
+    receiver TEXT NOT NULL,
+    comment TEXT NOT NULL,
+    item TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_orders_sender ON orders (sender, id);
+CREATE INDEX IF NOT EXISTS idx_orders_receiver ON orders (receiver, id);
+"""
+
+_ORDER_COLUMNS = "id, time, sender, receiver, comment, item"
+
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+
+class SqliteOrderStorage(AbstractOrderStorage):
+    """使用标准库 ``sqlite3`` 的存储后端
+
+    数据库使用 WAL 模式, 并在 ``sender`` ``receiver`` 上建立了索引, ``id`` 是主键
+    """
+
+    IMPORTED_META_KEY = "imported_from_json"
+
+    def __init__(self, coo: "MCDRpostCoordinator") -> None:
+        super().__init__(coo)
+        self._lock = threading.RLock()
+        self._conn: sqlite3.Connection | None = None
+        self._id_allocator = IdAllocator()
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self._server.get_data_folder(), constants.ORDER_DATABASE_FILE_NAME)
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            raise RuntimeError("SQLite storage is not loaded")
+        return self._conn
+
+    # lifecycle
+    @override
+    def load(self) -> None:
+        with self._lock:
+            self.close()
+            # 命令会在不同的线程上执行, 由 self._lock 保证同一时间只有一个线程使用连接
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            self.__import_json_once()
+            # 只读取主键, 不需要解析订单内容
+            self._id_allocator.reset(row[0] for row in self._conn.execute("SELECT id FROM orders"))
+
+    @override
+    def save(self) -> None:
+        """每条修改语句都已经自动提交, 这里只把 WAL 合并进数据库文件"""
+        with self._lock:
+            self._db.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        self._logger.info(TranslationKeys.data_saved.rtr())
+
+    @override
+    def commit(self) -> None:
+        # 修改已经自动提交, 不需要重写任何文件
+        pass
+
+    @override
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __import_json_once(self) -> None:
+        """数据库是新建的时候, 从 ``orders.json`` 导入订单"""
+        imported = self._db.execute(
+            "SELECT 1 FROM meta WHERE key = ?", (self.IMPORTED_META_KEY,)
+        ).fetchone()
+        if imported is not None:
+            return
+
+        json_path = os.path.join(self._server.get_data_folder(), constants.ORDER_DATA_FILE_NAME)
+        if os.path.isfile(json_path):
+            # 延迟导入, 避免循环导入
+            from mcdrpost.storage.json_storage import JsonOrderStorage
+
+            json_storage = JsonOrderStorage(self.coo)
+            json_storage.load()
+            json_storage.close()
+            count = self.import_order_data(json_storage.order_data)
+            self._logger.info(TranslationKeys.data_imported.rtr(count, constants.ORDER_DATA_FILE_NAME))
+
+        self._db.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, '1')", (self.IMPORTED_META_KEY,)
+        )
+
+    def import_order_data(self, data: OrderData | LazyOrderData) -> int:
+        """在一个事务中导入订单数据, 已经存在的同 ID 订单会被覆盖
+
+        Args:
+            data (OrderData | LazyOrderData): 订单数据
+
+        Returns:
+            int: 导入的订单数量
+        """
+        with self._lock:
+            db = self._db
+            db.execute("BEGIN")
+            try:
+                db.executemany(
+                    "INSERT OR IGNORE INTO players (name) VALUES (?)",
+                    ((player,) for player in data.players),
+                )
+                db.executemany(
+                    f"INSERT OR REPLACE INTO orders ({_ORDER_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)",
+                    (self.__order2row(order) for order in data.orders.values()),
+                )
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+        return len(data.orders)
+
+    @staticmethod
+    def __order2row(order: Order) -> tuple:
+        return (
+            order.id,
+            order.time,
+            order.sender,
+            order.receiver,
+            order.comment,
+            json.dumps(order.item.serialize(), ensure_ascii=False, separators=(",", ":")),
+        )
+
+    @staticmethod
+    def __row2order(row: tuple) -> Order:
+        order_id, time, sender, receiver, comment, item = row
+        return Order(
+            id=order_id,
+            time=time,
+            sender=sender,
+            receiver=receiver,
+            comment=comment,
+            item=Item.deserialize(json.loads(item)),
+        )
+
+    # players
+    @override
+    def is_player_registered(self, player: str) -> bool:
+        with self._lock:
+            return self._db.execute(
+                "SELECT 1 FROM players WHERE name = ?", (player,)
+            ).fetchone() is not None
+
+    @override
+    def add_player(self, player: str) -> bool:
+        with self._lock:
+            return self._db.execute(
+                "INSERT OR IGNORE INTO players (name) VALUES (?)", (player,)
+            ).rowcount > 0
+
+    @override
+    def remove_player(self, player: str) -> bool:
+        with self._lock:
+            return self._db.execute(
+                "DELETE FROM players WHERE name = ?", (player,)
+            ).rowcount > 0
+
+    @override
+    def get_players(self) -> list[str]:
+        with self._lock:
+            return [row[0] for row in self._db.execute("SELECT name FROM players ORDER BY seq")]
+
+    # orders
+    @override
+    def add_order(self, order: OrderInfo) -> int:
+        with self._lock:
+            db = self._db
+            order_id = self._id_allocator.allocate()
+            try:
+                new_order = Order(**order.serialize(), id=order_id)
+                db.execute(
+                    f"INSERT INTO orders ({_ORDER_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)",
+                    self.__order2row(new_order),
+                )
+            except BaseException:
+                self._id_allocator.release(order_id)
+                raise
+        return order_id
+
+    @override
+    def add_orders(self, orders: list[OrderInfo]) -> list[int]:
+        with self._lock:
+            db = self._db
+            new_orders = [Order(**order.serialize(), id=self._id_allocator.allocate()) for order in orders]
+            db.execute("BEGIN")
+            try:
+                db.executemany(
+                    f"INSERT INTO orders ({_ORDER_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)",
+                    (self.__order2row(order) for order in new_orders),
+                )
+            except BaseException:
+                db.execute("ROLLBACK")
+                for order in new_orders:
+                    self._id_allocator.release(order.id)
+                raise
+            db.execute("COMMIT")
+        return [order.id for order in new_orders]
+
+    @override
+    def remove_order(self, order_id: int) -> bool:
+        with self._lock:
+            if self._db.execute("DELETE FROM orders WHERE id = ?", (order_id,)).rowcount == 0:
+                return False
+            self._id_allocator.release(order_id)
+        return True
+
+    @override
+    def remove_orders(self, order_ids: Iterable[int]) -> int:
+        with self._lock:
+            db = self._db
+            removed = []
+            db.execute("BEGIN")
+            try:
+                for order_id in order_ids:
+                    if db.execute("DELETE FROM orders WHERE id = ?", (order_id,)).rowcount:
+                        removed.append(order_id)
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+            for order_id in removed:
+                self._id_allocator.release(order_id)
+        return len(removed)
+
+    @override
+    def get_order(self, order_id: int) -> Order:
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {_ORDER_COLUMNS} FROM orders WHERE id = ?", (order_id,)
+            ).fetchone()
+        if row is None:
+            raise KeyError(order_id)
+        return self.__row2order(row)
+
+    @override
+    def get_orders(self) -> list[Order]:
+        with self._lock:
+            rows = self._db.execute(f"SELECT {_ORDER_COLUMNS} FROM orders ORDER BY id").fetchall()
+        return [self.__row2order(row) for row in rows]
+
+    @override
+    def get_order_ids(self) -> list[int]:
+        with self._lock:
+            return [row[0] for row in self._db.execute("SELECT id FROM orders ORDER BY id")]
+
+    @override
+    def find_order_ids(self, query: OrderQuery) -> list[int]:
+        conditions = []
+        params: list = []
+        if query.sender is not None:
+            conditions.append("sender = ?")
+            params.append(query.sender)
+        if query.receiver is not None:
+            conditions.append("receiver = ?")
+            params.append(query.receiver)
+        if query.item is not None:
+            # item 列是以物品 ID 开头的紧凑 JSON, 见 __order2row
+            prefix = '{"id":' + json.dumps(query.item, ensure_ascii=False) + ","
+            conditions.append("substr(item, 1, ?) = ?")
+            params += [len(prefix), prefix]
+        # time 列的格式可以直接按字符串比较
+        low, high = query.time_range()
+        if query.newer_than is not None:
+            conditions.append("time >= ?")
+            params.append(time.strftime(TIME_FORMAT, time.localtime(low)))
+        if query.older_than is not None:
+            conditions.append("time <= ?")
+            params.append(time.strftime(TIME_FORMAT, time.localtime(high)))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        direction = "DESC" if query.descending else "ASC"
+        order_by = f"id {direction}" if query.sort == "id" else f"{query.sort} {direction}, id"
+        with self._lock:
+            return [row[0] for row in self._db.execute(f"SELECT id FROM orders {where} ORDER BY {order_by}", params)]
+
+    @override
+    def contain_order(self, order_id: int) -> bool:
+        with self._lock:
+            return self._db.execute(
+                "SELECT 1 FROM orders WHERE id = ?", (order_id,)
+            ).fetchone() is not None
+
+    @override
+    def get_orderid_by_sender(self, sender: str) -> list[int]:
+        with self._lock:
+            return [row[0] for row in self._db.execute(
+                "SELECT id FROM orders WHERE sender = ? ORDER BY id", (sender,)
+            )]
+
+    @override
+    def get_orderid_by_receiver(self, receiver: str) -> list[int]:
+        with self._lock:
+            return [row[0] for row in self._db.execute(
+                "SELECT id FROM orders WHERE receiver = ? ORDER BY id", (receiver,)
+            )]
+
+    @override
+    def is_sender(self, order_id: int, player: str) -> bool:
+        with self._lock:
+            return self._db.execute(
+                "SELECT 1 FROM orders WHERE id = ? AND sender = ?", (order_id, player)
+            ).fetchone() is not None
+
+    @override
+    def is_receiver(self, order_id: int, player: str) -> bool:
+        with self._lock:
+            return self._db.execute(
+                "SELECT 1 FROM orders WHERE id = ? AND receiver = ?", (order_id, player)
+            ).fetchone() is not None
+
+    @override
+    def count_orders_by_sender(self, sender: str) -> int:
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM orders WHERE sender = ?", (sender,)
+            ).fetchone()[0]
+
+    @override
+    def get_orders_by_sender(self, sender: str) -> list[Order]:
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {_ORDER_COLUMNS} FROM orders WHERE sender = ? ORDER BY id", (sender,)
+            ).fetchall()
+        return [self.__row2order(row) for row in rows]
+
+    @override
+    def get_orders_by_receiver(self, receiver: str) -> list[Order]:
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {_ORDER_COLUMNS} FROM orders WHERE receiver = ? ORDER BY id", (receiver,)
+            ).fetchall()
+        return [self.__row2order(row) for row in rows]
+
+    @override
+    def has_unreceived_order(self, player: str) -> bool:
+        with self._lock:
+            return self._db.execute(
+                "SELECT 1 FROM orders WHERE receiver = ? LIMIT 1", (player,)
+            ).fetchone() is not None
+
+    @override
+    def pop_order(self, order_id: int) -> Order:
+        with self._lock:
+            if _HAS_RETURNING:
+                # 必须取完结果, 语句才会执行完毕并提交
+                rows = self._db.execute(
+                    f"DELETE FROM orders WHERE id = ? RETURNING {_ORDER_COLUMNS}", (order_id,)
+                ).fetchall()
+                row = rows[0] if rows else None
+            else:
+                row = self._db.execute(
+                    f"SELECT {_ORDER_COLUMNS} FROM orders WHERE id = ?", (order_id,)
+                ).fetchone()
+                self._db.execute("DELETE FROM orders WHERE id = ?", (order_id,))
+            if row is not None:
+                self._id_allocator.release(order_id)
+        if row is None:
+            raise KeyError(order_id)
+        return self.__row2order(row)
+
+
+__all__ = ["SqliteOrderStorage"]
@@ -1,9 +1,13 @@
-from typing import TYPE_CHECKING
+import os
+from typing import Callable, TYPE_CHECKING
 
-from mcdreforged import InfoCommandSource, RAction, RColor, RText, RTextList
+from mcdreforged import CommandSource, InfoCommandSource, RAction, RColor, RText, RTextBase, RTextList
 
-from mcdrpost.constants import END_LINE
-from mcdrpost.utils.translation import TranslationKeys
+from mcdrpost.constants import END_LINE, STATS_FILE_NAME
+from mcdrpost.data_structure import Order
+from mcdrpost.storage.order_query import OrderQuery
+from mcdrpost.utils.metrics import metrics
+from mcdrpost.utils.translation import TranslationKeyItem, TranslationKeys
 
 if TYPE_CHECKING:
     from mcdrpost.manager.command_manager import CommandManager
@@ -12,6 +16,7 @@ if TYPE_CHECKING:
 
 class CommandHelper:
     def __init__(self, cmd_manager: "CommandManager"):
+        self._cmd_manager = cmd_manager
         self._data_manager: "DataManager" = cmd_manager.data_manager
 
     # helper methods
@@ -23,7 +28,7 @@ class CommandHelper:
         if source.has_permission(2):
             # helper以上权限的添加信息
             msgs_on_helper = RTextList(
-                RText(prefix + " list orders", RColor.gray)
+                RText(prefix + TranslationKeys.help_usage_list_orders.tr(), RColor.gray)
                 .c(RAction.suggest_command, f"{prefix} list orders")
                 .h(TranslationKeys.hover.rtr()),
                 RText(TranslationKeys.help_info_list_orders.tr() + END_LINE),
@@ -31,6 +36,11 @@ class CommandHelper:
         if source.has_permission(3):
             # admin以上权限的添加信息
             msgs_on_admin = RTextList(
+                RText(prefix + TranslationKeys.help_usage_broadcast.tr(), RColor.gray)
+                .c(RAction.suggest_command, f"{prefix} broadcast ")
+                .h(TranslationKeys.hover.rtr()),
+                RText(f"{TranslationKeys.help_info_broadcast.tr()}\n"),
+
                 RText(prefix + TranslationKeys.help_usage_player_add.tr(), RColor.gray)
                 .c(RAction.suggest_command, f"{prefix} player add ")
                 .h(TranslationKeys.hover.rtr()),
@@ -40,6 +50,11 @@ class CommandHelper:
                 .c(RAction.suggest_command, f"{prefix} player remove ")
                 .h(TranslationKeys.hover.rtr()),
                 RText(f"{TranslationKeys.help_info_player_remove.tr()}\n"),
+
+                RText(prefix + TranslationKeys.help_usage_stats.tr(), RColor.gray)
+                .c(RAction.suggest_command, f"{prefix} stats")
+                .h(TranslationKeys.hover.rtr()),
+                RText(f"{TranslationKeys.help_info_stats.tr()}\n"),
             )
 
         source.reply(
@@ -68,6 +83,11 @@ class CommandHelper:
                 .h(TranslationKeys.hover.rtr()),
                 RText(f"{TranslationKeys.help_info_receive.tr()}\n"),
 
+                RText(prefix + TranslationKeys.help_usage_receive_bulk.tr(), RColor.gray)
+                .c(RAction.suggest_command, f"{prefix} receive all")
+                .h(TranslationKeys.hover.rtr()),
+                RText(f"{TranslationKeys.help_info_receive_bulk.tr()}\n"),
+
                 RText(prefix + " pl", RColor.gray)
                 .c(RAction.suggest_command, f"{prefix} post_list")
                 .h(TranslationKeys.hover.rtr()),
@@ -78,6 +98,11 @@ class CommandHelper:
                 .h(TranslationKeys.hover.rtr()),
                 RText(f"{TranslationKeys.help_info_cancel.tr()}\n"),
 
+                RText(prefix + TranslationKeys.help_usage_cancel_bulk.tr(), RColor.gray)
+                .c(RAction.suggest_command, f"{prefix} cancel all")
+                .h(TranslationKeys.hover.rtr()),
+                RText(f"{TranslationKeys.help_info_cancel_bulk.tr()}\n"),
+
                 RText(prefix + " ls players", RColor.gray)
                 .c(RAction.suggest_command, f"{prefix} list players")
                 .h(TranslationKeys.hover.rtr()),
@@ -94,78 +119,132 @@ class CommandHelper:
             )
         )
 
-    def output_post_list(self, src: InfoCommandSource) -> None:
-        """辅助函数：输出玩家发送的订单列表"""
-        post_list = self._data_manager.get_orders_by_sender(src.get_info().player)
-
-        if not post_list:
-            src.reply(TranslationKeys.list_post_none.rtr())
-            return
-
-        msg = ""
-
-        for order in post_list:
-            msg += (
-                f"{order.id}  | {order.receiver}  | {order.time}  | {order.comment}\n"
-            )
+    def output_stats(self, src: CommandSource) -> None:
+        """辅助函数：输出订单数据的大小和各项指标, 耗时以毫秒显示"""
+        lines = [RText(TranslationKeys.stats_title.tr(), RColor.aqua)]
+        data = self._data_manager.stats()
+        lines.append(RText(" | ".join(f"{name}: {value}" for name, value in data.items())))
+        for name, value in metrics.snapshot().items():
+            if isinstance(value, dict):
+                if not value["count"]:
+                    continue
+                value = (
+                    f"n={value['count']} p50={value['p50'] * 1000:.1f}ms "
+                    f"p99={value['p99'] * 1000:.1f}ms max={value['max'] * 1000:.1f}ms"
+                )
+            lines.append(RText(f"{name}: ", RColor.gray) + RText(str(value)))
+        if not metrics.timing:
+            lines.append(RText(TranslationKeys.stats_timing_disabled.tr(), RColor.gray))
+        src.reply(RTextBase.join(END_LINE, lines))
+
+    def dump_stats(self, src: CommandSource) -> None:
+        """辅助函数：把订单数据的大小和各项指标写入数据文件夹中的 ``stats.json``"""
+        path = os.path.join(self._cmd_manager.coo.server.get_data_folder(), STATS_FILE_NAME)
+        metrics.dump(path, {"data": self._data_manager.stats()})
+        src.reply(TranslationKeys.stats_dumped.rtr(path))
+
+    def output_post_list(self, src: InfoCommandSource, page: int = 1, filters: str = "") -> None:
+        """辅助函数：分页输出玩家发送的订单列表"""
+        self.__output_page(
+            src,
+            "list post",
+            filters,
+            page,
+            lambda query: query._replace(sender=src.get_info().player),
+            lambda order: f"{order.id}  | {order.receiver}  | {order.time}  | {order.comment}",
+            TranslationKeys.list_post_title,
+            TranslationKeys.list_post_none,
+            TranslationKeys.list_post_cancel_tip,
+        )
 
-        src.reply(
-            "===========================================\n"
-            "{0}\n"
-            "{1}"
-            "-------------------------------------------\n"
-            "{2}"
-            "===========================================\n".format(
-                TranslationKeys.list_post_title.tr(),
-                msg,
-                TranslationKeys.list_post_cancel_tip.tr(),
-            )
+    def output_receive_list(self, src: InfoCommandSource, page: int = 1, filters: str = "") -> None:
+        """辅助函数：分页输出玩家待接收的邮件列表"""
+        self.__output_page(
+            src,
+            "list receive",
+            filters,
+            page,
+            lambda query: query._replace(receiver=src.get_info().player),
+            lambda order: f"{order.id}  | {order.sender}  | {order.time}  | {order.comment}",
+            TranslationKeys.list_receive_title,
+            TranslationKeys.list_receive_none,
+            TranslationKeys.list_receive_tip,
         )
 
-    def output_receive_list(self, src: InfoCommandSource) -> None:
-        """辅助函数：输出玩家待接收的邮件列表"""
-        receive_list = self._data_manager.get_orders_by_receiver(src.get_info().player)
+    def output_all_orders(self, src: InfoCommandSource, page: int = 1, filters: str = "") -> None:
+        """辅助函数：分页输出所有订单列表"""
+        self.__output_page(
+            src,
+            "list orders",
+            filters,
+            page,
+            lambda query: query,
+            lambda order: f"{order.id}  | {order.sender}  | {order.receiver}  | {order.time}  | {order.comment}",
+            TranslationKeys.list_all_title,
+            TranslationKeys.list_all_none,
+        )
 
-        if not receive_list:
-            src.reply(TranslationKeys.list_receive_none.rtr())
+    def __output_page(
+            self,
+            src: InfoCommandSource,
+            command: str,
+            filters: str,
+            page: int,
+            restrict: Callable[[OrderQuery], OrderQuery],
+            format_order: Callable[[Order], str],
+            title: TranslationKeyItem,
+            none: TranslationKeyItem,
+            tip: TranslationKeyItem | None = None,
+    ) -> None:
+        """输出列表的一页, 只会读取这一页的订单
+
+        Args:
+            src (InfoCommandSource): 命令源
+            command (str): 列表命令 (不含前缀), 用于生成翻页按钮
+            filters (str): 玩家输入的筛选条件, 见 :meth:`OrderQuery.parse`
+            page (int): 页码
+            restrict (Callable[[OrderQuery], OrderQuery]): 在筛选条件上附加的限制, 如只列出自己的订单
+            format_order (Callable[[Order], str]): 订单的显示格式
+            title (TranslationKeyItem): 列表标题
+            none (TranslationKeyItem): 没有订单时的提示
+            tip (TranslationKeyItem | None): 列表下方的提示
+        """
+        try:
+            query = restrict(OrderQuery.parse(filters))
+        except ValueError as e:
+            src.reply(TranslationKeys.list_fail_invalid_filter.rtr(str(e)))
             return
 
-        msg = ""
+        result = self._data_manager.get_order_page(query, page, self._cmd_manager.coo.config.list_page_size)
+        if not result.total:
+            src.reply(none.rtr())
+            return
 
-        for order in receive_list:
-            msg += f"{order.id}  | {order.sender}  | {order.time}  | {order.comment}\n"
+        command = f"{self._cmd_manager.prefixes[0]} {command}"
+        filters = " ".join(filters.split())
 
-        src.reply(
-            "===========================================\n"
-            "{0}\n"
-            "{1}\n"
-            "-------------------------------------------\n"
-            "{2}"
-            "===========================================\n".format(
-                TranslationKeys.list_receive_title.tr(),
-                msg,
-                TranslationKeys.list_receive_tip.tr(),
+        def page_button(text: TranslationKeyItem, target: int) -> RText:
+            return (
+                RText(text.tr())
+                .c(RAction.run_command, f"{command} {target} {filters}".rstrip())
+                .h(TranslationKeys.list_page_hover.rtr())
             )
-        )
-
-    def output_all_orders(self, src: InfoCommandSource) -> None:
-        """辅助函数：输出所有订单列表"""
-        all_orders = self._data_manager.get_orders()
-
-        if not all_orders:
-            src.reply(TranslationKeys.list_all_none.rtr())
-            return
-
-        msg = ""
 
-        for order in all_orders:
-            msg += f"{order.id}  | {order.sender}  | {order.receiver}  | {order.time}  | {order.comment}\n"
+        navigation = []
+        if result.page > 1:
+            navigation += [page_button(TranslationKeys.list_page_prev, result.page - 1), " "]
+        navigation.append(RText(TranslationKeys.list_page_info.tr(result.page, result.pages, result.total), RColor.gray))
+        if result.page < result.pages:
+            navigation += [" ", page_button(TranslationKeys.list_page_next, result.page + 1)]
 
         src.reply(
-            "===========================================\n"
-            "{0}\n"
-            "{1}\n"
-            "===========================================\n".format(
-                TranslationKeys.list_all_title.tr(), msg
+            RTextList(
+                "===========================================\n",
+                title.tr() + END_LINE,
+                "".join(format_order(order) + END_LINE for order in result.orders),
+                "-------------------------------------------\n",
+                tip.tr() + END_LINE if tip is not None else "",
+                *navigation,
+                "\n===========================================",
             )
         )
@@ -1,7 +1,9 @@
-from typing import TYPE_CHECKING, cast
+from typing import Literal, TYPE_CHECKING, cast
 
 from mcdreforged import CommandContext, CommandSource, PlayerCommandSource
 
+from mcdrpost.configuration import RateLimitConfig
+from mcdrpost.utils.rate_limiter import RateLimiter
 from mcdrpost.utils.translation import TranslationKeys
 
 if TYPE_CHECKING:
@@ -16,24 +18,114 @@ class CommandPreHandler:
         self._post_manager: "PostManager" = coo.post_manager
         self._data_manager: "DataManager" = coo.data_manager
 
+        # 按玩家限制寄件和收件的频率, 见 configure_rate_limit()
+        self._rate_limit_enabled = False
+        self._rate_limiters: dict[str, RateLimiter] = {
+            "post": RateLimiter("post", 1, 1),
+            "receive": RateLimiter("receive", 1, 1),
+        }
+
+    def configure_rate_limit(self, config: RateLimitConfig) -> None:
+        """按配置设置频率限制, 在插件加载和重新加载配置时调用"""
+        self._rate_limit_enabled = config.enabled
+        self._rate_limiters["post"].configure(config.post.rate, config.post.burst)
+        self._rate_limiters["receive"].configure(config.receive.rate, config.receive.burst)
+
+    def __rate_limited(self, src: CommandSource, kind: Literal["post", "receive"]) -> bool:
+        """玩家是否执行得太频繁, 是的话回复玩家"""
+        if not self._rate_limit_enabled:
+            return False
+        wait = self._rate_limiters[kind].acquire(cast(PlayerCommandSource, src).player)
+        if not wait:
+            return False
+        src.reply(TranslationKeys.rate_limited.rtr(f"{wait:.1f}"))
+        return True
+
     def post(self, src: CommandSource, ctx: CommandContext):
-        self._post_manager.post(
-            cast(PlayerCommandSource, src), ctx["receiver"], ctx.get("comment")
-        )
+        if self.__rate_limited(src, "post"):
+            return
+        src = cast(PlayerCommandSource, src)
+        self._post_manager.submit(src, self._post_manager.post, src, ctx["receiver"], ctx.get("comment"))
 
     def receive(self, src: CommandSource, ctx: CommandContext):
-        order_id = ctx["orderid"]
-        if self._post_manager.receive(
-                cast(PlayerCommandSource, src), order_id, "receive"
-        ):
-            src.reply(TranslationKeys.receive_success.tr(order_id))
+        if self.__rate_limited(src, "receive"):
+            return
+        src = cast(PlayerCommandSource, src)
+        self._post_manager.submit(src, self.__receive, src, ctx["orderid"], "receive")
 
     def cancel(self, src: CommandSource, ctx: CommandContext):
-        order_id = ctx["orderid"]
-        if self._post_manager.receive(
-                cast(PlayerCommandSource, src), order_id, "cancel"
-        ):
-            src.reply(TranslationKeys.cancel_success.tr(order_id))
+        if self.__rate_limited(src, "receive"):
+            return
+        src = cast(PlayerCommandSource, src)
+        self._post_manager.submit(src, self.__receive, src, ctx["orderid"], "cancel")
+
+    def __receive(self, src: PlayerCommandSource, order_id: int, typ: Literal["cancel", "receive"]) -> None:
+        if self._post_manager.receive(src, order_id, typ):
+            success = TranslationKeys.receive_success if typ == "receive" else TranslationKeys.cancel_success
+            src.reply(success.tr(order_id))
+
+    def receive_all(self, src: CommandSource, _ctx: CommandContext):
+        if self.__rate_limited(src, "receive"):
+            return
+        self.__receive_many(src, "receive")
+
+    def receive_range(self, src: CommandSource, ctx: CommandContext):
+        if self.__rate_limited(src, "receive"):
+            return
+        self.__receive_many(src, "receive", (ctx["orderid"], ctx["to_orderid"]))
+
+    def receive_from(self, src: CommandSource, ctx: CommandContext):
+        if self.__rate_limited(src, "receive"):
+            return
+        self.__receive_many(src, "receive", None, ctx["player"])
+
+    def cancel_all(self, src: CommandSource, _ctx: CommandContext):
+        if self.__rate_limited(src, "receive"):
+            return
+        self.__receive_many(src, "cancel")
+
+    def cancel_range(self, src: CommandSource, ctx: CommandContext):
+        if self.__rate_limited(src, "receive"):
+            return
+        self.__receive_many(src, "cancel", (ctx["orderid"], ctx["to_orderid"]))
+
+    def cancel_to(self, src: CommandSource, ctx: CommandContext):
+        if self.__rate_limited(src, "receive"):
+            return
+        self.__receive_many(src, "cancel", None, ctx["player"])
+
+    def __receive_many(
+            self,
+            src: CommandSource,
+            typ: Literal["cancel", "receive"],
+            id_range: tuple[int, int] | None = None,
+            counterpart: str | None = None,
+    ) -> None:
+        src = cast(PlayerCommandSource, src)
+        self._post_manager.submit(src, self._post_manager.receive_many, src, typ, id_range, counterpart)
+
+    def broadcast(self, src: CommandSource, ctx: CommandContext):
+        if self.__rate_limited(src, "post"):
+            return
+        src = cast(PlayerCommandSource, src)
+        self._post_manager.submit(
+            src, self._post_manager.post_many, src, self.__parse_receivers(ctx), ctx.get("comment")
+        )
+
+    def broadcast_split(self, src: CommandSource, ctx: CommandContext):
+        if self.__rate_limited(src, "post"):
+            return
+        src = cast(PlayerCommandSource, src)
+        self._post_manager.submit(
+            src, self._post_manager.post_many, src, self.__parse_receivers(ctx), ctx.get("comment"), True
+        )
+
+    @staticmethod
+    def __parse_receivers(ctx: CommandContext) -> list[str] | None:
+        """``a,b,c`` 形式的收件人列表, 使用 ``all`` 时为 None"""
+        if "receivers" not in ctx:
+            return None
+        return [player for player in ctx["receivers"].split(",") if player]
 
     def add_player(self, src: CommandSource, ctx: CommandContext):
         player = ctx["player_id"]
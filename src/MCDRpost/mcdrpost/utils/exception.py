@@ -20,3 +20,19 @@ class InvalidPermission(InvalidConfig):
 
 class InvalidPrefix(InvalidConfig):
     pass
+
+
+class QueryError(RuntimeError):
+    """向服务端查询数据失败"""
+
+
+class QueryRejected(QueryError):
+    """等待执行的查询太多, 查询被拒绝"""
+
+
+class QueryTimeout(QueryError):
+    """查询超时"""
+
+
+class TaskRejected(RuntimeError):
+    """等待执行的命令太多, 命令被拒绝"""
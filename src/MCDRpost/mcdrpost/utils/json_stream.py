@@ -0,0 +1,203 @@
+"""``orders.json`` 的流式读写
+
+读取时按块读入文件, 每次只解析一个订单; 写入时逐个序列化订单并写入临时文件, 完成后原子地替换原文件.
+这样无论订单文件有多大, 都不需要同时在内存中保存整个文件的文本和它的解析结果
+
+写入的格式与 ``json.dump(data, f, indent=4, ensure_ascii=False)`` (也就是 MCDR 的 ``save_config_simple``) 完全相同
+
+这个模块只依赖标准库, 升级脚本 (MCDRpost-migration) 也会使用它
+"""
+
+import json
+import os
+from typing import Any, Iterable, Iterator, TextIO
+
+_WHITESPACE = " \t\n\r"
+_NUMBER_CHARS = "0123456789+-.eE"
+_decoder = json.JSONDecoder()
+
+
+class JsonStreamReader:
+    """JSON 的增量读取器
+
+    用 :meth:`iter_object` / :meth:`iter_array` 逐个进入容器的成员,
+    用 :meth:`read_value` 完整读取一个值 (或者跳过不需要的值)
+    """
+
+    def __init__(self, fp: TextIO, chunk_size: int = 64 * 1024) -> None:
+        self._fp = fp
+        self._chunk_size = chunk_size
+        self._buffer = ""
+        self._pos = 0
+        self._consumed = 0
+        self._eof = False
+
+    @property
+    def offset(self) -> int:
+        """当前读取到的位置 (字符数)"""
+        return self._consumed + self._pos
+
+    def __fill(self) -> bool:
+        """读入下一块内容, 文件已经读完时返回 False"""
+        if self._eof:
+            return False
+        chunk = self._fp.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        # 丢弃已经解析过的内容
+        self._consumed += self._pos
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def __peek(self) -> str:
+        """跳过空白并返回下一个字符, 文件结束时返回空字符串"""
+        while True:
+            buffer, pos = self._buffer, self._pos
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos < len(buffer):
+                return buffer[pos]
+            if not self.__fill():
+                return ""
+
+    def __expect(self, *chars: str) -> str:
+        char = self.__peek()
+        if char == "" or char not in chars:
+            raise ValueError(f"Expecting {' or '.join(map(repr, chars))} at {self.offset}, found {char!r}")
+        self._pos += 1
+        return char
+
+    def read_value(self) -> Any:
+        """读取一个完整的 JSON 值"""
+        self.__peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self.__fill():
+                    continue
+                raise
+            if (end == len(self._buffer) or self._buffer[end] in _NUMBER_CHARS) and self.__fill():
+                # 数字可能刚好被截断在块的边界上 (如 "44" + "4.5"), 读入更多内容后重新解析
+                continue
+            self._pos = end
+            return value
+
+    def iter_object(self) -> Iterator[str]:
+        """逐个读取对象的键
+
+        每次迭代之后, 调用者都需要读取 (或者跳过) 这个键对应的值, 然后才能继续迭代
+        """
+        self.__expect("{")
+        if self.__peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self.read_value()
+            if not isinstance(key, str):
+                raise ValueError(f"Expecting property name at {self.offset}")
+            self.__expect(":")
+            yield key
+            if self.__expect(",", "}") == "}":
+                return
+
+    def iter_array(self) -> Iterator[int]:
+        """逐个进入数组的元素, 产生元素的下标, 使用方法同 :meth:`iter_object`"""
+        self.__expect("[")
+        if self.__peek() == "]":
+            self._pos += 1
+            return
+        index = 0
+        while True:
+            yield index
+            index += 1
+            if self.__expect(",", "]") == "]":
+                return
+
+    def finish(self) -> None:
+        """检查文件剩余的部分只有空白"""
+        char = self.__peek()
+        if char:
+            raise ValueError(f"Extra data at {self.offset}: {char!r}")
+
+
+class OrderDataReader:
+    """逐个读取 ``{"players": [...], "orders": {...}}`` 格式的订单数据
+
+    Examples:
+        >>> with open("orders.json", encoding="utf-8") as f:
+        ...     reader = OrderDataReader(f)
+        ...     for key, order in reader.iter_orders():
+        ...         ...
+        ...     players = reader.players  # 遍历完成之后才可用
+    """
+
+    def __init__(self, fp: TextIO, chunk_size: int = 64 * 1024) -> None:
+        self._reader = JsonStreamReader(fp, chunk_size)
+        self.players: list[str] = []
+
+    def iter_orders(self) -> Iterator[tuple[str, Any]]:
+        """逐个读取订单, 产生 (键, 原始数据), 未知的字段会被跳过"""
+        for key in self._reader.iter_object():
+            if key == "orders":
+                for order_key in self._reader.iter_object():
+                    yield order_key, self._reader.read_value()
+            elif key == "players":
+                self.players = self._reader.read_value()
+            else:
+                self._reader.read_value()
+        self._reader.finish()
+
+
+def _dumps(value: Any, indent: int, level: int) -> str:
+    """序列化为 ``level`` 层缩进下的文本, 与 ``json.dump`` 嵌套时的输出相同"""
+    text = json.dumps(value, indent=indent, ensure_ascii=False)
+    return text.replace("\n", "\n" + " " * (indent * level))
+
+
+def write_order_data(
+        path: str,
+        players: Iterable[str],
+        orders: Iterable[tuple[str, Any]],
+        *,
+        indent: int = 4,
+        fsync: bool = True,
+) -> None:
+    """把订单数据写入 ``path``
+
+    数据会先写入 ``<path>.tmp``, 全部写完之后再替换原文件, 写到一半崩溃不会损坏原来的订单文件
+
+    Args:
+        path (str): 订单文件路径
+        players (Iterable[str]): 已注册玩家
+        orders (Iterable[tuple[str, Any]]): (键, 序列化后的订单), 只会遍历一次
+        indent (int): 缩进的空格数
+        fsync (bool): 替换之前是否强制把临时文件落盘
+    """
+    tmp_path = path + ".tmp"
+    pad1 = "\n" + " " * indent
+    pad2 = "\n" + " " * (indent * 2)
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("{" + pad1 + '"players": ' + _dumps(list(players), indent, 1) + "," + pad1 + '"orders": {')
+            first = True
+            for key, order in orders:
+                f.write(("" if first else ",") + pad2 + json.dumps(key, ensure_ascii=False) + ": ")
+                f.write(_dumps(order, indent, 2))
+                first = False
+            f.write("}" if first else pad1 + "}")
+            f.write("\n}")
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.isfile(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+__all__ = ["JsonStreamReader", "OrderDataReader", "write_order_data"]
@@ -0,0 +1,101 @@
+"""按键分组依次执行任务的执行器
+
+寄件和收件等命令在这里执行, 而不是在 MCDR 的任务执行线程中等待查询结果, 这样一个慢的查询不会阻塞其他插件的命令.
+执行器有多条通道, 每条通道是一个线程; 相同键 (玩家名) 的任务总是进入同一条通道, 所以同一个玩家的命令按提交的顺序依次执行,
+不同玩家的命令可以并行执行
+
+指标 (见 :mod:`mcdrpost.utils.metrics`):
+
+- ``pipeline.queue_depth``: 已提交但还没有开始执行的任务数量
+- ``pipeline.submitted`` ``pipeline.rejected`` ``pipeline.failed``: 提交、拒绝和失败的任务数量
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from mcdrpost.utils.exception import TaskRejected
+from mcdrpost.utils.metrics import MetricsRegistry, metrics as global_metrics
+
+_T = TypeVar("_T")
+
+
+class KeyedExecutor:
+    """按键分组依次执行任务的执行器
+
+    Attributes:
+        queue_size (int): 最多有多少个任务在等待执行, 超过时新的任务会被拒绝
+    """
+
+    def __init__(self, workers: int, queue_size: int, registry: MetricsRegistry = global_metrics) -> None:
+        self.queue_size = queue_size
+        self._lanes = [
+            ThreadPoolExecutor(1, thread_name_prefix=f"MCDRpost-pipeline-{i}") for i in range(workers)
+        ]
+        self._lock = threading.Lock()
+        self._pending = 0
+
+        self._queue_depth = registry.gauge("pipeline.queue_depth")
+        self._submitted = registry.counter("pipeline.submitted")
+        self._rejected = registry.counter("pipeline.rejected")
+        self._failed = registry.counter("pipeline.failed")
+
+    @property
+    def queue_depth(self) -> int:
+        """已提交但还没有开始执行的任务数量"""
+        return self._pending
+
+    def __release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+            self._queue_depth.dec()
+
+    def submit(self, key: str, func: Callable[..., _T], *args) -> "Future[_T]":
+        """提交一个任务, 与之前提交的相同 ``key`` 的任务全部完成之后才会执行
+
+        Raises:
+            TaskRejected: 等待执行的任务已经达到上限, 或者执行器已经关闭
+        """
+        with self._lock:
+            if self._pending >= self.queue_size:
+                self._rejected.inc()
+                raise TaskRejected(f"Too many pending tasks ({self._pending})")
+            self._pending += 1
+            self._queue_depth.inc()
+
+        def run() -> _T:
+            self.__release()
+            try:
+                return func(*args)
+            except BaseException:
+                self._failed.inc()
+                raise
+
+        lane = self._lanes[hash(key) % len(self._lanes)]
+        try:
+            future = lane.submit(run)
+        except RuntimeError as e:
+            # 执行器已经关闭
+            self.__release()
+            self._rejected.inc()
+            raise TaskRejected(str(e)) from e
+        self._submitted.inc()
+        return future
+
+    def shutdown(self, wait: bool = True) -> None:
+        """关闭执行器, 不再接受新的任务, 还没有开始执行的任务会被取消
+
+        Args:
+            wait (bool): 是否等待正在执行的任务完成
+        """
+        for lane in self._lanes:
+            lane.shutdown(wait=False, cancel_futures=True)
+        if wait:
+            for lane in self._lanes:
+                lane.shutdown(wait=True)
+        with self._lock:
+            self._queue_depth.dec(self._pending)
+            self._pending = 0
+
+
+__all__ = ["KeyedExecutor"]
@@ -0,0 +1,237 @@
+"""插件运行时的指标
+
+指标按名称保存在全局的 :data:`metrics` 中, 用 ``.`` 分隔模块和指标名, 如 ``query.queue_depth``
+
+耗时记录在直方图中, 用 :meth:`MetricsRegistry.span` 包住要计时的代码即可.
+关闭计时 (:attr:`MetricsRegistry.timing`) 后 ``span`` 返回一个共享的空上下文管理器, 不会读取时钟
+
+Examples:
+    >>> from mcdrpost.utils.metrics import metrics
+    >>> metrics.counter("query.rejected").inc()
+    >>> metrics.snapshot()["query.rejected"]
+    1
+    >>> with metrics.span("stage.query"):
+    ...     pass
+"""
+
+import bisect
+import contextlib
+import json
+import threading
+import time
+from typing import Any, ContextManager, Iterable
+
+
+class Counter:
+    """只增不减的计数器"""
+
+    __slots__ = ("_value", "_lock")
+
+    def __init__(self) -> None:
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._value = 0
+
+
+class Gauge:
+    """可以任意增减的当前值, 如队列长度"""
+
+    __slots__ = ("_value", "_lock")
+
+    def __init__(self) -> None:
+        self._value: float = 0
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self._value = value
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value -= amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def reset(self) -> None:
+        self.set(0)
+
+
+LATENCY_BUCKETS: tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+"""耗时直方图默认的桶上界, 单位为秒"""
+
+
+class Histogram:
+    """固定桶的直方图, 用于记录耗时
+
+    每个桶记录不超过其上界的观测值的数量, 最后一个桶记录超过所有上界的值. 分位数按桶的上界估计
+
+    Attributes:
+        bounds (tuple[float, ...]): 桶的上界, 从小到大
+    """
+
+    __slots__ = ("bounds", "_counts", "_sum", "_max", "_lock")
+
+    def __init__(self, bounds: Iterable[float] = LATENCY_BUCKETS) -> None:
+        self.bounds = tuple(bounds)
+        self._counts = [0] * (len(self.bounds) + 1)
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            if value > self._max:
+                self._max = value
+
+    @property
+    def count(self) -> int:
+        return sum(self._counts)
+
+    def quantile(self, q: float) -> float:
+        """估计 ``q`` 分位数 (0 到 1), 没有观测值时返回 0"""
+        with self._lock:
+            counts = list(self._counts)
+            maximum = self._max
+        total = sum(counts)
+        if not total:
+            return 0
+        rank = q * total
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if seen >= rank and count:
+                return min(self.bounds[index], maximum) if index < len(self.bounds) else maximum
+        return maximum
+
+    @property
+    def value(self) -> dict[str, Any]:
+        """汇总: 数量, 总和, 最大值, p50, p99 和各个桶的数量"""
+        with self._lock:
+            counts = list(self._counts)
+            total, maximum = self._sum, self._max
+        return {
+            "count": sum(counts),
+            "sum": total,
+            "max": maximum,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+            "buckets": dict(zip([*map(str, self.bounds), "+inf"], counts)),
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts = [0] * (len(self.bounds) + 1)
+            self._sum = self._max = 0.0
+
+
+class _Span:
+    """把 ``with`` 语句的耗时记录到直方图中"""
+
+    __slots__ = ("_histogram", "_start")
+
+    def __init__(self, histogram: Histogram) -> None:
+        self._histogram = histogram
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self._histogram.observe(time.perf_counter() - self._start)
+
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class MetricsRegistry:
+    """按名称保存指标, 同一个名称总是返回同一个指标对象
+
+    Attributes:
+        timing (bool): 是否记录 :meth:`span` 的耗时
+    """
+
+    def __init__(self) -> None:
+        self.timing = True
+        self._lock = threading.Lock()
+        self._metrics: dict[str, Counter | Gauge | Histogram] = {}
+
+    def __get(self, name: str, kind: type[Counter] | type[Gauge] | type[Histogram]) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = kind()
+            elif not isinstance(metric, kind):
+                raise TypeError(f"Metric {name} is a {type(metric).__name__}, not a {kind.__name__}")
+            return metric
+
+    def counter(self, name: str) -> Counter:
+        return self.__get(name, Counter)
+
+    def gauge(self, name: str) -> Gauge:
+        return self.__get(name, Gauge)
+
+    def histogram(self, name: str) -> Histogram:
+        """耗时直方图, 使用 :data:`LATENCY_BUCKETS`"""
+        return self.__get(name, Histogram)
+
+    def span(self, name: str) -> ContextManager[None]:
+        """记录 ``with`` 语句耗时的上下文管理器, 耗时以秒为单位记录在直方图 ``name`` 中
+
+        关闭 :attr:`timing` 时什么也不做
+        """
+        if not self.timing:
+            return _NULL_SPAN
+        return _Span(self.histogram(name))
+
+    def snapshot(self) -> dict[str, Any]:
+        """所有指标的当前值, 按名称排序, 直方图的值见 :attr:`Histogram.value`"""
+        with self._lock:
+            items = sorted(self._metrics.items())
+        return {name: metric.value for name, metric in items}
+
+    def dump(self, path: str, extra: dict[str, Any] | None = None) -> None:
+        """把 :meth:`snapshot` 写入 JSON 文件
+
+        Args:
+            path (str): 文件路径
+            extra (dict[str, Any] | None): 一起写入的其他数据, 如订单数量
+        """
+        data = {"time": time.time(), "metrics": self.snapshot()}
+        if extra is not None:
+            data.update(extra)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+
+    def reset(self) -> None:
+        """把所有指标归零, 指标对象本身保持不变"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+
+metrics = MetricsRegistry()
+"""插件全局的指标"""
+
+__all__ = ["Counter", "Gauge", "Histogram", "LATENCY_BUCKETS", "MetricsRegistry", "metrics"]
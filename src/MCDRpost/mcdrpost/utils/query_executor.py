@@ -0,0 +1,268 @@
+"""向服务端查询数据的执行器
+
+查询 (如获取玩家副手物品) 在固定数量的工作线程中执行, 等待执行的查询数量有上限,
+超过上限时立即拒绝 (:class:`~mcdrpost.utils.exception.QueryRejected`), 而不是无限制地创建线程或者排队.
+
+启用 RCON 时, 每个工作线程使用一条自己的持久 RCON 连接 (:class:`RconPool`),
+不同玩家的查询可以并行进行, 而不必排队等待 MCDR 唯一的 RCON 连接
+
+指标 (见 :mod:`mcdrpost.utils.metrics`):
+
+- ``query.queue_depth``: 已提交但还没有开始执行的查询数量
+- ``query.running``: 正在执行的查询数量
+- ``query.submitted`` ``query.rejected`` ``query.timeout`` ``query.failed``: 提交、拒绝、超时和失败的查询数量
+"""
+
+import math
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from logging import Logger
+from typing import Callable, TypeVar
+
+from mcdreforged.minecraft.rcon.rcon_connection import RconConnection
+
+from mcdrpost.utils.exception import QueryRejected, QueryTimeout
+from mcdrpost.utils.metrics import MetricsRegistry, metrics as global_metrics
+
+_T = TypeVar("_T")
+
+
+class RconPool:
+    """持久 RCON 连接池
+
+    连接在第一次使用时建立, 用完之后放回池中复用; 出错的连接会被丢弃, 下次使用时重新建立.
+    ``RconConnection`` 的超时时间是整数秒的类变量, 所以每个连接池使用一个自己的子类, 超时时间向上取整
+    """
+
+    def __init__(
+            self,
+            address: str,
+            port: int,
+            password: str,
+            size: int,
+            timeout: float,
+            logger: Logger | None = None,
+    ) -> None:
+        self.address = address
+        self.port = port
+        self.password = password
+        self.size = size
+        self.timeout = timeout
+        self._logger = logger
+        self._idle: queue.LifoQueue[RconConnection] = queue.LifoQueue()
+        # 控制同时存在的连接数量
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = False
+
+        timeout_sec = max(1, math.ceil(timeout))
+
+        class PooledRconConnection(RconConnection):
+            CONNECT_TIMEOUT_SEC = timeout_sec
+            READ_WRITE_TIMEOUT_SEC = timeout_sec
+
+        self._connection_class: type[RconConnection] = PooledRconConnection
+
+    def __connect(self) -> RconConnection:
+        connection = self._connection_class(self.address, self.port, self.password, logger=self._logger)
+        if not connection.connect():
+            raise ConnectionError(f"RCON authentication failed ({self.address}:{self.port})")
+        return connection
+
+    def query(self, command: str) -> str | None:
+        """使用池中的一条连接执行命令, 返回服务端的回复, 失败时返回 None
+
+        Raises:
+            QueryTimeout: 在 ``timeout`` 内没有空闲的连接
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            raise QueryTimeout(f"No idle RCON connection in {self.timeout}s")
+        connection: RconConnection | None = None
+        try:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                connection = self.__connect()
+            # 与 query_many 一样不重试: 出错的连接会被丢弃, 调用者会退回到 MCDR 的 RCON 连接
+            result = connection.send_command(command, max_retry_time=1)
+            if result is None or connection.socket is None:
+                connection.disconnect()
+                connection = None
+            return result
+        except OSError:
+            if connection is not None:
+                connection.disconnect()
+                connection = None
+            raise
+        finally:
+            if connection is not None:
+                if self._closed:
+                    connection.disconnect()
+                else:
+                    self._idle.put(connection)
+            self._slots.release()
+
+    def query_many(self, commands: list[str]) -> list[str | None]:
+        """使用同一条连接依次执行多条命令, 返回已经发送的命令的回复
+
+        连接出错时停止: 出错的命令的回复是 None, 它可能已经被服务端执行, 也可能没有;
+        之后的命令不会被发送, 所以返回的列表可能比 ``commands`` 短
+
+        Raises:
+            QueryTimeout: 在 ``timeout`` 内没有空闲的连接
+            OSError: 无法连接到服务端, 这时没有命令被发送
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            raise QueryTimeout(f"No idle RCON connection in {self.timeout}s")
+        results: list[str | None] = []
+        connection: RconConnection | None = None
+        try:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                connection = self.__connect()
+            for command in commands:
+                # 这里不重试, 重试可能会让同一条命令执行两次
+                reply = connection.send_command(command, max_retry_time=1)
+                results.append(reply)
+                if reply is None or connection.socket is None:
+                    connection.disconnect()
+                    connection = None
+                    break
+        finally:
+            if connection is not None:
+                if self._closed:
+                    connection.disconnect()
+                else:
+                    self._idle.put(connection)
+            self._slots.release()
+        return results
+
+    def close(self) -> None:
+        """断开所有空闲的连接, 正在使用的连接会在用完之后断开"""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().disconnect()
+            except queue.Empty:
+                return
+
+
+class QueryExecutor:
+    """有界的查询执行器
+
+    Args:
+        workers (int): 工作线程数量
+        queue_size (int): 最多有多少个查询在等待执行, 超过时拒绝新的查询
+        timeout (float): 等待查询结果的默认超时时间, 单位为秒
+        rcon_pool (RconPool | None): RCON 连接池, 为 None 时 :meth:`rcon_query` 不可用
+        registry (MetricsRegistry): 发布指标的位置
+    """
+
+    def __init__(
+            self,
+            workers: int,
+            queue_size: int,
+            timeout: float,
+            rcon_pool: RconPool | None = None,
+            registry: MetricsRegistry = global_metrics,
+    ) -> None:
+        self.timeout = timeout
+        self.queue_size = queue_size
+        self.rcon_pool = rcon_pool
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="MCDRpost-query")
+        self._lock = threading.Lock()
+        self._pending = 0
+
+        self._queue_depth = registry.gauge("query.queue_depth")
+        self._running = registry.gauge("query.running")
+        self._submitted = registry.counter("query.submitted")
+        self._rejected = registry.counter("query.rejected")
+        self._timeouts = registry.counter("query.timeout")
+        self._failed = registry.counter("query.failed")
+
+    @property
+    def queue_depth(self) -> int:
+        """已提交但还没有开始执行的查询数量"""
+        return self._pending
+
+    def submit(self, func: Callable[..., _T], *args) -> "Future[_T]":
+        """提交一个查询
+
+        Raises:
+            QueryRejected: 等待执行的查询已经达到上限, 或者执行器已经关闭
+        """
+        with self._lock:
+            if self._pending >= self.queue_size:
+                self._rejected.inc()
+                raise QueryRejected(f"Too many pending queries ({self._pending})")
+            self._pending += 1
+            self._queue_depth.inc()
+
+        def run() -> _T:
+            with self._lock:
+                self._pending -= 1
+                self._queue_depth.dec()
+            self._running.inc()
+            try:
+                return func(*args)
+            except BaseException:
+                self._failed.inc()
+                raise
+            finally:
+                self._running.dec()
+
+        try:
+            future = self._executor.submit(run)
+        except RuntimeError as e:
+            # 执行器已经关闭
+            with self._lock:
+                self._pending -= 1
+                self._queue_depth.dec()
+            self._rejected.inc()
+            raise QueryRejected(str(e)) from e
+        self._submitted.inc()
+        return future
+
+    def run(self, func: Callable[..., _T], *args, timeout: float | None = None) -> _T:
+        """提交一个查询并等待它的结果
+
+        Raises:
+            QueryRejected: 见 :meth:`submit`
+            QueryTimeout: 在 ``timeout`` (默认为 :attr:`timeout`) 秒内没有得到结果
+        """
+        if timeout is None:
+            timeout = self.timeout
+        future = self.submit(func, *args)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            # 还没有开始执行的查询可以直接取消, 已经在执行的只能放弃它的结果
+            if future.cancel():
+                with self._lock:
+                    self._pending -= 1
+                    self._queue_depth.dec()
+            self._timeouts.inc()
+            raise QueryTimeout(f"Query did not finish in {timeout}s") from None
+
+    def rcon_query(self, command: str, timeout: float | None = None) -> str | None:
+        """通过连接池执行 RCON 命令
+
+        Raises:
+            RuntimeError: 没有可用的连接池
+        """
+        if self.rcon_pool is None:
+            raise RuntimeError("RCON pool is not available")
+        return self.run(self.rcon_pool.query, command, timeout=timeout)
+
+    def shutdown(self) -> None:
+        """关闭执行器, 不再接受新的查询, 不会等待正在执行的查询"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            self._queue_depth.dec(self._pending)
+            self._pending = 0
+        if self.rcon_pool is not None:
+            self.rcon_pool.close()
+
+
+__all__ = ["RconPool", "QueryExecutor"]
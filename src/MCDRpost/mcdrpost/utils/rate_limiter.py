@@ -0,0 +1,83 @@
+"""按玩家限制命令频率的令牌桶
+
+每个玩家有一个最多装 ``burst`` 个令牌的桶, 令牌以每秒 ``rate`` 个的速度恢复, 每条命令消耗一个令牌.
+桶只保存令牌数和上次更新的时间, 令牌在使用时按经过的时间一次性补充, 不需要定时器
+
+指标 (见 :mod:`mcdrpost.utils.metrics`):
+
+- ``rate_limit.<名称>.rejected``: 被拒绝的命令数量
+"""
+
+import threading
+import time
+
+from mcdrpost.utils.metrics import MetricsRegistry, metrics as global_metrics
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float) -> None:
+        self.tokens = tokens
+        self.updated = updated
+
+
+class RateLimiter:
+    """按键 (玩家名) 分别计数的令牌桶
+
+    Attributes:
+        name (str): 名称, 用于指标
+        rate (float): 每秒恢复的令牌数
+        burst (float): 桶的容量, 也就是连续执行的最大次数
+    """
+
+    def __init__(self, name: str, rate: float, burst: float, registry: MetricsRegistry = global_metrics) -> None:
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._buckets: dict[str, _Bucket] = {}
+        self._rejected = registry.counter(f"rate_limit.{name}.rejected")
+
+    def configure(self, rate: float, burst: float) -> None:
+        """修改速度和容量, 已有的桶保留剩余的令牌, 超出新容量的部分在下次使用时丢弃"""
+        with self._lock:
+            self.rate = rate
+            self.burst = burst
+
+    def acquire(self, key: str, now: float | None = None) -> float:
+        """尝试消耗一个令牌
+
+        Args:
+            key (str): 玩家名
+            now (float | None): 当前时间, 默认为 ``time.monotonic()``
+
+        Returns:
+            float: 0 表示允许执行, 否则为还需要等待的秒数
+        """
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = _Bucket(self.burst, now)
+            else:
+                bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+                bucket.updated = now
+            if bucket.tokens >= 1:
+                bucket.tokens -= 1
+                return 0
+            wait = (1 - bucket.tokens) / self.rate
+        self._rejected.inc()
+        return wait
+
+    def reset(self, key: str | None = None) -> None:
+        """清空一个玩家的记录, ``key`` 为 None 时清空所有玩家"""
+        with self._lock:
+            if key is None:
+                self._buckets.clear()
+            else:
+                self._buckets.pop(key, None)
+
+
+__all__ = ["RateLimiter"]
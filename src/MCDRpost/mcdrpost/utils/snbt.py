@@ -0,0 +1,540 @@
+"""SNBT (字符串形式的 NBT) 的编码和解析
+
+物品的组件/标签在 MCDRpost 中保存为普通的 ``dict`` ``list`` ``int`` ``float`` ``str``,
+这些值按照 SNBT 默认的类型编码: ``int`` 为 ``TAG_Int``, ``float`` 为 ``TAG_Double``, ``bool`` 为 ``true``/``false``.
+需要保留其他数字类型或者数组时使用 :class:`Byte` :class:`Short` :class:`Long` :class:`Float`
+和 :class:`ByteArray` :class:`IntArray` :class:`LongArray`, 它们分别是 ``int`` ``float`` ``list`` 的子类,
+``str()`` 和 f-string 的结果与普通的值完全相同, 只有 ``repr`` 带有后缀.
+直接写入 JSON 会丢失类型, 保存订单时使用 :func:`to_json` 把它们转换为 ``{"__snbt__": "1b"}``, 读取时使用 :func:`from_json` 还原
+
+相同的组件只会编码一次, 编码结果保存在一个有上限的 LRU 缓存中 (见 :func:`dumps`).
+:func:`loads` 是对应的解析器, 带后缀的数字和数组会被解析为上面的类型
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable
+
+_UNQUOTED = re.compile(r"[0-9A-Za-z_\-.+]+")
+"""不需要加引号的键"""
+
+_ESCAPE = re.compile(r'[\\"\x00-\x1f\x7f]')
+"""需要转义的字符: 反斜杠、双引号和所有控制字符
+
+控制字符不能原样写入命令: 命令通过服务端的标准输入发送, 换行符会把一条命令拆成两条
+"""
+_CONTROL_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f"}
+"""有简写的控制字符, 编码和解析共用这张表, 其他控制字符编码为 ``\\xHH``"""
+_ESCAPED = {"\\": "\\\\", '"': '\\"', **{char: "\\" + name for name, char in _CONTROL_ESCAPES.items()}}
+
+JSON_TAG = "__snbt__"
+"""带类型的值在 JSON 中的键, 见 :func:`to_json`"""
+
+CACHE_SIZE = 256
+"""缓存的编码结果数量"""
+
+
+class Byte(int):
+    """``TAG_Byte``, 编码为 ``1b``"""
+
+    __slots__ = ()
+
+    __str__ = int.__repr__
+
+    def __repr__(self) -> str:
+        return f"{int(self)}b"
+
+
+class Short(int):
+    """``TAG_Short``, 编码为 ``1s``"""
+
+    __slots__ = ()
+
+    __str__ = int.__repr__
+
+    def __repr__(self) -> str:
+        return f"{int(self)}s"
+
+
+class Long(int):
+    """``TAG_Long``, 编码为 ``1L``"""
+
+    __slots__ = ()
+
+    __str__ = int.__repr__
+
+    def __repr__(self) -> str:
+        return f"{int(self)}L"
+
+
+class Float(float):
+    """``TAG_Float``, 编码为 ``1.0f``"""
+
+    __slots__ = ()
+
+    __str__ = float.__repr__
+
+    def __repr__(self) -> str:
+        return f"{float.__repr__(self)}f"
+
+
+class ByteArray(list):
+    """``TAG_Byte_Array``, 编码为 ``[B;1b,2b]``"""
+
+    __slots__ = ()
+
+    __str__ = list.__repr__
+
+    def __repr__(self) -> str:
+        return f"[B;{list.__repr__(self)[1:-1]}]"
+
+
+class IntArray(list):
+    """``TAG_Int_Array``, 编码为 ``[I;1,2]``"""
+
+    __slots__ = ()
+
+    __str__ = list.__repr__
+
+    def __repr__(self) -> str:
+        return f"[I;{list.__repr__(self)[1:-1]}]"
+
+
+class LongArray(list):
+    """``TAG_Long_Array``, 编码为 ``[L;1L,2L]``"""
+
+    __slots__ = ()
+
+    __str__ = list.__repr__
+
+    def __repr__(self) -> str:
+        return f"[L;{list.__repr__(self)[1:-1]}]"
+
+
+def _escape(match: re.Match) -> str:
+    char = match.group()
+    return _ESCAPED.get(char) or f"\\x{ord(char):02x}"
+
+
+def quote(text: str) -> str:
+    """加上双引号并转义, 控制字符转义为 ``\\n`` ``\\x00`` 等, 结果中不会出现换行符"""
+    return '"' + _ESCAPE.sub(_escape, text) + '"'
+
+
+def _key(key: str) -> str:
+    return key if _UNQUOTED.fullmatch(key) else quote(key)
+
+
+def _double(value: float) -> str:
+    text = float.__repr__(value)
+    if text in ("inf", "-inf", "nan"):
+        raise ValueError(f"SNBT can not represent {text}")
+    # 没有后缀的浮点数必须带有小数点, 否则 1e-05 会被当成字符串
+    if "." not in text:
+        mantissa, e, exponent = text.partition("e")
+        text = f"{mantissa}.0{e}{exponent}"
+    return text
+
+
+# 每种类型的编码函数把结果追加到 out 中, 整棵树只遍历一次, 最后只拼接一次字符串
+_Encoder = Callable[[Any, list[str]], None]
+
+
+def _encode_compound(value: dict, out: list[str]) -> None:
+    out.append("{")
+    first = True
+    for key, item in value.items():
+        if not first:
+            out.append(",")
+        first = False
+        out.append(_key(key))
+        out.append(":")
+        _encode(item, out)
+    out.append("}")
+
+
+def _encode_list(value: list, out: list[str]) -> None:
+    out.append("[")
+    first = True
+    for item in value:
+        if not first:
+            out.append(",")
+        first = False
+        _encode(item, out)
+    out.append("]")
+
+
+def _array_encoder(prefix: str, suffix: str) -> _Encoder:
+    def encode(value: list, out: list[str]) -> None:
+        out.append(prefix)
+        out.append(",".join(f"{int(item)}{suffix}" for item in value))
+        out.append("]")
+
+    return encode
+
+
+_ENCODERS: dict[type, _Encoder] = {
+    dict: _encode_compound,
+    list: _encode_list,
+    tuple: _encode_list,
+    str: lambda value, out: out.append(quote(value)),
+    bool: lambda value, out: out.append("true" if value else "false"),
+    int: lambda value, out: out.append(int.__repr__(value)),
+    float: lambda value, out: out.append(_double(value)),
+    Byte: lambda value, out: out.append(f"{int(value)}b"),
+    Short: lambda value, out: out.append(f"{int(value)}s"),
+    Long: lambda value, out: out.append(f"{int(value)}L"),
+    Float: lambda value, out: out.append(f"{_double(value)}f"),
+    ByteArray: _array_encoder("[B;", "b"),
+    IntArray: _array_encoder("[I;", ""),
+    LongArray: _array_encoder("[L;", "L"),
+}
+"""按类型查找编码函数, 未知的子类在第一次遇到时按照 MRO 加入这个表"""
+
+
+def _encode(value: Any, out: list[str]) -> None:
+    encoder = _ENCODERS.get(type(value))
+    if encoder is None:
+        encoder = _resolve(type(value))
+    encoder(value, out)
+
+
+def _resolve(cls: type) -> _Encoder:
+    for base in cls.__mro__[1:]:
+        encoder = _ENCODERS.get(base)
+        if encoder is not None:
+            _ENCODERS[cls] = encoder
+            return encoder
+    raise TypeError(f"Object of type {cls.__name__} is not SNBT serializable")
+
+
+class _Cache:
+    """编码结果的 LRU 缓存
+
+    键是值的 ``repr``: 它在 C 中完成, 比编码快得多, 并且能区分 ``1`` ``"1"`` ``True`` 和 ``Byte(1)``
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self._data: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, kind: str, value: Any, encode: Callable[[Any], str]) -> str:
+        key = f"{kind}:{value!r}"
+        with self._lock:
+            text = self._data.get(key)
+            if text is not None:
+                self._data.move_to_end(key)
+                return text
+        text = encode(value)
+        with self._lock:
+            self._data[key] = text
+            if len(self._data) > self.size:
+                self._data.popitem(last=False)
+        return text
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+_cache = _Cache(CACHE_SIZE)
+
+
+def _dumps(value: Any) -> str:
+    out: list[str] = []
+    _encode(value, out)
+    return "".join(out)
+
+
+def _dumps_components(components: dict) -> str:
+    # 1.20.5 之后的物品组件: [minecraft:a=...,minecraft:b=...], 键是命名空间 ID, 不需要引号
+    out = ["["]
+    first = True
+    for key, value in components.items():
+        if not first:
+            out.append(",")
+        first = False
+        out.append(key)
+        out.append("=")
+        _encode(value, out)
+    out.append("]")
+    return "".join(out)
+
+
+def dumps(value: Any) -> str:
+    """把值编码为 SNBT, 相同的复合标签/列表只会编码一次
+
+    Raises:
+        TypeError: 无法编码的类型
+        ValueError: 无法编码的值 (如 ``inf``)
+    """
+    if isinstance(value, (dict, list)):
+        return _cache.get("tag", value, _dumps)
+    return _dumps(value)
+
+
+def dumps_components(components: dict) -> str:
+    """把物品组件编码为 ``[键=值,...]`` 的形式 (Minecraft 1.20.5+), 结果同样会被缓存"""
+    return _cache.get("components", components, _dumps_components)
+
+
+_TYPED = (Byte, Short, Long, Float, ByteArray, IntArray, LongArray)
+
+
+def to_json(value: Any) -> Any:
+    """把值转换为写入 JSON 后不会丢失类型的形式, :func:`from_json` 是它的逆操作
+
+    带类型的值 (:class:`Byte` 和数组等) 转换为 ``{"__snbt__": "<SNBT>"}``, 其他值保持不变.
+    只复制包含带类型的值的字典和列表, 没有需要转换的值时返回 ``value`` 本身
+    """
+    if isinstance(value, _TYPED):
+        return {JSON_TAG: _dumps(value)}
+    if isinstance(value, dict):
+        result = None
+        for key, item in value.items():
+            converted = to_json(item)
+            if converted is not item:
+                if result is None:
+                    result = dict(value)
+                result[key] = converted
+        return value if result is None else result
+    if isinstance(value, list):
+        items = None
+        for index, item in enumerate(value):
+            converted = to_json(item)
+            if converted is not item:
+                if items is None:
+                    items = list(value)
+                items[index] = converted
+        return value if items is None else items
+    return value
+
+
+def from_json(value: Any) -> Any:
+    """还原 :func:`to_json` 转换的值, 与 :func:`to_json` 一样只复制需要修改的字典和列表
+
+    Raises:
+        SnbtError: ``__snbt__`` 中的 SNBT 格式错误
+    """
+    if isinstance(value, dict):
+        if len(value) == 1 and isinstance(value.get(JSON_TAG), str):
+            return loads(value[JSON_TAG])
+        result = None
+        for key, item in value.items():
+            converted = from_json(item)
+            if converted is not item:
+                if result is None:
+                    result = dict(value)
+                result[key] = converted
+        return value if result is None else result
+    if isinstance(value, list) and not isinstance(value, _TYPED):
+        items = None
+        for index, item in enumerate(value):
+            converted = from_json(item)
+            if converted is not item:
+                if items is None:
+                    items = list(value)
+                items[index] = converted
+        return value if items is None else items
+    return value
+
+
+class SnbtError(ValueError):
+    """SNBT 格式错误
+
+    Attributes:
+        pos (int): 出错的位置
+    """
+
+    def __init__(self, msg: str, text: str, pos: int) -> None:
+        super().__init__(f"{msg} at position {pos}: {text[max(pos - 20, 0):pos + 20]!r}")
+        self.pos = pos
+
+
+# 词法: 跳过空白, 然后是带引号的字符串、不带引号的词 (数字、键、true/false)、一个符号, 其他字符都是错误.
+# 旧数据中数字和后缀之间可能有空格 (如 ``3 s``), 后缀后面紧跟分隔符时也当作同一个词.
+# 使用 findall 一次切分整个文本, 不为每个词创建 Match 对象; 位置只在出错时重新计算
+_TOKEN = re.compile(
+    r"""\s*(?:
+        ("[^"\\]*(?:\\.[^"\\]*)*"|'[^'\\]*(?:\\.[^'\\]*)*')
+        |([0-9A-Za-z_\-.+]+(?:\s+[bBsSlLfFdD](?=\s*[,\]}]))?)
+        |([{}\[\],:;])
+        |(\S)
+    )""",
+    re.VERBOSE | re.DOTALL,
+)
+_NUMBER = re.compile(
+    r"""(?:
+        (?P<int>[-+]?[0-9]+)(?P<int_suffix>[bBsSlL]?)
+        |(?P<float>[-+]?(?:[0-9]+\.?|[0-9]*\.[0-9]+)(?:[eE][-+]?[0-9]+)?)(?P<float_suffix>[fFdD])
+        |(?P<double>[-+]?(?:[0-9]+\.|[0-9]*\.[0-9]+)(?:[eE][-+]?[0-9]+)?)
+    )""",
+    re.VERBOSE,
+)
+_UNESCAPE = re.compile(r"\\(u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|U[0-9a-fA-F]{8}|.)", re.DOTALL)
+_ESCAPES = {**_CONTROL_ESCAPES, "s": " "}
+_INT_TYPES: dict[str, type[int]] = {"": int, "b": Byte, "s": Short, "l": Long}
+_ARRAY_TYPES: dict[str, type[list]] = {"B": ByteArray, "I": IntArray, "L": LongArray}
+_QUOTES = frozenset("\"'")
+
+
+def _unescape(match: re.Match) -> str:
+    escape = match.group(1)
+    if len(escape) > 1:
+        return chr(int(escape[1:], 16))
+    return _ESCAPES.get(escape, escape)
+
+
+def _token_value(token: str) -> Any:
+    """带引号的字符串或者不带引号的词的值"""
+    if token[0] in _QUOTES:
+        value = token[1:-1]
+        if "\\" in value:
+            value = _UNESCAPE.sub(_unescape, value)
+        return value
+    if " " in token or "\t" in token or "\n" in token:
+        token = "".join(token.split())
+    match = _NUMBER.fullmatch(token)
+    if match is None:
+        if token == "true":
+            return True
+        if token == "false":
+            return False
+        return token
+    if match.group("int") is not None:
+        return _INT_TYPES[match.group("int_suffix").lower()](int(match.group("int")))
+    if match.group("float") is not None:
+        number = float(match.group("float"))
+        return Float(number) if match.group("float_suffix") in "fF" else number
+    return float(match.group("double"))
+
+
+class _Parser:
+    """递归下降解析器, 每个词法单元只访问一次
+
+    相同的词 (键、ID、数字) 只会转换一次, 结果在这次解析中共享
+    """
+
+    __slots__ = ("text", "tokens", "pos", "values")
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.tokens: list[str] = []
+        for string, word, punct, error in _TOKEN.findall(text):
+            if error:
+                self.pos = len(self.tokens)
+                raise self.error("Unexpected character")
+            self.tokens.append(string or word or punct)
+        self.pos = 0
+        self.values: dict[str, Any] = {}
+
+    def error(self, msg: str) -> SnbtError:
+        """第 :attr:`pos` 个词法单元处的错误"""
+        for index, match in enumerate(_TOKEN.finditer(self.text)):
+            if index == self.pos:
+                return SnbtError(msg, self.text, match.start(match.lastindex or 0))
+        return SnbtError(msg, self.text, len(self.text))
+
+    def next(self) -> str:
+        try:
+            token = self.tokens[self.pos]
+        except IndexError:
+            raise self.error("Unexpected end of input") from None
+        self.pos += 1
+        return token
+
+    def peek(self) -> str | None:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def scalar(self, token: str) -> Any:
+        try:
+            return self.values[token]
+        except KeyError:
+            value = self.values[token] = _token_value(token)
+            return value
+
+    def value(self) -> Any:
+        token = self.next()
+        if token == "{":
+            return self.compound()
+        if token == "[":
+            return self.list_or_array()
+        if len(token) == 1 and token in "}],:;":
+            self.pos -= 1
+            raise self.error("Expected a value")
+        return self.scalar(token)
+
+    def compound(self) -> dict[str, Any]:
+        result: dict[str, Any] = {}
+        if self.peek() == "}":
+            self.pos += 1
+            return result
+        while True:
+            key = self.next()
+            if len(key) == 1 and key in "{}[],:;":
+                self.pos -= 1
+                raise self.error("Expected a key")
+            if self.next() != ":":
+                self.pos -= 1
+                raise self.error("Expected ':'")
+            result[self.scalar(key) if key[0] in _QUOTES else key] = self.value()
+            token = self.next()
+            if token == "}":
+                return result
+            if token != ",":
+                self.pos -= 1
+                raise self.error("Expected ',' or '}'")
+
+    def list_or_array(self) -> list:
+        tokens = self.tokens
+        pos = self.pos
+        # [B; ...] [I; ...] [L; ...]
+        if pos + 1 < len(tokens) and tokens[pos] in _ARRAY_TYPES and tokens[pos + 1] == ";":
+            self.pos += 2
+            return self.sequence(_ARRAY_TYPES[tokens[pos]]())
+        return self.sequence([])
+
+    def sequence(self, result: list) -> list:
+        if self.peek() == "]":
+            self.pos += 1
+            return result
+        typed = type(result) is not list
+        while True:
+            item = self.value()
+            if typed:
+                if type(item) is bool or not isinstance(item, int):
+                    self.pos -= 1
+                    raise self.error("Expected an integer in array")
+                item = int(item)
+            result.append(item)
+            token = self.next()
+            if token == "]":
+                return result
+            if token != ",":
+                self.pos -= 1
+                raise self.error("Expected ',' or ']'")
+
+
+def loads(text: str) -> Any:
+    """解析 SNBT
+
+    - 复合标签为 ``dict``, 列表为 ``list``, 数组为 :class:`ByteArray` :class:`IntArray` :class:`LongArray`
+    - 没有后缀的整数为 ``int``, ``b`` ``s`` ``L`` 后缀分别为 :class:`Byte` :class:`Short` :class:`Long`
+    - 没有后缀或者 ``d`` 后缀的浮点数为 ``float``, ``f`` 后缀为 :class:`Float`
+    - ``true`` ``false`` 为 ``bool``, 其他不带引号的词为 ``str``
+
+    Raises:
+        SnbtError: 格式错误
+    """
+    parser = _Parser(text)
+    result = parser.value()
+    if parser.pos != len(parser.tokens):
+        raise parser.error("Unexpected trailing data")
+    return result
+
+__all__ = [
+    "Byte", "Short", "Long", "Float", "ByteArray", "IntArray", "LongArray",
+    "quote", "dumps", "dumps_components", "JSON_TAG", "to_json", "from_json", "SnbtError", "loads",
+]
@@ -58,9 +58,15 @@ class TranslationKeys:
     # data
     data_loaded = TranslationKeyItem("mcdrpost.data.loaded")
     data_saved = TranslationKeyItem("mcdrpost.data.saved")
+    data_save_failed = TranslationKeyItem("mcdrpost.data.save_failed")
     data_validation_failed = TranslationKeyItem("mcdrpost.data.validation_failed")
     data_auto_fix = TranslationKeyItem("mcdrpost.data.auto_fix")
     data_auto_register = TranslationKeyItem("mcdrpost.data.auto_register")
+    data_journal_replayed = TranslationKeyItem("mcdrpost.data.journal_replayed")
+    data_journal_corrupted = TranslationKeyItem("mcdrpost.data.journal_corrupted")
+    data_imported = TranslationKeyItem("mcdrpost.data.imported")
+    data_expired = TranslationKeyItem("mcdrpost.data.expired")
+    data_expire_failed = TranslationKeyItem("mcdrpost.data.expire_failed")
 
     # deprecation
     deprecation_info = TranslationKeyItem("mcdrpost.deprecation.info")
@@ -74,8 +80,13 @@ class TranslationKeys:
 
     # rcon
     rcon_not_running = TranslationKeyItem("mcdrpost.rcon_not_running")
+    rcon_pool_failed = TranslationKeyItem("mcdrpost.rcon_pool_failed")
 
     error_occurred = TranslationKeyItem("mcdrpost.error_occurred")
+    command_failed = TranslationKeyItem("mcdrpost.command_failed")
+    deliver_refused = TranslationKeyItem("mcdrpost.deliver_refused")
+    query_busy = TranslationKeyItem("mcdrpost.query_busy")
+    rate_limited = TranslationKeyItem("mcdrpost.rate_limited")
 
     # command - post
     post_default_comment = TranslationKeyItem("mcdrpost.command.post.default_comment")
@@ -92,6 +103,7 @@ class TranslationKeys:
     receive_fail_no_right = TranslationKeyItem("mcdrpost.command.receive.fail.no_right")
     receive_fail_hands_not_cleared = TranslationKeyItem("mcdrpost.command.receive.fail.hands_not_cleared")
     receive_fail_undefined_id = TranslationKeyItem("mcdrpost.command.receive.fail.undefined_id")
+    receive_bulk_success = TranslationKeyItem("mcdrpost.command.receive.bulk_success")
 
     # command - cancel
     cancel_success = TranslationKeyItem("mcdrpost.command.cancel.success")
@@ -99,6 +111,25 @@ class TranslationKeys:
     cancel_fail_no_right = TranslationKeyItem("mcdrpost.command.cancel.fail.no_right")
     cancel_fail_hands_not_cleared = TranslationKeyItem("mcdrpost.command.cancel.fail.hands_not_cleared")
     cancel_fail_undefined_id = TranslationKeyItem("mcdrpost.command.cancel.fail.undefined_id")
+    cancel_bulk_success = TranslationKeyItem("mcdrpost.command.cancel.bulk_success")
+
+    # command - bulk receive / cancel
+    bulk_fail_unsupported = TranslationKeyItem("mcdrpost.command.bulk.fail.unsupported")
+    bulk_fail_not_delivered = TranslationKeyItem("mcdrpost.command.bulk.fail.not_delivered")
+    bulk_fail_unconfirmed = TranslationKeyItem("mcdrpost.command.bulk.fail.unconfirmed")
+    bulk_unconfirmed = TranslationKeyItem("mcdrpost.command.bulk.unconfirmed")
+
+    # command - broadcast
+    broadcast_success = TranslationKeyItem("mcdrpost.command.broadcast.success")
+    broadcast_fail_no_receiver = TranslationKeyItem("mcdrpost.command.broadcast.fail.no_receiver")
+    broadcast_fail_not_enough_items = TranslationKeyItem("mcdrpost.command.broadcast.fail.not_enough_items")
+
+    # command - list pages
+    list_page_info = TranslationKeyItem("mcdrpost.command.list.page.info")
+    list_page_prev = TranslationKeyItem("mcdrpost.command.list.page.prev")
+    list_page_next = TranslationKeyItem("mcdrpost.command.list.page.next")
+    list_page_hover = TranslationKeyItem("mcdrpost.command.list.page.hover")
+    list_fail_invalid_filter = TranslationKeyItem("mcdrpost.command.list.fail.invalid_filter")
 
     # command - list all
     list_all_none = TranslationKeyItem("mcdrpost.command.list.all.none")
@@ -124,6 +155,11 @@ class TranslationKeys:
     player_fail_already_registered = TranslationKeyItem("mcdrpost.command.player.fail.already_registered")
     player_fail_unable_del = TranslationKeyItem("mcdrpost.command.player.fail.unable_del")
 
+    # command - stats
+    stats_title = TranslationKeyItem("mcdrpost.command.stats.title")
+    stats_timing_disabled = TranslationKeyItem("mcdrpost.command.stats.timing_disabled")
+    stats_dumped = TranslationKeyItem("mcdrpost.command.stats.dumped")
+
     # command - error
     error_incomplete_general = TranslationKeyItem("mcdrpost.command.error.incomplete.general")
     error_incomplete_receiver = TranslationKeyItem("mcdrpost.command.error.incomplete.receiver")
@@ -140,12 +176,21 @@ class TranslationKeys:
     help_info_receive = TranslationKeyItem("mcdrpost.command.help.info.receive")
     help_info_post_list = TranslationKeyItem("mcdrpost.command.help.info.post_list")
     help_info_cancel = TranslationKeyItem("mcdrpost.command.help.info.cancel")
+    help_info_receive_bulk = TranslationKeyItem("mcdrpost.command.help.info.receive_bulk")
+    help_info_cancel_bulk = TranslationKeyItem("mcdrpost.command.help.info.cancel_bulk")
     help_info_list_players = TranslationKeyItem("mcdrpost.command.help.info.list_players")
     help_info_list_orders = TranslationKeyItem("mcdrpost.command.help.info.list_orders")
+    help_info_stats = TranslationKeyItem("mcdrpost.command.help.info.stats")
+    help_info_broadcast = TranslationKeyItem("mcdrpost.command.help.info.broadcast")
     help_info_player_add = TranslationKeyItem("mcdrpost.command.help.info.player.add")
     help_info_player_remove = TranslationKeyItem("mcdrpost.command.help.info.player.remove")
     help_usage_post = TranslationKeyItem("mcdrpost.command.help.usage.post")
     help_usage_receive = TranslationKeyItem("mcdrpost.command.help.usage.receive")
     help_usage_cancel = TranslationKeyItem("mcdrpost.command.help.usage.cancel")
+    help_usage_receive_bulk = TranslationKeyItem("mcdrpost.command.help.usage.receive_bulk")
+    help_usage_cancel_bulk = TranslationKeyItem("mcdrpost.command.help.usage.cancel_bulk")
+    help_usage_list_orders = TranslationKeyItem("mcdrpost.command.help.usage.list_orders")
+    help_usage_broadcast = TranslationKeyItem("mcdrpost.command.help.usage.broadcast")
+    help_usage_stats = TranslationKeyItem("mcdrpost.command.help.usage.stats")
     help_usage_player_add = TranslationKeyItem("mcdrpost.command.help.usage.player.add")
     help_usage_player_remove = TranslationKeyItem("mcdrpost.command.help.usage.player.remove")
@@ -1,6 +1,6 @@
 import re
 from types import NotImplementedType
-from typing import Any, NamedTuple, TypeAlias, TypeVar, overload
+from typing import Any, NamedTuple, TypeAlias, TypeVar
 
 from mcdrpost.utils.general import TotalOrdering
 
@@ -18,6 +18,21 @@ ValidVersionTupleType: TypeAlias = (
 # TODO: transform into 3.12 generic grammar
 SemanticVersionType = TypeVar("SemanticVersionType", bound="SemanticVersion")
 
+VersionKey: TypeAlias = tuple[int, int, int, int, tuple[tuple[int, int | str], ...]]
+"""版本的比较键: ``(major, minor, patch, 是否为正式版, 预发布版本号的各部分)``
+
+预发布版本号按 ``.`` 分为多个部分, 数字部分为 ``(0, 数字)``, 其他部分为 ``(1, 字符串)``,
+所以直接比较两个键就能得到与 :meth:`SemanticVersion.__lt__` 相同的结果, 不需要再解析字符串
+"""
+
+
+def _version_key(major: int, minor: int, patch: int, pre_release: str | None) -> VersionKey:
+    if not pre_release:
+        return major, minor, patch, 1, ()
+    return major, minor, patch, 0, tuple(
+        (0, int(part)) if part.isdigit() else (1, part) for part in pre_release.split(".")
+    )
+
 
 class SimpleVersionTuple(NamedTuple):
     major: int
@@ -39,6 +54,11 @@ class SimpleVersionTuple(NamedTuple):
     def to_semantic_version(self) -> "SemanticVersion":
         return SemanticVersion(self.__version_string)
 
+    @property
+    def key(self) -> VersionKey:
+        """比较键, 见 :data:`VersionKey`"""
+        return _version_key(self.major, self.minor, self.patch, self.pre_release)
+
 
 ComparableType: TypeAlias = SemanticVersionType | SimpleVersionTuple | ValidVersionTupleType | str
 
@@ -79,86 +99,39 @@ class SemanticVersion(TotalOrdering[ComparableType]):
         self.major = int(major)
         self.minor = int(minor)
         self.patch = int(patch)
+        self.key: VersionKey = _version_key(self.major, self.minor, self.patch, self.pre_release)
+        """比较键, 见 :data:`VersionKey`"""
 
     @property
     def is_pre_release(self) -> bool:
         """是否是预发布版本"""
         return self.pre_release is not None
 
-    @overload
     @staticmethod
-    def __param_normalize(param: Any) -> NotImplementedType:
-        ...
-
-    @overload
-    @staticmethod
-    def __param_normalize(param: ComparableType) -> SemanticVersionType:  # type: ignore[type-var, misc]
-        ...
-
-    @staticmethod
-    def __param_normalize(param):
+    def __param_key(param: Any) -> VersionKey | NotImplementedType:
+        """把可以比较的值转换为比较键, 元组不会被格式化为字符串再解析"""
+        if isinstance(param, (SemanticVersion, MinecraftVersion)):
+            return param.key
+        if isinstance(param, tuple):
+            return SimpleVersionTuple(*param).key
         if isinstance(param, str):
-            return SemanticVersion(param)
-        elif isinstance(param, tuple):
-            return SimpleVersionTuple(*param).to_semantic_version()
-        elif isinstance(param, SemanticVersion):
-            return param
-        else:
-            return NotImplemented
+            return SemanticVersion(param).key
+        return NotImplemented
 
     def __eq__(self, other) -> bool:
-        other = self.__param_normalize(other)
-        if other is NotImplemented:
+        key = self.__param_key(other)
+        if key is NotImplemented:
             return False
-
-        return (self.major, self.minor, self.patch, self.pre_release) == (
-            other.major,
-            other.minor,
-            other.patch,
-            other.pre_release,
-        )
-
-    @staticmethod
-    def __compare_pre_release(pre1: str, pre2: str) -> bool:
-        """比较预发布版本号"""
-        parts1 = pre1.split(".")
-        parts2 = pre2.split(".")
-
-        for p1, p2 in zip(parts1, parts2):
-            # 尝试转换为数字比较，否则按字符串比较
-            try:
-                num1, num2 = int(p1), int(p2)
-                if num1 != num2:
-                    return num1 < num2
-            except ValueError:
-                if p1 != p2:
-                    return p1 < p2
-
-        # 如果共同部分都相同，长度短的更小
-        return len(parts1) < len(parts2)
+        return self.key == key
 
     def __lt__(self, other) -> bool:
-        n_other = self.__param_normalize(other)
-        if n_other is NotImplemented:
+        key = self.__param_key(other)
+        if key is NotImplemented:
             return NotImplemented
+        return self.key < key
 
-        if (self.major, self.minor, self.patch) < (
-                n_other.major,
-                n_other.minor,
-                n_other.patch,
-        ):
-            return True
-        elif (self.major, self.minor, self.patch) > (
-                n_other.major,
-                n_other.minor,
-                n_other.patch,
-        ):
-            return False
-        elif self.pre_release is None:
-            return False
-        elif n_other.pre_release is None:
-            return True
-        return self.__compare_pre_release(self.pre_release, n_other.pre_release)
+    def __hash__(self) -> int:
+        return hash(self.key)
 
     def __str__(self) -> str:
         return self._original_string
@@ -169,14 +142,24 @@ class SemanticVersion(TotalOrdering[ComparableType]):
 
 MinecraftVersionType = TypeVar("MinecraftVersionType", bound="MinecraftVersion")
 
+PRE_RELEASE_ORDER: dict[str, tuple[int, int | str]] = {
+    "snapshot": (0, 0),
+    "pre": (0, 1),
+    "prerelease": (0, 1),
+    "rc": (0, 2),
+}
+"""新版本命名系统中预发布类型的顺序, 在比较键中位于编号之前; 未知的类型排在这些类型之后、正式版之前"""
+
 
 class MinecraftVersion(TotalOrdering[ComparableType | MinecraftVersionType]):
     """Minecraft 版本, 主要目的是兼容新版本号系统
 
     如果是普通的 1.x 版本, 那么它相当于语义化版本号
 
-    如果是新的版本命名系统, 那么 major 会储存年份, minor 会储存版本号, 快照版本会在 patch 和 pre_release 中储存,
-    其中的 pre_release 是 str 类型并且会保留 ``snapshot``
+    如果是新的版本命名系统, 那么 major 会储存年份, minor 会储存版本号, 快照和预发布版本会在 patch 和 pre_release 中储存,
+    其中的 pre_release 是 str 类型并且会保留 ``snapshot`` ``pre`` 等类型名.
+    比较时快照和预发布版本的编号属于预发布部分 (见 :data:`PRE_RELEASE_ORDER`), 而不是补丁版本号,
+    所以 ``26.1-snapshot-3 < 26.1-pre-1 < 26.1-rc-1 < 26.1``
     """
 
     major: int
@@ -197,70 +180,82 @@ class MinecraftVersion(TotalOrdering[ComparableType | MinecraftVersionType]):
     version: SemanticVersion
     """语义化版本号"""
 
-    __NEW_VERSION_PATTERN = re.compile(r"(\d+)\.(\d+)(-snapshot-(\d+))?")
+    __NEW_VERSION_PATTERN = re.compile(r"(\d+)\.(\d+)(?:-([a-z]+)-(\d+))?")
 
     def __init__(self, original_version_str: str):
+        key: VersionKey | None = None
         try:
             self.version = SemanticVersion(original_version_str)
         except ValueError:
-            match = re.match(self.__NEW_VERSION_PATTERN, original_version_str)
+            match = self.__NEW_VERSION_PATTERN.fullmatch(original_version_str)
             if not match:
                 raise ValueError(f"Invalid version string: {original_version_str}")
 
-            (major, minor, pre_release, patch) = match.groups()
+            (major, minor, kind, number) = match.groups()
 
             self.build_metadata = None
+            # 正式版 (如 26.1) 没有快照部分
             self.version = SimpleVersionTuple(
                 int(major),
                 int(minor),
-                int(patch),
-                pre_release[1:],
+                int(number) if number is not None else 0,
+                f"{kind}-{number}" if kind is not None else "",
             ).to_semantic_version()
+            if kind is not None:
+                key = int(major), int(minor), 0, 0, (PRE_RELEASE_ORDER.get(kind, (1, kind)), (0, int(number)))
 
         self.major = self.version.major
         self.minor = self.version.minor
         self.patch = self.version.patch
         self.pre_release = self.version.pre_release
         self.build_metadata = self.version.build_metadata
+        self.key: VersionKey = self.version.key if key is None else key
+        """比较键, 见 :data:`VersionKey`"""
 
-    @overload
-    @staticmethod
-    def __param_normalize(other: ComparableType | MinecraftVersionType) -> MinecraftVersionType:
-        pass
-
-    @overload
     @staticmethod
-    def __param_normalize(other: Any) -> NotImplementedType:
-        pass
-
-    @staticmethod
-    def __param_normalize(other):
-        if isinstance(other, MinecraftVersion):
-            return other
-        if isinstance(other, SimpleVersionTuple):
-            other = other.to_semantic_version()
-        elif isinstance(other, tuple):
-            other = SimpleVersionTuple(*other).to_semantic_version()
-        if isinstance(other, SemanticVersion):
-            other = str(other)
+    def __param_key(other: Any) -> VersionKey | NotImplementedType:
+        """把可以比较的值转换为比较键, 元组不会被格式化为字符串再解析"""
+        if isinstance(other, (MinecraftVersion, SemanticVersion)):
+            return other.key
+        if isinstance(other, tuple):
+            return SimpleVersionTuple(*other).key
         if isinstance(other, str):
-            return MinecraftVersion(other)
+            return MinecraftVersion(other).key
         return NotImplemented
 
     def __eq__(self, other) -> bool:
-        other = self.__param_normalize(other)
-        if other is NotImplemented:
+        key = self.__param_key(other)
+        if key is NotImplemented:
             return False
-        return self.version == other.version
+        return self.key == key
 
     def __lt__(self, other) -> bool:
-        other = self.__param_normalize(other)
-        if other is NotImplemented:
+        key = self.__param_key(other)
+        if key is NotImplemented:
             return NotImplemented
-        return self.version < other.version
+        return self.key < key
+
+    def __hash__(self) -> int:
+        return hash(self.key)
 
     def is_pre_release(self) -> bool:
         return not self.pre_release
 
     def __repr__(self):
         return f"MinecraftVersion(major={self.major}, minor={self.minor}, patch={self.patch}, pre_release={self.pre_release}, build_metadata={self.build_metadata})"
+
+
+def version_key(version: ComparableType | MinecraftVersion) -> VersionKey:
+    """按照 :class:`MinecraftVersion` 的规则把版本转换为比较键, 见 :data:`VersionKey`
+
+    Raises:
+        ValueError: 无效的版本号字符串
+        TypeError: 不支持的类型
+    """
+    if isinstance(version, (MinecraftVersion, SemanticVersion)):
+        return version.key
+    if isinstance(version, tuple):
+        return SimpleVersionTuple(*version).key
+    if isinstance(version, str):
+        return MinecraftVersion(version).key
+    raise TypeError(f"Can not compare a version with {type(version).__name__}")
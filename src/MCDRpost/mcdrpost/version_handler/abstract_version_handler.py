@@ -7,6 +7,10 @@ from mcdrpost import constants
 from mcdrpost.constants import Commands
 from mcdrpost.data_structure import Item
 from mcdrpost.utils.exception import InvalidItem
+from mcdrpost.utils import snbt
+from mcdrpost.utils.metrics import metrics
+from mcdrpost.utils.query_executor import QueryExecutor
+from mcdrpost.version_handler.command_batch import CommandBatch, execute_command
 from mcdrpost.utils.translation import TranslationKeys
 from mcdrpost.version_handler.sound_player.abstract_sound_player import (
     AbstractSoundPlayer,
@@ -19,6 +23,8 @@ try:
 except ImportError:
     mc_data_api: Any = None
 
+ENTITY_DATA_SEPARATOR = " has the following entity data: "
+
 
 class AbstractVersionHandler(ABC):
     """版本处理器
@@ -26,12 +32,15 @@ class AbstractVersionHandler(ABC):
     Attributes:
         server (PluginServerInterface): psi 实例
         sound_player (AbstractSoundPlayer): 音效播放器
+        query_executor (QueryExecutor | None): 查询执行器, 由 :class:`~mcdrpost.manager.version_manager.VersionManager`
+            在选用这个处理器时设置, 查询服务端数据时应当通过它进行
     """
 
     @final
     def __init__(self) -> None:
         self.server: PluginServerInterface = PluginServerInterface.psi()
         self.sound_player: AbstractSoundPlayer | None = None
+        self.query_executor: QueryExecutor | None = None
 
     @classmethod
     @final
@@ -39,6 +48,27 @@ class AbstractVersionHandler(ABC):
         """此处理器是否为 MCDRpost 内置的处理器"""
         return cls in BuiltinVersionHandler.__subclasses__()
 
+    def execute(self, command: str) -> None:
+        """执行服务端命令, 在 :meth:`batch` 中调用时会等到批处理结束再一起发送
+
+        处理器应当使用这个方法而不是 ``self.server.execute`` 执行命令
+
+        Args:
+            command (str): 命令
+        """
+        execute_command(self.server, command)
+
+    def batch(self) -> CommandBatch:
+        """批量执行命令
+
+        ``with handler.batch():`` 中通过 :meth:`execute` (包括音效播放器) 执行的命令会被收集起来,
+        在退出时一次性写入服务端的标准输入
+
+        Returns:
+            CommandBatch: 批处理, 在 ``with`` 语句中使用
+        """
+        return CommandBatch(self.server)
+
     @abstractmethod
     def replace(self, player: str, item: Item) -> None:
         """替换玩家副手物品
@@ -59,6 +89,28 @@ class AbstractVersionHandler(ABC):
         """
         raise NotImplementedError
 
+    def give_items(self, player: str, items: list[Item]) -> list[bool | None]:
+        """把多个物品放入玩家的背包, 批量收件时使用
+
+        默认没有实现, 这时批量收件不可用, 见 :meth:`supports_give`
+
+        Args:
+            player (str): 玩家名
+            items (list[Item]): 物品
+
+        Returns:
+            list[bool | None]: 每个物品是否已经给予玩家. False 表示确定没有给予, 对应的订单会被退回中转站;
+                None 表示无法确认 (如命令已经发送但是回复丢失), 对应的订单保持预留, 直到插件重新加载
+        """
+        raise NotImplementedError
+
+    def supports_give(self) -> bool:
+        """处理器是否可以通过 :meth:`give_items` 批量给予物品, 默认检查是否实现了它
+
+        只有能够确认每个物品是否已经给予时才应该返回 True, 否则订单可能被删除而物品没有送达
+        """
+        return type(self).give_items is not AbstractVersionHandler.give_items
+
     @property
     def play_sound(self) -> AbstractSoundPlayer:
         """播放提示音
@@ -72,7 +124,19 @@ class AbstractVersionHandler(ABC):
 
 
 class BuiltinVersionHandler(AbstractVersionHandler, ABC):
-    """内置版本处理器"""
+    """内置版本处理器
+
+    副手物品每次都向服务端查询, 不在命令之间缓存: 寄件和收件是否可以进行由这次查询的结果决定
+
+    Attributes:
+        REPLACE_COMMAND (str): 替换副手物品的命令
+        GIVE_COMMAND (str): 给予物品的命令
+        GIVE_SUCCESS_PREFIX (str): 通过 RCON 给予物品时, 表示成功的回复的开头
+    """
+
+    REPLACE_COMMAND: str = Commands.REPLACE_NEW
+    GIVE_COMMAND: str = Commands.GIVE
+    GIVE_SUCCESS_PREFIX: str = "Gave "
 
     @staticmethod
     @abstractmethod
@@ -100,32 +164,134 @@ class BuiltinVersionHandler(AbstractVersionHandler, ABC):
         """
         raise NotImplementedError
 
+    def item_command(self, template: str, player: str, item: Item) -> str:
+        """生成给予物品的命令
+
+        命令通过服务端的标准输入发送, 其中的换行符会把它拆成多条命令, 所以这样的命令会被拒绝
+
+        Args:
+            template (str): 命令模板, 如 :attr:`REPLACE_COMMAND`
+            player (str): 玩家名
+            item (Item): 物品
+
+        Raises:
+            InvalidItem: 命令中含有换行符
+        """
+        command = template.format(player, self.item2str(item))
+        if "\n" in command or "\r" in command:
+            raise InvalidItem(f"line break in the command for {item.id}")
+        return command
+
     @override
     def replace(self, player: str, item: Item) -> None:
-        """for mc 1.17+"""
-        self.server.execute(Commands.REPLACE_NEW.format(player, self.item2str(item)))
+        """替换副手物品--通用实现
+
+        Raises:
+            InvalidItem: 物品无法安全地写入命令, 见 :meth:`item_command`
+        """
+        self.execute(self.item_command(self.REPLACE_COMMAND, player, item))
 
     @override
-    def get_offhand_item(self, player: str) -> Item:
-        """获取副手物品--通用实现"""
+    def supports_give(self) -> bool:
+        """只有通过 RCON 连接池执行 ``give`` 才能根据回复确认物品是否已经给予, 所以需要连接池"""
+        executor = self.query_executor
+        return executor is not None and executor.rcon_pool is not None and self.server.is_rcon_running()
+
+    @override
+    def give_items(self, player: str, items: list[Item]) -> list[bool | None]:
+        """给予物品--通用实现
+
+        在 RCON 连接池的同一条连接上依次执行 ``give``, 根据回复判断是否成功; 连接出错之后剩下的物品不会被给予.
+        出错的那条命令可能已经被服务端执行, 它的结果是 None. 没有连接池时不给予任何物品, 见 :meth:`supports_give`.
+        无法安全地写入命令的物品 (见 :meth:`item_command`) 不会被给予
+        """
+        commands: list[str | None] = []
+        for item in items:
+            try:
+                commands.append(self.item_command(self.GIVE_COMMAND, player, item))
+            except InvalidItem:
+                commands.append(None)
+        valid = [command for command in commands if command is not None]
+
+        executor = self.query_executor
+        if executor is None or executor.rcon_pool is None or not self.server.is_rcon_running():
+            return [False] * len(items)
+        try:
+            # 不设置超时: 超时之后无法知道哪些命令已经执行, 每条命令的耗时由连接的超时时间限制
+            replies = executor.submit(executor.rcon_pool.query_many, valid).result()
+        except OSError:
+            # 无法连接, 没有命令被发送
+            return [False] * len(items)
+
+        results: list[bool | None] = []
+        index = 0
+        for command in commands:
+            # 无法写入的物品和连接出错之后没有发送的命令都没有给予
+            if command is None or index >= len(replies):
+                results.append(False)
+                continue
+            reply = replies[index]
+            index += 1
+            results.append(None if reply is None else reply.startswith(self.GIVE_SUCCESS_PREFIX))
+        return results
+
+    @staticmethod
+    def parse_entity_data(reply: str | None) -> Any:
+        """解析 ``data get entity`` 的回复, 去掉 ``<玩家> has the following entity data:`` 前缀
+
+        回复不是 SNBT 时 (如玩家副手为空) 原样返回回复
+        """
+        if reply is None:
+            return None
+        _, sep, data = reply.partition(ENTITY_DATA_SEPARATOR)
+        try:
+            with metrics.span("stage.parse"):
+                return snbt.loads(data if sep else reply)
+        except snbt.SnbtError:
+            return reply
+
+    def query_offhand_item(self, player: str) -> Any:
+        """向服务端查询副手物品, 返回解析后的数据
+
+        Raises:
+            QueryError: 查询执行器繁忙或者查询超时
+        """
+        executor = self.query_executor
         if self.server.is_rcon_running():
-            offhand_item = mc_data_api.convert_minecraft_json(
-                self.server.rcon_query(Commands.GET_ITEM.format(player))
-            )
-        else:
-            self.server.logger.warning(TranslationKeys.rcon_not_running.rtr())
+            command = Commands.GET_ITEM.format(player)
+            reply = None
+            if executor is not None and executor.rcon_pool is not None:
+                try:
+                    reply = executor.rcon_query(command)
+                except OSError as e:
+                    # 连接池无法连接时退回到 MCDR 的 RCON 连接
+                    self.server.logger.warning(TranslationKeys.rcon_pool_failed.rtr(e))
+            if reply is None:
+                reply = self.server.rcon_query(command)
+            return self.parse_entity_data(reply)
+
+        self.server.logger.warning(TranslationKeys.rcon_not_running.rtr())
+        if executor is not None:
+            return executor.run(mc_data_api.get_player_info, player, constants.OFFHAND_CODE)
+
+        @new_thread("MCDRpost | get offhand item")
+        def get():
+            return mc_data_api.get_player_info(player, constants.OFFHAND_CODE)
 
-            @new_thread("MCDRpost | get offhand item")
-            def get():
-                return mc_data_api.get_player_info(player, constants.OFFHAND_CODE)
+        # 等待异步执行完成并获取返回值
+        return get().get_return_value(block=True)
 
-            # 等待异步执行完成并获取返回值
-            offhand_item = get().get_return_value(block=True)
+    @override
+    def get_offhand_item(self, player: str) -> Item:
+        """获取副手物品--通用实现"""
+        with metrics.span("stage.query"):
+            offhand_item = self.query_offhand_item(player)
 
         if not isinstance(offhand_item, dict):
             raise InvalidItem(offhand_item)  # TODO: 更换方式
 
-        return self.dict2item(offhand_item)
+        with metrics.span("stage.dict2item"):
+            return self.dict2item(offhand_item)
 
     def __repr__(self):
         return f"<MCDRpostBuiltinVersionHandler {self.__class__.__name__} handler at {id(self)}>"
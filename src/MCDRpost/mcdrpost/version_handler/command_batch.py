@@ -0,0 +1,70 @@
+"""批量执行服务端命令"""
+
+import threading
+
+from mcdreforged import PluginServerInterface
+
+_local = threading.local()
+
+
+class CommandBatch:
+    """收集要在服务端执行的命令, 退出 ``with`` 语句时一次性写入服务端的标准输入
+
+    一次写入只会刷新一次标准输入, 服务端会在同一时间读到这些命令, 通常在同一个游戏刻内执行.
+    批处理只对当前线程生效; 嵌套使用时, 内层的命令会加入最外层的批处理, 在最外层退出时一起发送
+
+    Examples:
+        >>> with CommandBatch(server):
+        ...     execute_command(server, "say 1")
+        ...     execute_command(server, "say 2")  # 两条命令在这里一起发送
+    """
+
+    def __init__(self, server: PluginServerInterface) -> None:
+        self.server = server
+        self.commands: list[str] = []
+        self._outer: CommandBatch | None = None
+
+    @staticmethod
+    def current() -> "CommandBatch | None":
+        """当前线程正在使用的 (最外层的) 批处理"""
+        return getattr(_local, "batch", None)
+
+    def add(self, command: str) -> None:
+        if self._outer is not None:
+            self._outer.add(command)
+        else:
+            self.commands.append(command)
+
+    def flush(self) -> None:
+        """立即发送已经收集的命令"""
+        if not self.commands:
+            return
+        commands, self.commands = self.commands, []
+        self.server.execute("\n".join(commands))
+
+    def __enter__(self) -> "CommandBatch":
+        self._outer = self.current()
+        if self._outer is None:
+            _local.batch = self
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if self._outer is not None:
+            # 内层批处理, 命令已经加入了外层的批处理
+            self._outer = None
+            return
+        _local.batch = None
+        # 即使出现异常, 已经收集的命令也要执行, 与不使用批处理时的行为一致
+        self.flush()
+
+
+def execute_command(server: PluginServerInterface, command: str) -> None:
+    """执行服务端命令, 当前线程正在使用批处理时加入批处理, 否则立即执行"""
+    batch = CommandBatch.current()
+    if batch is None:
+        server.execute(command)
+    else:
+        batch.add(command)
+
+
+__all__ = ["CommandBatch", "execute_command"]
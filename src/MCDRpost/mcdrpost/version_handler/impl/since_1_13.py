@@ -3,13 +3,13 @@ from typing import override
 from mcdrpost.constants import Commands
 from mcdrpost.data_structure import Item
 from mcdrpost.manager.version_manager import VersionManager
+from mcdrpost.utils import snbt
 from mcdrpost.version_handler.abstract_version_handler import BuiltinVersionHandler
+from mcdrpost.version_handler.version_range import VersionRange
 
 
 class Since13Handler(BuiltinVersionHandler):
-    @override
-    def replace(self, player: str, item: Item) -> None:
-        self.server.execute(Commands.REPLACE_OLD.format(player, self.item2str(item)))
+    REPLACE_COMMAND = Commands.REPLACE_OLD
 
     @staticmethod
     @override
@@ -19,9 +19,11 @@ class Since13Handler(BuiltinVersionHandler):
     @staticmethod
     @override
     def item2str(item: Item) -> str:
-        return f"{item.id}{item.components} {item.count}"
+        if not item.components:
+            return f"{item.id} {item.count}"
+        return f"{item.id}{snbt.dumps(item.components)} {item.count}"
 
 
 VersionManager.register_handler(
-    Since13Handler, lambda env: (1, 13) <= env.server_version < (1, 17)
+    Since13Handler, VersionRange.of((1, 13), (1, 17))
 )
@@ -2,7 +2,9 @@ from typing import override
 
 from mcdrpost.data_structure import Item
 from mcdrpost.manager.version_manager import VersionManager
+from mcdrpost.utils import snbt
 from mcdrpost.version_handler.abstract_version_handler import BuiltinVersionHandler
+from mcdrpost.version_handler.version_range import VersionRange
 
 
 class Since17Handler(BuiltinVersionHandler):
@@ -14,9 +16,11 @@ class Since17Handler(BuiltinVersionHandler):
     @staticmethod
     @override
     def item2str(item: Item) -> str:
-        return f"{item.id}{item.components} {item.count}"
+        if not item.components:
+            return f"{item.id} {item.count}"
+        return f"{item.id}{snbt.dumps(item.components)} {item.count}"
 
 
 VersionManager.register_handler(
-    Since17Handler, lambda env: (1, 17) <= env.server_version < (1, 20, 5)
+    Since17Handler, VersionRange.of((1, 17), (1, 20, 5))
 )
@@ -2,7 +2,9 @@ from typing import override
 
 from mcdrpost.data_structure import Item
 from mcdrpost.manager.version_manager import VersionManager
+from mcdrpost.utils import snbt
 from mcdrpost.version_handler.abstract_version_handler import BuiltinVersionHandler
+from mcdrpost.version_handler.version_range import VersionRange
 
 
 class Since20Handler(BuiltinVersionHandler):
@@ -18,13 +20,9 @@ class Since20Handler(BuiltinVersionHandler):
     def item2str(item: Item) -> str:
         if not item.components:
             return f"{item.id} {item.count}"
-        components_str = "["
-        for k, v in item.components.items():
-            components_str += f" {k}={v},"
-        components_str += "]"
-        return f"{item.id}{components_str} {item.count}"
+        return f"{item.id}{snbt.dumps_components(item.components)} {item.count}"
 
 
 VersionManager.register_handler(
-    Since20Handler, lambda env: env.server_version >= (1, 20, 5)
+    Since20Handler, VersionRange.of((1, 20, 5))
 )
@@ -3,6 +3,8 @@ from typing import final
 
 from mcdreforged import PluginServerInterface
 
+from mcdrpost.version_handler.command_batch import execute_command
+
 
 class AbstractSoundPlayer(ABC):
     """音效播放
@@ -15,6 +17,13 @@ class AbstractSoundPlayer(ABC):
     def __init__(self, server: PluginServerInterface):
         self.server = server
 
+    def execute(self, command: str) -> None:
+        """执行服务端命令, 在处理器的批处理中调用时会与其他命令一起发送
+
+        见 :meth:`~mcdrpost.version_handler.abstract_version_handler.AbstractVersionHandler.batch`
+        """
+        execute_command(self.server, command)
+
     @abstractmethod
     def successfully_receive(self, player: str):
         """播放音效: 当成功接受订单时
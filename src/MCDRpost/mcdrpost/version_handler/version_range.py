@@ -0,0 +1,81 @@
+"""按服务器版本选择 handler 的检查器"""
+
+from bisect import bisect_right
+from typing import Callable, NamedTuple, TypeAlias
+
+from mcdrpost.environment import Environment
+from mcdrpost.utils.version import ComparableType, VersionKey, version_key
+
+
+class VersionRange(NamedTuple):
+    """只依赖服务器版本的检查器, 匹配 ``[low, high)`` 范围内的版本
+
+    与普通的检查器一样可以直接调用, 但 :class:`VersionManager` 会把它们预先编译为一张按版本划分的决策表,
+    并且按版本缓存选择结果, 不需要在每次服务器启动时逐个调用
+
+    Examples:
+        >>> register_handler(MyHandler, VersionRange.of((1, 17), "1.20.5"))  # 1.17 <= 版本 < 1.20.5
+
+    Attributes:
+        low (VersionKey | None): 最低版本 (包含), None 表示没有下限
+        high (VersionKey | None): 最高版本 (不包含), None 表示没有上限
+    """
+
+    low: VersionKey | None = None
+    high: VersionKey | None = None
+
+    @classmethod
+    def of(cls, low: ComparableType | None = None, high: ComparableType | None = None) -> "VersionRange":
+        return cls(
+            None if low is None else version_key(low),
+            None if high is None else version_key(high),
+        )
+
+    def contains(self, key: VersionKey) -> bool:
+        return (self.low is None or self.low <= key) and (self.high is None or key < self.high)
+
+    def __call__(self, env: Environment) -> bool:
+        return self.contains(env.server_version.key)
+
+
+Checker: TypeAlias = VersionRange | Callable[[Environment], bool]
+"""检查器: :class:`VersionRange` 或者接受 :class:`Environment` 的函数"""
+
+
+class DecisionTable:
+    """把 :class:`VersionRange` 检查器编译为决策表
+
+    所有范围的端点把版本划分为若干个区间, 每个区间内的版本匹配的检查器完全相同,
+    所以只需要为每个区间记录第一个匹配的检查器, 查找时二分定位区间
+
+    Attributes:
+        bounds (list[VersionKey]): 排好序的端点
+        slots (list[int]): 每个区间第一个匹配的检查器的下标, 没有匹配时为 -1; 区间 i 为 ``[bounds[i-1], bounds[i])``
+        plain (list[int]): 普通检查器的下标, 它们只能逐个调用
+    """
+
+    def __init__(self, checkers: list[Checker]) -> None:
+        ranges = [(index, checker) for index, checker in enumerate(checkers) if isinstance(checker, VersionRange)]
+        self.plain = [index for index, checker in enumerate(checkers) if not isinstance(checker, VersionRange)]
+        self.bounds = sorted(
+            {bound for _, checker in ranges for bound in (checker.low, checker.high) if bound is not None}
+        )
+        self.slots = []
+        for slot in range(len(self.bounds) + 1):
+            start = self.bounds[slot - 1] if slot > 0 else None
+            end = self.bounds[slot] if slot < len(self.bounds) else None
+            self.slots.append(next(
+                (
+                    index for index, checker in ranges
+                    if (checker.low is None or start is not None and checker.low <= start)
+                    and (checker.high is None or end is not None and end <= checker.high)
+                ),
+                -1,
+            ))
+
+    def lookup(self, key: VersionKey) -> int:
+        """第一个匹配 ``key`` 的 :class:`VersionRange` 的下标, 没有时为 -1"""
+        return self.slots[bisect_right(self.bounds, key)]
+
+
+__all__ = ["Checker", "VersionRange", "DecisionTable"]
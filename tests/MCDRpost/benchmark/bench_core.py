@@ -0,0 +1,330 @@
+"""MCDRpost 核心路径的性能测试
+
+在进程内的假服务端 (:mod:`fake_server`) 上按插件加载的流程创建 ``MCDRpostCoordinator``,
+订单文件由 :mod:`generate_orders` 生成, 对每种订单数量测量:
+
+- ``data.*``: ``DataManager`` 的加载、查找、筛选、添加和取出订单
+- ``post.*``: ``PostManager`` 的寄件和收件, 包括查询副手、解析 SNBT、执行命令和提交修改
+- ``handler.*``: 内置处理器的 ``dict2item`` / ``item2str`` 以及 ``data get entity`` 回复的解析
+- ``version.*``: ``MinecraftVersion`` 的解析和比较
+
+后两组与订单数量无关, 只测量一次. 耗时很短的操作每个样本连续执行多次, 延迟取平均值.
+
+结果保存在 ``baseline.json`` 中, 之后的运行会与它对比, 每秒操作数低于基准超过 ``--tolerance`` 时
+标记为 ``SLOWER`` 并以状态码 1 退出. 基准与机器有关, 在新的机器上请先用 ``--save-baseline`` 重新生成
+
+用法::
+
+    python tests/MCDRpost/benchmark/bench_core.py
+    python tests/MCDRpost/benchmark/bench_core.py --sizes 100 10000 --ops 500
+    python tests/MCDRpost/benchmark/bench_core.py --backend sqlite --save-baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from typing import Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src', 'MCDRpost'))
+
+from fake_server import FakePlayerSource, FakeServer, install  # noqa: E402
+from generate_orders import PLAYERS, entity_data_reply, make_item, write_orders  # noqa: E402
+
+# 处理器在导入时就通过 PluginServerInterface.psi() 取得服务端, 所以整个运行过程使用同一个假服务端
+SERVER = FakeServer(tempfile.gettempdir())
+install(SERVER)
+
+from mcdrpost import constants  # noqa: E402
+from mcdrpost.configuration import Configuration, PipelineConfig, RateLimitConfig, StorageConfig  # noqa: E402
+from mcdrpost.coordinator import MCDRpostCoordinator  # noqa: E402
+from mcdrpost.data_structure import OrderInfo  # noqa: E402
+from mcdrpost.storage.order_query import OrderQuery  # noqa: E402
+from mcdrpost.utils.translation import TranslationKeys  # noqa: E402
+from mcdrpost.utils.version import MinecraftVersion  # noqa: E402
+from mcdrpost.version_handler.abstract_version_handler import BuiltinVersionHandler  # noqa: E402
+from mcdrpost.version_handler.impl.since_1_13 import Since13Handler  # noqa: E402
+from mcdrpost.version_handler.impl.since_1_17 import Since17Handler  # noqa: E402
+from mcdrpost.version_handler.impl.since_1_20_5 import Since20Handler  # noqa: E402
+
+SIZES = [100, 10_000, 100_000]
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+RELOAD_OPS = 3
+INNER = 100
+"""耗时很短的操作每个样本执行的次数"""
+
+VERSIONS = [
+    "1.12.2", "1.13", "1.16.5", "1.17.1", "1.20.4", "1.20.5-rc1", "1.20.5", "1.21.4",
+    "26.1-snapshot-3", "26.1", "26.2-pre-1",
+]
+
+Timings = list[float]
+
+
+class Result:
+    """一项测试的结果
+
+    Attributes:
+        case (str): 测试名
+        size (int | None): 订单数量, 与订单数量无关的测试为 None
+        timings (list[float]): 每次操作的耗时, 单位为秒
+    """
+
+    def __init__(self, case: str, size: int | None, timings: Timings) -> None:
+        self.case = case
+        self.size = size
+        self.timings = sorted(timings)
+
+    @property
+    def key(self) -> str:
+        return self.case if self.size is None else f"{self.case}@{self.size}"
+
+    @property
+    def ops_per_sec(self) -> float:
+        return len(self.timings) / sum(self.timings)
+
+    def quantile(self, q: float) -> float:
+        return self.timings[min(len(self.timings) - 1, int(q * len(self.timings)))]
+
+    def to_dict(self) -> dict[str, float]:
+        return {
+            "ops_per_sec": round(self.ops_per_sec, 1),
+            "p50_us": round(self.quantile(0.5) * 1e6, 2),
+            "p99_us": round(self.quantile(0.99) * 1e6, 2),
+        }
+
+
+def measure(ops: int, func: Callable[..., object], prepare: Callable[[int], tuple] = lambda i: (i,),
+            inner: int = 1) -> Timings:
+    """执行 ``ops`` 次 ``func(*prepare(i))``, 只计算 ``func`` 的耗时
+
+    ``inner`` 大于 1 时每个样本连续执行 ``inner`` 次同样的调用, 记录平均耗时
+    """
+    timings = []
+    for i in range(ops):
+        args = prepare(i)
+        start = time.perf_counter()
+        for _ in range(inner):
+            func(*args)
+        timings.append((time.perf_counter() - start) / inner)
+    return timings
+
+
+# 与订单数量有关的测试
+def make_config(backend: str) -> Configuration:
+    config = Configuration.get_default()
+    # 寄件人不受存放上限的限制; 直接调用 PostManager, 不经过执行线程和频率限制
+    config.max_storage = -1
+    config.storage = StorageConfig(backend=backend)
+    config.pipeline = PipelineConfig(enabled=False)
+    config.rate_limit = RateLimitConfig(enabled=False)
+    return config
+
+
+def load(size: int, backend: str) -> MCDRpostCoordinator:
+    """生成 ``size`` 个订单, 按插件加载的流程创建协调器"""
+    SERVER.data_folder = tempfile.mkdtemp(prefix=f"mcdrpost-bench-{size}-")
+    SERVER.configs[constants.CONFIG_FILE_NAME] = make_config(backend)
+    write_orders(os.path.join(SERVER.get_data_folder(), constants.ORDER_DATA_FILE_NAME), size)
+    coo = MCDRpostCoordinator(SERVER)
+    coo.event_emitter.on_load(SERVER, None)
+    return coo
+
+
+def unload(coo: MCDRpostCoordinator) -> None:
+    # 与 on_unload 相同, 但不保存订单
+    coo.post_manager.stop_pipeline()
+    coo.version_manager.stop_query_executor()
+    coo.data_manager.close()
+    shutil.rmtree(SERVER.data_folder, ignore_errors=True)
+
+
+def bench_data(coo: MCDRpostCoordinator, ops: int, rng: random.Random) -> dict[str, Timings]:
+    data = coo.data_manager
+    order_ids = [order.id for order in data.get_orders()]
+    results = {
+        "data.reload": measure(RELOAD_OPS, data.reload, lambda i: ()),
+        "data.get_order": measure(ops, data.get_order, lambda i: (rng.choice(order_ids),)),
+        "data.find_order_ids": measure(
+            ops, data.find_order_ids, lambda i: (OrderQuery(receiver=rng.choice(PLAYERS)),)
+        ),
+    }
+
+    infos = [
+        OrderInfo(
+            sender=rng.choice(PLAYERS), receiver=rng.choice(PLAYERS), item=Since20Handler.dict2item(make_item(rng)),
+            comment="", time="2025-01-01 00:00:00",
+        )
+        for _ in range(ops)
+    ]
+    added: list[int] = []
+    results["data.add_order"] = measure(ops, lambda info: added.append(data.add_order(info)), lambda i: (infos[i],))
+    results["data.pop_order"] = measure(ops, data.pop_order, lambda i: (added[i],))
+    return results
+
+
+def bench_post(coo: MCDRpostCoordinator, ops: int, rng: random.Random) -> dict[str, Timings]:
+    post_manager = coo.post_manager
+    data = coo.data_manager
+    # 寄件人不在生成的订单中, 寄出的订单可以通过寄件人找到
+    senders = [FakePlayerSource(f"Poster{i:02d}") for i in range(50)]
+
+    def prepare_post(i: int) -> tuple:
+        src = senders[i % len(senders)]
+        SERVER.offhand[src.player] = entity_data_reply(src.player, make_item(rng))
+        return src, rng.choice(PLAYERS)
+
+    def post(src: FakePlayerSource, receiver: str) -> None:
+        post_manager.post(src, receiver)
+        SERVER.offhand.pop(src.player, None)
+
+    results = {"post.post": measure(ops, post, prepare_post)}
+    success = TranslationKeys.post_success_sender.key
+    failed = [src.replies[-1] for src in senders if src.replies and src.replies[-1] != success]
+    if failed:
+        raise RuntimeError(f"post failed: {failed[0]}")
+
+    posted = [order_id for src in senders for order_id in data.get_orderid_by_sender(src.player)]
+
+    def prepare_receive(i: int) -> tuple:
+        order = data.get_order(posted[i])
+        return FakePlayerSource(order.receiver), order.id
+
+    def receive(src: FakePlayerSource, order_id: int) -> None:
+        if not post_manager.receive(src, order_id, "receive"):
+            raise RuntimeError(f"receive failed: {src.replies[-1]}")
+
+    results["post.receive"] = measure(len(posted), receive, prepare_receive)
+    return results
+
+
+# 与订单数量无关的测试
+def bench_handlers(ops: int, rng: random.Random) -> dict[str, Timings]:
+    results = {}
+    handlers: list[tuple[str, type[BuiltinVersionHandler], bool]] = [
+        ("since13", Since13Handler, True),
+        ("since17", Since17Handler, True),
+        ("since20", Since20Handler, False),
+    ]
+    for name, handler, legacy in handlers:
+        replies = [entity_data_reply("Steve", make_item(rng, legacy)) for _ in range(ops)]
+        results[f"handler.{name}.parse"] = measure(ops, handler.parse_entity_data, lambda i: (replies[i],))
+        parsed = [handler.parse_entity_data(reply) for reply in replies]
+        results[f"handler.{name}.dict2item"] = measure(ops, handler.dict2item, lambda i: (parsed[i],), INNER)
+        # 每个样本使用不同的物品, 以免只测量到 SNBT 缓存
+        items = [handler.dict2item(item) for item in parsed]
+        results[f"handler.{name}.item2str"] = measure(ops, handler.item2str, lambda i: (items[i],))
+    return results
+
+
+def bench_versions(ops: int, rng: random.Random) -> dict[str, Timings]:
+    versions = [MinecraftVersion(version) for version in VERSIONS]
+    return {
+        "version.parse": measure(ops, MinecraftVersion, lambda i: (rng.choice(VERSIONS),), INNER),
+        "version.compare": measure(
+            ops, lambda a, b: a < b, lambda i: (rng.choice(versions), rng.choice(versions)), INNER
+        ),
+        "version.compare_str": measure(
+            ops, lambda a, b: a >= b, lambda i: (rng.choice(versions), rng.choice(VERSIONS)), INNER
+        ),
+    }
+
+
+# 基准
+def load_baseline(path: str, backend: str) -> dict[str, dict[str, float]]:
+    """读取基准, 不存在或者使用了不同的存储后端时返回空字典"""
+    if not os.path.isfile(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if data["backend"] != backend:
+        print(f"baseline was recorded with the {data['backend']} backend, skipping comparison")
+        return {}
+    return data["results"]
+
+
+def save_baseline(path: str, results: list[Result], args: argparse.Namespace) -> None:
+    data = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "backend": args.backend,
+        "ops": args.ops,
+        "results": {result.key: result.to_dict() for result in results},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+def compare(result: Result, baseline: dict[str, dict[str, float]], tolerance: float) -> tuple[str, bool]:
+    """与基准比较, 返回 (显示的文本, 是否变慢)"""
+    base = baseline.get(result.key)
+    if base is None:
+        return "-", False
+    ratio = result.ops_per_sec / base["ops_per_sec"]
+    if ratio < 1 - tolerance:
+        return f"{ratio:.2f}x SLOWER", True
+    if ratio > 1 + tolerance:
+        return f"{ratio:.2f}x faster", False
+    return f"{ratio:.2f}x", False
+
+
+def print_row(result: Result, baseline: dict[str, dict[str, float]], tolerance: float) -> bool:
+    text, slower = compare(result, baseline, tolerance)
+    size = "-" if result.size is None else str(result.size)
+    print(
+        f"{result.case:<26} | {size:>7} | {len(result.timings):>5} | {result.ops_per_sec:>11,.1f} | "
+        f"{result.quantile(0.5) * 1e6:>9.1f} | {result.quantile(0.99) * 1e6:>9.1f} | {text}"
+    )
+    return slower
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="MCDRpost 核心路径的性能测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="订单数量")
+    parser.add_argument("--ops", type=int, default=1000, help="每项测试的操作次数")
+    parser.add_argument("--backend", choices=["json", "sqlite"], default="json", help="存储后端")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="基准文件")
+    parser.add_argument("--save-baseline", action="store_true", help="把这次的结果保存为基准")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="允许的每秒操作数下降比例")
+    parser.add_argument("--seed", type=int, default=0, help="随机数种子")
+    args = parser.parse_args()
+
+    baseline = {} if args.save_baseline else load_baseline(args.baseline, args.backend)
+    rng = random.Random(args.seed)
+
+    print(f"{'case':<26} | {'orders':>7} | {'ops':>5} | {'ops/s':>11} | {'p50 (us)':>9} | {'p99 (us)':>9} | baseline")
+    results: list[Result] = []
+    slower = False
+
+    def report(size: int | None, timings: dict[str, Timings]) -> None:
+        nonlocal slower
+        for case, case_timings in timings.items():
+            result = Result(case, size, case_timings)
+            results.append(result)
+            slower |= print_row(result, baseline, args.tolerance)
+
+    for size in args.sizes:
+        coo = load(size, args.backend)
+        try:
+            report(size, bench_data(coo, args.ops, rng))
+            report(size, bench_post(coo, args.ops, rng))
+        finally:
+            unload(coo)
+    report(None, bench_handlers(args.ops, rng))
+    report(None, bench_versions(args.ops, rng))
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results, args)
+        print(f"baseline saved to {args.baseline}")
+    elif slower:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
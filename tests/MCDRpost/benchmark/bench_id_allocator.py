@@ -0,0 +1,60 @@
+"""订单 ID 分配的性能测试
+
+对比之前 ``DataManager.__get_next_id`` 的逐个探测实现和 :class:`IdAllocator`,
+在已有 10 ~ 100k 个订单时, 测量一次 "寄件 + 收件" (分配 + 回收) 的平均耗时
+
+用法::
+
+    python tests/MCDRpost/benchmark/bench_id_allocator.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src', 'MCDRpost'))
+
+from mcdrpost.storage.id_allocator import IdAllocator  # noqa: E402
+
+SIZES = [10, 100, 1_000, 10_000, 100_000]
+
+
+def linear_scan(orders: dict[str, int]) -> int:
+    if not orders:
+        return 1
+    order_id = 1
+    id_set = set(orders.values())
+    while order_id in id_set:
+        order_id += 1
+    return order_id
+
+
+def bench_linear_scan(size: int, rounds: int) -> float:
+    orders = {str(i): i for i in range(1, size + 1)}
+    start = time.perf_counter()
+    for _ in range(rounds):
+        order_id = linear_scan(orders)
+        orders[str(order_id)] = order_id
+        del orders[str(order_id)]
+    return (time.perf_counter() - start) / rounds
+
+
+def bench_allocator(size: int, rounds: int) -> float:
+    allocator = IdAllocator(range(1, size + 1))
+    start = time.perf_counter()
+    for _ in range(rounds):
+        allocator.release(allocator.allocate())
+    return (time.perf_counter() - start) / rounds
+
+
+def main() -> None:
+    print(f"{'orders':>8} | {'linear scan':>14} | {'IdAllocator':>14}")
+    for size in SIZES:
+        rounds = max(20, 200_000 // size)
+        old = bench_linear_scan(size, rounds)
+        new = bench_allocator(size, 100_000)
+        print(f"{size:>8} | {old * 1e6:>11.2f} us | {new * 1e6:>11.2f} us")
+
+
+if __name__ == '__main__':
+    main()
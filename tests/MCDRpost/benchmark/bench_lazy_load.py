@@ -0,0 +1,60 @@
+"""订单加载的性能测试
+
+对比直接验证全部订单 (``OrderData.deserialize``) 和只读取索引字段
+(:meth:`LazyOrders.from_raw`) 的加载耗时, 不包括读取文件和解析 JSON
+
+用法::
+
+    python tests/MCDRpost/benchmark/bench_lazy_load.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src', 'MCDRpost'))
+
+from mcdrpost.data_structure import OrderData  # noqa: E402
+from mcdrpost.storage.lazy_orders import LazyOrders  # noqa: E402
+
+SIZES = [100, 1_000, 10_000, 100_000]
+
+
+def make_orders(size: int) -> dict:
+    return {
+        str(i): {
+            "id": i,
+            "time": "2025-01-01 00:00:00",
+            "sender": f"player{i % 50}",
+            "receiver": f"player{i % 37}",
+            "comment": "",
+            "item": {
+                "id": "minecraft:diamond_sword",
+                "count": 1,
+                "components": {
+                    "minecraft:enchantments": {"levels": {"minecraft:sharpness": 5}},
+                    "minecraft:custom_name": f'{{"text":"sword {i}"}}',
+                },
+            },
+        }
+        for i in range(1, size + 1)
+    }
+
+
+def measure(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    print(f"{'orders':>8} | {'eager':>10} | {'lazy':>10}")
+    for size in SIZES:
+        raw = make_orders(size)
+        eager = measure(lambda: OrderData.deserialize({"players": [], "orders": raw}))
+        lazy = measure(lambda: LazyOrders.from_raw(raw))
+        print(f"{size:>8} | {eager * 1e3:>7.1f} ms | {lazy * 1e3:>7.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
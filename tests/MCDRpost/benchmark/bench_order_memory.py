@@ -0,0 +1,70 @@
+"""订单占用内存的测试
+
+对比把订单保存为 ``Order`` 模型 (``dict[str, Order]``) 和保存为紧凑记录
+(:class:`~mcdrpost.storage.order_record.OrderRecord`, 即 ``LazyOrders`` 加载之后的状态) 时占用的内存
+
+订单数据先序列化为 JSON 文本再解析, 与从订单文件读取时一样, 每个订单的字符串都是独立的对象
+
+用法::
+
+    python tests/MCDRpost/benchmark/bench_order_memory.py
+"""
+
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src', 'MCDRpost'))
+
+from mcdrpost.data_structure import Order  # noqa: E402
+from mcdrpost.storage.lazy_orders import LazyOrders  # noqa: E402
+
+SIZES = [1_000, 10_000, 100_000]
+
+
+def make_orders(size: int) -> dict:
+    orders = {}
+    for i in range(1, size + 1):
+        # 大部分订单是普通物品或者附魔相同的装备, 少数带有自定义名称
+        if i % 10 == 0:
+            components = {"minecraft:custom_name": f'{{"text":"sword {i}"}}'}
+        elif i % 2 == 0:
+            components = {"minecraft:enchantments": {"levels": {"minecraft:sharpness": 5}}}
+        else:
+            components = {}
+        orders[str(i)] = {
+            "id": i,
+            "time": f"2025-01-{i % 28 + 1:02d} 12:{i % 60:02d}:00",
+            "sender": f"player{i % 50}",
+            "receiver": f"player{i % 37}",
+            "comment": "",
+            "item": {"id": "minecraft:diamond_sword", "count": 1, "components": components},
+        }
+    return json.loads(json.dumps(orders))
+
+
+def measure(func) -> int:
+    """返回 ``func`` 的返回值占用的内存 (字节)"""
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main() -> None:
+    print(f"{'orders':>8} | {'Order':>10} | {'record':>10} | {'ratio':>6}")
+    for size in SIZES:
+        text = json.dumps(make_orders(size))
+        models = measure(lambda: {key: Order.deserialize(raw) for key, raw in json.loads(text).items()})
+        records = measure(lambda: LazyOrders((key, Order.deserialize(raw)) for key, raw in json.loads(text).items()))
+        print(f"{size:>8} | {models / 2 ** 20:>7.1f} MB | {records / 2 ** 20:>7.1f} MB | {models / records:>5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""订单文件格式的性能测试
+
+在生成的 100k 个订单上对比 ``orders.json`` 和二进制快照 (``orders.bin``) 的
+文件大小、保存耗时和加载耗时. 加载分为两种:
+
+- 完整: 解码所有订单 (不包括 pydantic 验证)
+- 按需: ``storage.lazy_load`` 使用的方式, 只读取构建索引需要的字段
+
+用法::
+
+    python tests/MCDRpost/benchmark/bench_snapshot_format.py [订单数量]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src', 'MCDRpost'))
+
+from mcdrpost.storage.binary_snapshot import BinarySnapshotReader, write_binary_snapshot  # noqa: E402
+from mcdrpost.storage.lazy_orders import LazyOrders  # noqa: E402
+from mcdrpost.utils.json_stream import OrderDataReader, write_order_data  # noqa: E402
+
+
+def make_orders(size: int) -> dict:
+    return {
+        str(i): {
+            "id": i,
+            "time": f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d} {i % 24:02d}:{i % 60:02d}:{i * 7 % 60:02d}",
+            "sender": f"player{i % 50}",
+            "receiver": f"player{i % 37}",
+            "comment": "" if i % 3 else f"gift #{i}",
+            "item": {
+                "id": ("minecraft:diamond_sword", "minecraft:cobblestone", "minecraft:enchanted_book")[i % 3],
+                "count": 1 if i % 3 != 1 else 64,
+                "components": {} if i % 3 == 1 else {
+                    "minecraft:enchantments": {"levels": {"minecraft:sharpness": 5, "minecraft:unbreaking": 3}},
+                    "minecraft:custom_name": f'{{"text":"item {i}","italic":false}}',
+                    "minecraft:damage": i % 100,
+                },
+            },
+        }
+        for i in range(1, size + 1)
+    }
+
+
+def measure(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def load_json(path: str, lazy: bool) -> None:
+    with open(path, "r", encoding="utf-8") as f:
+        reader = OrderDataReader(f)
+        if lazy:
+            LazyOrders.from_raw(reader.iter_orders())
+        else:
+            dict(reader.iter_orders())
+
+
+def load_binary(path: str, lazy: bool) -> None:
+    with open(path, "rb") as f:
+        reader = BinarySnapshotReader(f)
+    if lazy:
+        LazyOrders.from_raw(reader.iter_deferred())
+    else:
+        dict(reader.iter_orders())
+
+
+def main() -> None:
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    orders = make_orders(size)
+    players = [f"player{i}" for i in range(50)]
+    with tempfile.TemporaryDirectory() as folder:
+        json_path = os.path.join(folder, "orders.json")
+        bin_path = os.path.join(folder, "orders.bin")
+        results = [
+            (
+                "json",
+                measure(lambda: write_order_data(json_path, players, orders.items())),
+                os.path.getsize(json_path),
+                measure(lambda: load_json(json_path, False)),
+                measure(lambda: load_json(json_path, True)),
+            ),
+            (
+                "binary",
+                measure(lambda: write_binary_snapshot(bin_path, players, orders.items())),
+                os.path.getsize(bin_path),
+                measure(lambda: load_binary(bin_path, False)),
+                measure(lambda: load_binary(bin_path, True)),
+            ),
+        ]
+
+    print(f"{size} orders")
+    print(f"{'format':>8} | {'size':>10} | {'save':>9} | {'load':>9} | {'lazy load':>9}")
+    for name, save, file_size, load, lazy_load in results:
+        print(
+            f"{name:>8} | {file_size / 1024 / 1024:>7.2f} MB | {save * 1e3:>6.0f} ms"
+            f" | {load * 1e3:>6.0f} ms | {lazy_load * 1e3:>6.0f} ms"
+        )
+
+
+if __name__ == '__main__':
+    main()
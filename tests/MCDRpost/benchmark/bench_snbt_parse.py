@@ -0,0 +1,99 @@
+"""SNBT 解析的性能测试
+
+在两种 ``data get entity`` 回复上对比:
+
+- :func:`mcdrpost.utils.snbt.loads`
+- 升级脚本之前的正则修复流程 (``fix_nbt_format`` + ``json.loads``)
+- ``minecraft_data_api.convert_minecraft_json`` (安装了 MinecraftDataAPI 时)
+
+回复分别是一个装满附魔物品的潜影盒, 以及正则流程能够处理的只有附魔列表的物品 (正则流程会把 ``5s`` 解析为字符串).
+无法处理的输入会被标记为 ``failed``
+
+用法::
+
+    python tests/MCDRpost/benchmark/bench_snbt_parse.py
+"""
+
+import json
+import os
+import sys
+import time
+from typing import Any, Callable
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src')
+sys.path.insert(0, os.path.join(ROOT, 'MCDRpost'))
+sys.path.insert(0, os.path.join(ROOT, 'MCDRpost-migration'))
+
+from migration import fix_nbt_format  # noqa: E402
+from mcdrpost.utils import snbt  # noqa: E402
+
+try:
+    from minecraft_data_api import convert_minecraft_json
+except ImportError:
+    convert_minecraft_json = None
+
+# 与 mcdrpost.version_handler.abstract_version_handler.ENTITY_DATA_SEPARATOR 相同
+ENTITY_DATA_SEPARATOR = " has the following entity data: "
+ENCHANTMENTS = ["sharpness", "unbreaking", "mending", "looting", "fire_aspect", "sweeping"]
+
+
+def make_item(slot: int) -> str:
+    enchantments = ", ".join(
+        f'{{id: "minecraft:{name}", lvl: {level + 1}s}}' for level, name in enumerate(ENCHANTMENTS)
+    )
+    lore = ", ".join(f"'{{\"text\":\"Lore line {i}\",\"italic\":false}}'" for i in range(4))
+    return (
+        f'{{Slot: {slot}b, id: "minecraft:diamond_sword", Count: 1b, tag: {{Damage: {slot}, RepairCost: 31, '
+        f'Enchantments: [{enchantments}], '
+        f"display: {{Name: '{{\"text\":\"Sword #{slot}\",\"color\":\"gold\"}}', Lore: [{lore}]}}, "
+        f'AttributeModifiers: [{{AttributeName: "generic.attack_damage", Amount: 12.5d, Operation: 0, '
+        f'UUID: [I; {slot}, -{slot}, 42, -42], Slot: "mainhand"}}]}}}}'
+    )
+
+
+def make_shulker_box() -> str:
+    items = ", ".join(make_item(slot) for slot in range(27))
+    return (
+        f"Alice{ENTITY_DATA_SEPARATOR}{{Slot: -106b, id: \"minecraft:shulker_box\", Count: 1b, "
+        f"tag: {{BlockEntityTag: {{id: \"minecraft:shulker_box\", Items: [{items}]}}}}}}"
+    )
+
+
+def make_enchanted_book() -> str:
+    enchantments = ", ".join(f'{{lvl: {i % 5 + 1}s, id: "minecraft:enchantment_{i}"}}' for i in range(200))
+    return f"Alice{ENTITY_DATA_SEPARATOR}{{StoredEnchantments: [{enchantments}], RepairCost: 63}}"
+
+
+def regex_pipeline(reply: str) -> Any:
+    data = reply.partition(ENTITY_DATA_SEPARATOR)[2]
+    return json.loads(fix_nbt_format(data[1:-1]))
+
+
+def snbt_loads(reply: str) -> Any:
+    return snbt.loads(reply.partition(ENTITY_DATA_SEPARATOR)[2])
+
+
+def bench(func: Callable[[str], Any], reply: str, rounds: int) -> float | None:
+    try:
+        func(reply)
+    except ValueError:
+        return None
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func(reply)
+    return (time.perf_counter() - start) / rounds
+
+
+def main() -> None:
+    candidates = [("snbt.loads", snbt_loads), ("regex + json.loads", regex_pipeline)]
+    if convert_minecraft_json is not None:
+        candidates.append(("convert_minecraft_json", convert_minecraft_json))
+    for title, reply in (("shulker box", make_shulker_box()), ("enchanted book", make_enchanted_book())):
+        print(f"{title}: {len(reply)} chars")
+        for name, func in candidates:
+            result = bench(func, reply, 200)
+            text = "failed" if result is None else f"{result * 1e3:.3f} ms"
+            print(f"{name:>24} | {text:>10}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""性能测试用的 ``PluginServerInterface``
+
+不启动 MCDR 和 Minecraft 服务端, 在进程内模拟插件用到的接口:
+
+- 副手物品的查询通过 ``rcon_query`` 返回 :attr:`FakeServer.offhand` 中预先生成的回复
+- ``execute`` 和 ``tell`` 只计数, 不做任何事
+- 翻译直接返回翻译键
+
+:func:`install` 会把它设置为 MCDR 的全局实例, 这样 ``PluginServerInterface.psi()`` 和
+:mod:`mcdrpost.utils.translation` 都能取到它, 所以必须在导入 ``mcdrpost`` 之前调用
+"""
+
+import logging
+import os
+from types import SimpleNamespace
+from typing import Any
+
+from mcdreforged import PluginServerInterface, ServerInterface
+
+EMPTY_OFFHAND_REPLY = "Found no elements matching Inventory[{Slot:-106b}]"
+
+
+class FakeServer(PluginServerInterface):
+    """进程内的 ``PluginServerInterface``
+
+    Attributes:
+        version (str): Minecraft 服务端版本
+        configs (dict[str, Any]): 配置文件名 -> ``load_config_simple`` 返回的配置, 没有的返回默认配置
+        offhand (dict[str, str]): 玩家 -> ``data get entity`` 的回复, 见 :func:`generate_orders.entity_data_reply`,
+            没有的玩家副手为空
+        executed (int): 执行的命令数量, 批处理中的每一条命令都会计数
+        told (int): 发送给玩家的消息数量
+    """
+
+    # noinspection PyMissingConstructor
+    def __init__(self, data_folder: str, version: str = "1.21.4") -> None:
+        # 不调用父类的构造函数: 它需要一个 MCDReforgedServer
+        self.data_folder = data_folder
+        self.version = version
+        self.configs: dict[str, Any] = {}
+        self.offhand: dict[str, str] = {}
+        self.executed = 0
+        self.told = 0
+        self._logger = logging.getLogger("MCDRpost.bench")
+
+    @property
+    def logger(self) -> logging.Logger:
+        return self._logger
+
+    def as_plugin_server_interface(self) -> "FakeServer":
+        return self
+
+    # 插件信息和配置
+    def get_data_folder(self) -> str:
+        os.makedirs(self.data_folder, exist_ok=True)
+        return self.data_folder
+
+    def load_config_simple(self, file_name: str = "config.json", target_class: Any = None, **kwargs) -> Any:
+        config = self.configs.get(file_name)
+        return config if config is not None else target_class.get_default()
+
+    def get_mcdr_config(self) -> dict:
+        return {"handler": "vanilla_handler", "rcon": {"enable": False}}
+
+    def get_self_metadata(self) -> Any:
+        return SimpleNamespace(version="0.0.0")
+
+    def register_command(self, root_node: Any) -> None:
+        pass
+
+    def register_help_message(self, prefix: str, message: Any, permission: int = 0) -> None:
+        pass
+
+    def tr(self, translation_key: str, *args, **kwargs) -> str:
+        return translation_key
+
+    def rtr(self, translation_key: str, *args, **kwargs) -> str:
+        return translation_key
+
+    # 服务端
+    def get_server_information(self) -> Any:
+        return SimpleNamespace(version=self.version)
+
+    def is_server_running(self) -> bool:
+        return True
+
+    def is_rcon_running(self) -> bool:
+        return True
+
+    def rcon_query(self, command: str) -> str:
+        # data get entity <玩家> Inventory[{Slot:-106b}]
+        player = command.split(" ", 4)[3]
+        return self.offhand.get(player, EMPTY_OFFHAND_REPLY)
+
+    def execute(self, text: str, *, encoding: str | None = None) -> None:
+        self.executed += text.count("\n") + 1
+
+    def tell(self, player: str, text: Any, *, encoding: str | None = None) -> None:
+        self.told += 1
+
+    def get_permission_level(self, obj: Any) -> int:
+        return 0
+
+
+class FakePlayerSource:
+    """玩家的命令源, 只提供 ``PostManager`` 用到的 ``player`` 和 ``reply``
+
+    Attributes:
+        replies (list): 收到的回复
+    """
+
+    def __init__(self, player: str) -> None:
+        self.player = player
+        self.replies: list = []
+
+    def reply(self, message: Any, **kwargs) -> None:
+        self.replies.append(message)
+
+
+def install(server: FakeServer) -> None:
+    """把 ``server`` 设置为 MCDR 的全局实例"""
+    setattr(ServerInterface, "_ServerInterface__global_instance", server)
+
+
+__all__ = ["FakeServer", "FakePlayerSource", "install"]
@@ -0,0 +1,170 @@
+"""生成性能测试用的 ``orders.json``
+
+物品带有接近真实存档的数据: 附魔、自定义名称、描述、耐久和属性修饰符, 其中一部分是装满物品的潜影盒.
+同一个种子总是生成相同的订单
+
+- 默认生成 1.20.5 及以上版本的物品组件 (``components``)
+- ``--legacy`` 生成 1.13 ~ 1.20.4 的物品 NBT (``tag``), 与这些版本的订单文件相同
+
+用法::
+
+    python tests/MCDRpost/benchmark/generate_orders.py 10000 orders.json
+    python tests/MCDRpost/benchmark/generate_orders.py 10000 orders.json --legacy --seed 1
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+from typing import Any
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src', 'MCDRpost'))
+
+from mcdrpost.utils import snbt  # noqa: E402
+
+# 与 mcdrpost.version_handler.abstract_version_handler.ENTITY_DATA_SEPARATOR 相同
+ENTITY_DATA_SEPARATOR = " has the following entity data: "
+
+PLAYERS = [f"Player{i:03d}" for i in range(200)]
+TOOLS = ["diamond_sword", "netherite_sword", "diamond_pickaxe", "netherite_axe", "bow", "trident", "elytra"]
+STACKS = ["diamond", "iron_ingot", "emerald", "cobblestone", "oak_log", "ender_pearl", "golden_apple"]
+ENCHANTMENTS = ["sharpness", "unbreaking", "mending", "looting", "fire_aspect", "efficiency", "fortune"]
+SHULKER_RATIO = 0.05
+PLAIN_RATIO = 0.4
+
+
+def _text(text: str, **style: Any) -> str:
+    return json.dumps({"text": text, **style}, ensure_ascii=False, separators=(",", ":"))
+
+
+def _tool(rng: random.Random, legacy: bool) -> dict[str, Any]:
+    """带附魔和名称的工具, 是订单中数据最多的一类物品"""
+    enchantments = {f"minecraft:{name}": rng.randint(1, 5) for name in rng.sample(ENCHANTMENTS, rng.randint(1, 4))}
+    name = _text(f"{rng.choice(PLAYERS)}'s tool", color="gold", italic=False)
+    lore = [_text(f"Lore line {i}", italic=False) for i in range(rng.randint(0, 3))]
+    damage = rng.randint(0, 1500)
+    modifier_uuid = [rng.randint(-2 ** 31, 2 ** 31 - 1) for _ in range(4)]
+    item_id = f"minecraft:{rng.choice(TOOLS)}"
+
+    if legacy:
+        tag: dict[str, Any] = {
+            "Damage": damage,
+            "RepairCost": rng.randint(0, 31),
+            "Enchantments": [{"id": key, "lvl": snbt.Short(level)} for key, level in enchantments.items()],
+            "display": {"Name": name, "Lore": lore} if lore else {"Name": name},
+            "AttributeModifiers": [{
+                "AttributeName": "generic.attack_damage", "Amount": 12.5, "Operation": 0,
+                "UUID": snbt.IntArray(modifier_uuid), "Slot": "mainhand",
+            }],
+        }
+        return {"id": item_id, "Count": snbt.Byte(1), "tag": tag}
+
+    components: dict[str, Any] = {
+        "minecraft:damage": damage,
+        "minecraft:repair_cost": rng.randint(0, 31),
+        "minecraft:enchantments": {"levels": enchantments},
+        "minecraft:custom_name": name,
+        "minecraft:attribute_modifiers": {"modifiers": [{
+            "type": "minecraft:generic.attack_damage", "amount": 12.5, "operation": "add_value",
+            "id": f"minecraft:bench_{modifier_uuid[0] & 0xffff}", "slot": "mainhand",
+        }]},
+    }
+    if lore:
+        components["minecraft:lore"] = lore
+    return {"id": item_id, "count": 1, "components": components}
+
+
+def _stack(rng: random.Random, legacy: bool) -> dict[str, Any]:
+    """没有额外数据的一组物品"""
+    item_id = f"minecraft:{rng.choice(STACKS)}"
+    count = rng.randint(1, 64)
+    if legacy:
+        return {"id": item_id, "Count": snbt.Byte(count)}
+    return {"id": item_id, "count": count}
+
+
+def _shulker_box(rng: random.Random, legacy: bool) -> dict[str, Any]:
+    """装满 27 格物品的潜影盒"""
+    slots = [(_tool if rng.random() < 0.5 else _stack)(rng, legacy) for _ in range(27)]
+    if legacy:
+        items = [{"Slot": snbt.Byte(slot), **item} for slot, item in enumerate(slots)]
+        return {
+            "id": "minecraft:shulker_box", "Count": snbt.Byte(1),
+            "tag": {"BlockEntityTag": {"id": "minecraft:shulker_box", "Items": items}},
+        }
+    container = [{"slot": slot, "item": item} for slot, item in enumerate(slots)]
+    return {"id": "minecraft:shulker_box", "count": 1, "components": {"minecraft:container": container}}
+
+
+def make_item(rng: random.Random, legacy: bool = False) -> dict[str, Any]:
+    """随机生成一个物品, 格式与 ``data get entity`` 返回的副手物品相同 (不包括 ``Slot``)
+
+    Args:
+        rng (random.Random): 随机数生成器
+        legacy (bool): 生成 1.20.5 以前的物品 NBT
+    """
+    roll = rng.random()
+    if roll < SHULKER_RATIO:
+        return _shulker_box(rng, legacy)
+    if roll < SHULKER_RATIO + PLAIN_RATIO:
+        return _stack(rng, legacy)
+    return _tool(rng, legacy)
+
+
+def to_order_item(item: dict[str, Any]) -> dict[str, Any]:
+    """把物品转换为订单文件中的 ``item`` 字段, 与内置处理器的 ``dict2item`` 一致"""
+    if "Count" in item:
+        return {"id": item["id"], "count": int(item["Count"]), "components": item.get("tag", {})}
+    return {"id": item["id"], "count": item["count"], "components": item.get("components", {})}
+
+
+def entity_data_reply(player: str, item: dict[str, Any]) -> str:
+    """``data get entity <玩家> Inventory[{Slot:-106b}]`` 的回复"""
+    return f"{player}{ENTITY_DATA_SEPARATOR}{snbt.dumps({'Slot': snbt.Byte(-106), **item})}"
+
+
+def make_orders(size: int, seed: int = 0, legacy: bool = False) -> dict[str, Any]:
+    """生成订单数据, 格式与 ``orders.json`` 相同
+
+    Args:
+        size (int): 订单数量
+        seed (int): 随机数种子
+        legacy (bool): 生成 1.20.5 以前的物品 NBT
+    """
+    rng = random.Random(seed)
+    orders = {}
+    for order_id in range(1, size + 1):
+        sender, receiver = rng.sample(PLAYERS, 2)
+        orders[str(order_id)] = {
+            "id": order_id,
+            "time": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} "
+                    f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}",
+            "sender": sender,
+            "receiver": receiver,
+            "comment": rng.choice(["", "gift", "trade #" + str(order_id), "谢谢~"]),
+            "item": to_order_item(make_item(rng, legacy)),
+        }
+    return {"players": list(PLAYERS), "orders": orders}
+
+
+def write_orders(path: str, size: int, seed: int = 0, legacy: bool = False) -> None:
+    """生成订单并写入 ``path``"""
+    data = make_orders(size, seed, legacy)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="生成性能测试用的 orders.json")
+    parser.add_argument("size", type=int, help="订单数量")
+    parser.add_argument("path", help="输出文件")
+    parser.add_argument("--seed", type=int, default=0, help="随机数种子")
+    parser.add_argument("--legacy", action="store_true", help="生成 1.20.5 以前的物品 NBT")
+    args = parser.parse_args()
+    write_orders(args.path, args.size, args.seed, args.legacy)
+    print(f"{args.size} orders -> {args.path} ({os.path.getsize(args.path) / 1024:.1f} KiB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+
+from mcdrpost.storage.binary_snapshot import BinarySnapshotReader, write_binary_snapshot
+from mcdrpost.storage.lazy_orders import DeferredOrder, LazyOrders, OrderSkeleton
+
+
+def make_orders(size: int) -> dict:
+    return {
+        str(i): {
+            "id": i,
+            "time": "2025-01-01 00:00:00",
+            "sender": f"player{i % 3}",
+            "receiver": "史蒂夫",
+            "comment": "x" * 100 if i % 2 else "",
+            "item": {
+                "id": "minecraft:diamond_sword",
+                "count": 1,
+                "components": {
+                    "minecraft:damage": -i * 1000,
+                    "big": 2 ** 70,
+                    "values": [0.1, None, True, False, [], {}],
+                },
+            },
+        }
+        for i in range(1, size + 1)
+    }
+
+
+class TestBinarySnapshot(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "orders.bin")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def read(self) -> BinarySnapshotReader:
+        with open(self.path, "rb") as f:
+            return BinarySnapshotReader(f)
+
+    def test_round_trip(self):
+        for size in (0, 1, 300):
+            orders = make_orders(size)
+            write_binary_snapshot(self.path, ["Alex", "史蒂夫"], orders.items())
+            reader = self.read()
+            self.assertEqual(reader.players, ["Alex", "史蒂夫"])
+            self.assertEqual(dict(reader.iter_orders()), orders)
+            self.assertFalse(os.path.exists(self.path + ".tmp"))
+
+    def test_deferred(self):
+        orders = make_orders(3)
+        write_binary_snapshot(self.path, [], orders.items())
+        deferred = dict(self.read().iter_deferred())
+        self.assertIsInstance(deferred["2"], DeferredOrder)
+        self.assertEqual(deferred["2"].skeleton, OrderSkeleton(2, "player2", "史蒂夫"))
+        self.assertEqual(deferred["2"].load(), orders["2"])
+
+        lazy = LazyOrders.from_raw(deferred)
+        self.assertEqual(lazy.loaded_count, 0)
+        self.assertEqual(lazy.skeleton("3"), OrderSkeleton(3, "player0", "史蒂夫"))
+        self.assertEqual(lazy["1"].item.components["minecraft:damage"], -1000)
+        self.assertEqual(lazy.serialize("3"), orders["3"])
+
+    def test_string_and_list_components(self):
+        """短字符串进入字符串表, 长字符串直接写入记录, 列表和复合标签可以任意嵌套"""
+        long_text = "长" * 40 + "x" * 100
+        components = {
+            "minecraft:lore": ['{"text":"line 1"}', '{"text":"line 2"}', long_text],
+            "minecraft:container": [
+                {"slot": 0, "item": {"id": "minecraft:stone", "count": 64}},
+                {"slot": 1, "item": {"id": "minecraft:stone", "count": 1, "components": {"tags": ["a", "b"]}}},
+            ],
+            "nested": [[], [[long_text]], ["", "史蒂夫"]],
+            "names": [f"name{i}" for i in range(200)],
+        }
+        orders = make_orders(2)
+        orders["2"]["item"]["components"] = components
+        write_binary_snapshot(self.path, ["Alex"], orders.items())
+        self.assertEqual(dict(self.read().iter_orders()), orders)
+
+        lazy = LazyOrders.from_raw(self.read().iter_deferred())
+        self.assertEqual(lazy["2"].item.components, components)
+
+    def test_corrupted(self):
+        write_binary_snapshot(self.path, ["Alex"], make_orders(5).items())
+        with open(self.path, "rb") as f:
+            data = f.read()
+        for broken in (b"", b"MPOS", b"JSON" + data[4:], data[:-3], data + b"\x00"):
+            with open(self.path, "wb") as f:
+                f.write(broken)
+            with self.assertRaises(ValueError):
+                list(self.read().iter_orders())
+
+    def test_unsupported_value(self):
+        with self.assertRaises(TypeError):
+            write_binary_snapshot(self.path, [], [("1", {"id": 1, "value": object()})])
+        self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
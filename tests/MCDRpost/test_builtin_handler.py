@@ -0,0 +1,262 @@
+import json
+import os
+import tempfile
+import unittest
+from concurrent.futures import Future
+
+from mcdrpost.data_structure import Item, Order, OrderInfo
+from mcdrpost.storage.binary_snapshot import BinarySnapshotReader, write_binary_snapshot
+from mcdrpost.storage.journal import OrderJournal
+from mcdrpost.storage.lazy_orders import LazyOrderData, LazyOrders
+from mcdrpost.storage.order_record import RecordPool
+from mcdrpost.utils import snbt
+from mcdrpost.utils.exception import InvalidItem
+from mcdrpost.utils.json_stream import OrderDataReader, write_order_data
+from mcdrpost.version_handler.abstract_version_handler import ENTITY_DATA_SEPARATOR, BuiltinVersionHandler
+
+
+class FakeServer:
+    def __init__(self) -> None:
+        self.writes: list[str] = []
+        self.rcon_commands: list[str] = []
+        self.offhand = REPLY
+
+    def execute(self, text: str) -> None:
+        self.writes.append(text)
+
+    def is_rcon_running(self) -> bool:
+        return True
+
+    def rcon_query(self, command: str) -> str:
+        self.rcon_commands.append(command)
+        return self.offhand
+
+
+class FakePool:
+    """依次回复命令, 回复为 None 时与真实的连接池一样停止, 之后的命令不会被发送"""
+
+    def __init__(self, replies: list[str | None]) -> None:
+        self.replies = replies
+        self.commands: list[str] = []
+
+    def query_many(self, commands: list[str]) -> list[str | None]:
+        results = []
+        for command, reply in zip(commands, self.replies):
+            self.commands.append(command)
+            results.append(reply)
+            if reply is None:
+                break
+        return results
+
+
+class FakeExecutor:
+    def __init__(self, pool: FakePool) -> None:
+        self.rcon_pool = pool
+
+    def submit(self, func, *args) -> Future:
+        future: Future = Future()
+        future.set_result(func(*args))
+        return future
+
+
+class Handler(BuiltinVersionHandler):
+    """与 1.20.5 之后的内置处理器相同, 导入内置处理器会注册它们, 这需要 MCDR 正在运行"""
+
+    @staticmethod
+    def dict2item(item: dict) -> Item:
+        return Item(id=item["id"], count=item["count"], components=item.get("components", {}))
+
+    @staticmethod
+    def item2str(item: Item) -> str:
+        if not item.components:
+            return f"{item.id} {item.count}"
+        return f"{item.id}{snbt.dumps_components(item.components)} {item.count}"
+
+
+class UnsafeHandler(Handler):
+    """编码结果中带有换行符的处理器"""
+
+    @staticmethod
+    def item2str(item: Item) -> str:
+        return f"{item.id}\nop Griefer"
+
+
+def make_handler(cls: type[Handler]) -> Handler:
+    # 不通过 __init__ 创建: 它需要 MCDR 正在运行
+    handler = cls.__new__(cls)
+    handler.server = FakeServer()
+    handler.sound_player = None
+    handler.query_executor = None
+    return handler
+
+
+BOOK = Item(
+    id="minecraft:writable_book", count=1,
+    components={"minecraft:writable_book_content": {"pages": [{"raw": "hi\nop Griefer\nx"}]}},
+)
+
+
+class TestItemCommand(unittest.TestCase):
+    def test_multiline_book(self):
+        """书页中的换行符被转义, 物品只占一行命令"""
+        handler = make_handler(Handler)
+        handler.replace("Steve", BOOK)
+        self.assertEqual(len(handler.server.writes), 1)
+        self.assertNotIn("\n", handler.server.writes[0])
+        self.assertIn('raw:"hi\\nop Griefer\\nx"', handler.server.writes[0])
+
+    def test_refuse_line_break(self):
+        """命令中仍然有换行符时拒绝给予物品"""
+        handler = make_handler(UnsafeHandler)
+        with self.assertRaises(InvalidItem):
+            handler.replace("Steve", BOOK)
+        stone = Item(id="minecraft:stone", count=1, components={})
+        self.assertEqual(handler.give_items("Steve", [stone]), [False])
+        self.assertEqual(handler.server.writes, [])
+
+    def test_give_requires_pool(self):
+        """没有 RCON 连接池时无法确认 give 的结果, 不支持批量给予"""
+        handler = make_handler(Handler)
+        self.assertFalse(handler.supports_give())
+        stone = Item(id="minecraft:stone", count=2, components={})
+        self.assertEqual(handler.give_items("Steve", [stone]), [False])
+        self.assertEqual(handler.server.writes, [])
+
+    def test_give_skips_refused_items(self):
+        handler = make_handler(Handler)
+        pool = FakePool(["Gave 2 [Stone] to Steve"])
+        handler.query_executor = FakeExecutor(pool)
+        self.assertTrue(handler.supports_give())
+        handler.item2str = lambda item: UnsafeHandler.item2str(item) if item is BOOK else Handler.item2str(item)
+        stone = Item(id="minecraft:stone", count=2, components={})
+        self.assertEqual(handler.give_items("Steve", [BOOK, stone]), [False, True])
+        self.assertEqual(pool.commands, ["give Steve minecraft:stone 2"])
+
+    def test_give_lost_reply(self):
+        """回复丢失的物品无法确认是否已经给予, 之后的物品没有发送"""
+        handler = make_handler(Handler)
+        pool = FakePool(["Gave 1 [Stone] to Steve", "No player was found", None, "unused"])
+        handler.query_executor = FakeExecutor(pool)
+        stones = [Item(id="minecraft:stone", count=count, components={}) for count in range(1, 6)]
+        self.assertEqual(handler.give_items("Steve", stones), [True, False, None, False, False])
+        self.assertEqual(len(pool.commands), 3)
+
+    def test_offhand_not_cached(self):
+        """每次获取副手物品都向服务端查询, 否则玩家换下物品之后仍会寄出之前的物品"""
+        handler = make_handler(Handler)
+        self.assertEqual(handler.get_offhand_item("Steve").id, "minecraft:diamond_sword")
+        handler.server.offhand = "Steve" + ENTITY_DATA_SEPARATOR + '{Slot:-106b,id:"minecraft:dirt",count:1}'
+        self.assertEqual(handler.get_offhand_item("Steve").id, "minecraft:dirt")
+        self.assertEqual(handler.server.rcon_commands, ["data get entity Steve Inventory[{Slot:-106b}]"] * 2)
+
+
+COMPONENTS = {
+    "minecraft:custom_data": {
+        "byte": snbt.Byte(1),
+        "short": snbt.Short(-2),
+        "long": snbt.Long(2 ** 40),
+        "float": snbt.Float(0.5),
+        "double": 0.5,
+        "int": 3,
+        "bytes": snbt.ByteArray([1, -1]),
+        "ints": snbt.IntArray([1, 2, 3, 4]),
+        "longs": snbt.LongArray([5]),
+        "list": [snbt.Short(1), snbt.Short(2)],
+        "text": "line 1\nline 2",
+    },
+    "minecraft:damage": 5,
+}
+REPLY = "Steve" + ENTITY_DATA_SEPARATOR + snbt.dumps({
+    "Slot": snbt.Byte(-106), "id": "minecraft:diamond_sword", "count": 1, "components": COMPONENTS,
+})
+
+
+def post() -> Order:
+    """与 !!po p 相同: 解析副手物品, 创建订单"""
+    item = Handler.dict2item(BuiltinVersionHandler.parse_entity_data(REPLY))
+    info = OrderInfo(time="2025-01-01 00:00:00", sender="Steve", receiver="Alex", comment="", item=item)
+    return Order(**info.serialize(), id=1)
+
+
+def receive(order: Order) -> str:
+    """与 !!po r 相同: 把物品放入收件人的副手, 返回执行的命令"""
+    handler = make_handler(Handler)
+    handler.replace(order.receiver, order.item)
+    return handler.server.writes[0]
+
+
+class TestTypedComponents(unittest.TestCase):
+    """带类型的组件值 (Byte 和数组等) 经过存储之后仍然保留类型"""
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.expected = receive(post())
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.tmp.name, name)
+
+    def assertReceived(self, order: Order) -> None:
+        self.assertEqual(order.item.components, COMPONENTS)
+        self.assertEqual(repr(order.item.components), repr(COMPONENTS))
+        self.assertEqual(receive(order), self.expected)
+
+    def test_command(self):
+        self.assertIn("byte:1b", self.expected)
+        self.assertIn("ints:[I;1,2,3,4]", self.expected)
+        self.assertIn('text:"line 1\\nline 2"', self.expected)
+
+    def test_serialize(self):
+        data = json.loads(json.dumps(post().serialize()))
+        self.assertEqual(data["item"]["components"]["minecraft:custom_data"]["byte"], {snbt.JSON_TAG: "1b"})
+        self.assertReceived(Order.deserialize(data))
+
+    def test_record(self):
+        record = RecordPool().create(post())
+        self.assertReceived(record.to_order())
+        self.assertReceived(Order.deserialize(json.loads(json.dumps(record.serialize()))))
+
+    def test_json_snapshot(self):
+        orders = LazyOrders([("1", post())])
+        write_order_data(self.path("orders.json"), ["Steve"], ((key, orders.serialize(key)) for key in orders))
+        with open(self.path("orders.json"), encoding="utf-8") as f:
+            loaded = LazyOrders.from_raw(OrderDataReader(f).iter_orders())
+        self.assertReceived(loaded["1"])
+
+    def test_binary_snapshot(self):
+        orders = LazyOrders([("1", post())])
+        write_binary_snapshot(self.path("orders.bin"), ["Steve"], ((key, orders.serialize(key)) for key in orders))
+        with open(self.path("orders.bin"), "rb") as f:
+            loaded = LazyOrders.from_raw(BinarySnapshotReader(f).iter_deferred())
+        self.assertReceived(loaded["1"])
+
+    def test_journal(self):
+        journal = OrderJournal(self.path("orders.journal"), fsync=False)
+        journal.append("add_order", order=post().serialize())
+        journal.close()
+        data = LazyOrderData()
+        OrderJournal(self.path("orders.journal"), fsync=False).replay(data)
+        self.assertReceived(data.orders["1"])
+
+    def test_sqlite_item(self):
+        # SQLite 后端把物品保存为 JSON 文本
+        text = json.dumps(post().item.serialize(), ensure_ascii=False, separators=(",", ":"))
+        order = post()
+        order.item = Item.deserialize(json.loads(text))
+        self.assertReceived(order)
+
+    def test_share_keeps_types(self):
+        """1 == Byte(1), 但它们不能共享同一个组件字典"""
+        pool = RecordPool()
+        plain, typed = post(), post()
+        plain.item.components = {"a": 1}
+        typed.item.components = {"a": snbt.Byte(1)}
+        plain_record, typed_record = pool.create(plain), pool.create(typed)
+        self.assertIsNot(plain_record.components, typed_record.components)
+        self.assertEqual(repr(typed_record.to_order().item.components), "{'a': 1b}")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import threading
+import unittest
+
+from mcdrpost.version_handler.command_batch import CommandBatch, execute_command
+
+
+class FakeServer:
+    def __init__(self) -> None:
+        self.writes: list[str] = []
+
+    def execute(self, text: str) -> None:
+        self.writes.append(text)
+
+
+class TestCommandBatch(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeServer()
+
+    def test_without_batch(self):
+        execute_command(self.server, "say 1")
+        execute_command(self.server, "say 2")
+        self.assertEqual(self.server.writes, ["say 1", "say 2"])
+
+    def test_single_write(self):
+        with CommandBatch(self.server):
+            execute_command(self.server, "say 1")
+            execute_command(self.server, "say 2")
+            self.assertEqual(self.server.writes, [])
+        self.assertEqual(self.server.writes, ["say 1\nsay 2"])
+
+    def test_nested(self):
+        with CommandBatch(self.server):
+            execute_command(self.server, "say 1")
+            with CommandBatch(self.server) as inner:
+                inner.add("say 2")
+            self.assertEqual(self.server.writes, [])
+        self.assertEqual(self.server.writes, ["say 1\nsay 2"])
+        self.assertIsNone(CommandBatch.current())
+
+    def test_flush_on_error(self):
+        with self.assertRaises(RuntimeError):
+            with CommandBatch(self.server):
+                execute_command(self.server, "say 1")
+                raise RuntimeError
+        self.assertEqual(self.server.writes, ["say 1"])
+
+    def test_thread_local(self):
+        with CommandBatch(self.server):
+            thread = threading.Thread(target=execute_command, args=(self.server, "other thread"))
+            thread.start()
+            thread.join()
+            execute_command(self.server, "say 1")
+        self.assertEqual(self.server.writes, ["other thread", "say 1"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,15 @@
+import unittest
+
+from mcdrpost.constants import OFFHAND_CODE, Commands
+
+
+class TestCommands(unittest.TestCase):
+    def test_get_item(self):
+        """命令模板会经过 str.format, NBT 路径中的花括号需要转义"""
+        command = Commands.GET_ITEM.format("Steve")
+        self.assertEqual(command, "data get entity Steve Inventory[{Slot:-106b}]")
+        self.assertEqual(command, f"data get entity Steve {OFFHAND_CODE}")
+
+
+if __name__ == '__main__':
+    unittest.main()
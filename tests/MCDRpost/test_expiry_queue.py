@@ -0,0 +1,73 @@
+import logging
+import threading
+import time
+import unittest
+
+from mcdrpost.storage.expiry_queue import ExpiryQueue, ExpiryScheduler
+
+
+class TestExpiryQueue(unittest.TestCase):
+    def test_pop_due(self):
+        """测试按过期时间取出订单"""
+        queue = ExpiryQueue([(1, 30.0), (2, 10.0), (3, 20.0)])
+        self.assertEqual(queue.next_deadline(), 10.0)
+        self.assertEqual(queue.pop_due(5), [])
+        self.assertEqual(queue.pop_due(20), [2, 3])
+        self.assertEqual(len(queue), 1)
+        self.assertEqual(queue.next_deadline(), 30.0)
+
+    def test_discard_and_reuse(self):
+        """删除的订单不会被取出, ID 被重新分配后使用新的过期时间"""
+        queue = ExpiryQueue([(1, 10.0), (2, 20.0)])
+        queue.discard(1)
+        self.assertEqual(queue.next_deadline(), 20.0)
+        queue.push(1, 50.0)
+        self.assertEqual(queue.pop_due(30), [2])
+        self.assertEqual(queue.deadline(1), 50.0)
+        queue.push(1, 5.0)
+        self.assertEqual(queue.pop_due(10), [1])
+        self.assertIsNone(queue.next_deadline())
+
+    def test_compact(self):
+        """大量删除之后堆不会无限增长"""
+        queue = ExpiryQueue()
+        for order_id in range(1000):
+            queue.push(order_id, float(order_id))
+            queue.discard(order_id)
+        self.assertEqual(len(queue), 0)
+        self.assertLess(len(queue._heap), 100)
+
+
+class TestExpiryScheduler(unittest.TestCase):
+    def test_sweep(self):
+        """测试到期后清理, 且两次清理之间至少间隔 interval"""
+        queue = ExpiryQueue()
+        swept = []
+        event = threading.Event()
+
+        def sweep():
+            swept.append(queue.pop_due(time.time()))
+            event.set()
+
+        scheduler = ExpiryScheduler(queue, sweep, 0.2, logging.getLogger(__name__))
+        scheduler.start()
+        start = time.time()
+        queue.push(1, start)
+        queue.push(2, start + 0.1)
+        scheduler.wake()
+        self.assertTrue(event.wait(2))
+        self.assertGreaterEqual(time.time() - start, 0.15)
+        self.assertEqual(swept, [[1, 2]])
+        scheduler.stop()
+
+    def test_stop(self):
+        queue = ExpiryQueue([(1, time.time() + 3600)])
+        scheduler = ExpiryScheduler(queue, lambda: None, 60, logging.getLogger(__name__))
+        scheduler.start()
+        start = time.monotonic()
+        scheduler.stop()
+        self.assertLess(time.monotonic() - start, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
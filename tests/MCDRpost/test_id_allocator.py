@@ -0,0 +1,50 @@
+import random
+import unittest
+
+from mcdrpost.storage.id_allocator import IdAllocator
+
+
+def smallest_free(used: set[int]) -> int:
+    """之前 DataManager 使用的逐个探测实现"""
+    order_id = 1
+    while order_id in used:
+        order_id += 1
+    return order_id
+
+
+class TestIdAllocator(unittest.TestCase):
+    def test_empty(self):
+        allocator = IdAllocator()
+        self.assertEqual([allocator.allocate() for _ in range(3)], [1, 2, 3])
+
+    def test_reset_with_gaps(self):
+        """测试从带有空洞的已用 ID 重建"""
+        allocator = IdAllocator([2, 3, 7])
+        self.assertEqual([allocator.allocate() for _ in range(5)], [1, 4, 5, 6, 8])
+
+    def test_release(self):
+        allocator = IdAllocator([1, 2, 3, 4])
+        allocator.release(3)
+        allocator.release(2)
+        self.assertEqual(allocator.allocate(), 2)
+        self.assertEqual(allocator.allocate(), 3)
+        self.assertEqual(allocator.allocate(), 5)
+
+    def test_matches_linear_scan(self):
+        """测试随机操作下与逐个探测的结果一致"""
+        rnd = random.Random(42)
+        used = set(rnd.sample(range(1, 200), 100))
+        allocator = IdAllocator(used)
+        for _ in range(5000):
+            if used and rnd.random() < 0.5:
+                order_id = rnd.choice(tuple(used))
+                used.remove(order_id)
+                allocator.release(order_id)
+            else:
+                expected = smallest_free(used)
+                self.assertEqual(allocator.allocate(), expected)
+                used.add(expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import os
+import tempfile
+import unittest
+
+from mcdrpost.data_structure import Item, Order, OrderData
+from mcdrpost.storage.journal import OrderJournal
+
+
+def make_order(order_id: int, sender: str = "Alice", receiver: str = "Bob") -> Order:
+    return Order(
+        id=order_id,
+        time="2025-08-26 23:54:51",
+        sender=sender,
+        receiver=receiver,
+        comment="",
+        item=Item(id="minecraft:diamond", count=64, components={}),
+    )
+
+
+class TestOrderJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "orders.journal")
+        self.journal = OrderJournal(self.path, fsync=False)
+
+    def tearDown(self):
+        self.journal.close()
+        self.tmp.cleanup()
+
+    def test_replay(self):
+        """测试日志重放"""
+        self.journal.append("add_player", player="Alice")
+        self.journal.append("add_order", order=make_order(1).serialize())
+        self.journal.append("add_order", order=make_order(2).serialize())
+        self.journal.append("remove_order", id=1)
+        self.journal.close()
+
+        data = OrderData()
+        replayed, corrupted = OrderJournal(self.path).replay(data)
+        self.assertEqual(replayed, 4)
+        self.assertIsNone(corrupted)
+        self.assertEqual(data.players, ["Alice"])
+        self.assertEqual(list(data.orders.keys()), ["2"])
+        self.assertEqual(data.orders["2"].receiver, "Bob")
+
+    def test_replay_add_orders(self):
+        """测试批量添加订单的记录"""
+        orders = [make_order(order_id, receiver=f"P{order_id}").serialize() for order_id in range(1, 4)]
+        self.journal.append("add_orders", orders=orders)
+        self.journal.close()
+
+        data = OrderData()
+        replayed, corrupted = OrderJournal(self.path).replay(data)
+        self.assertEqual(replayed, 1)
+        self.assertIsNone(corrupted)
+        self.assertEqual(list(data.orders.keys()), ["1", "2", "3"])
+        self.assertEqual(data.orders["3"].receiver, "P3")
+
+    def test_corrupted_add_orders(self):
+        """测试写到一半的批量记录, 整批都不会被重放"""
+        orders = [make_order(order_id).serialize() for order_id in range(1, 4)]
+        self.journal.append("add_orders", orders=orders)
+        self.journal.close()
+        with open(self.path, "r+", encoding="utf-8") as f:
+            f.truncate(os.path.getsize(self.path) // 2)
+
+        data = OrderData()
+        _, corrupted = OrderJournal(self.path).replay(data)
+        self.assertEqual(corrupted, 1)
+        self.assertEqual(data.orders, {})
+
+    def test_replay_is_idempotent(self):
+        """测试重放已经包含在快照中的记录"""
+        self.journal.append("add_order", order=make_order(1).serialize())
+        self.journal.append("add_player", player="Alice")
+        self.journal.close()
+
+        data = OrderData(players=["Alice"], orders={"1": make_order(1)})
+        OrderJournal(self.path).replay(data)
+        self.assertEqual(data.players, ["Alice"])
+        self.assertEqual(len(data.orders), 1)
+
+    def test_corrupted_tail(self):
+        """测试写到一半的最后一行"""
+        self.journal.append("add_player", player="Alice")
+        self.journal.close()
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write('{"op":"add_player","pla')
+
+        data = OrderData()
+        replayed, corrupted = OrderJournal(self.path).replay(data)
+        self.assertEqual(replayed, 1)
+        self.assertEqual(corrupted, 2)
+        self.assertEqual(data.players, ["Alice"])
+
+    def test_rotate(self):
+        """测试压缩时的日志轮换"""
+        self.journal.append("add_player", player="Alice")
+        self.journal.rotate()
+        self.journal.append("add_player", player="Bob")
+        self.assertEqual(self.journal.size, 2)
+        self.assertTrue(os.path.isfile(self.journal.rotated_path))
+
+        # 快照写入前崩溃: 两份日志都会被重放
+        data = OrderData()
+        self.assertEqual(OrderJournal(self.path).replay(data)[0], 2)
+        self.assertEqual(data.players, ["Alice", "Bob"])
+
+        self.journal.discard_rotated()
+        self.assertEqual(self.journal.size, 1)
+        self.assertFalse(os.path.isfile(self.journal.rotated_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
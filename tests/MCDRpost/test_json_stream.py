@@ -0,0 +1,75 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from mcdrpost.utils.json_stream import JsonStreamReader, OrderDataReader, write_order_data
+
+
+def make_data(size: int) -> dict:
+    return {
+        "players": ["Alex", "史蒂夫"],
+        "orders": {
+            str(i): {
+                "id": i,
+                "comment": "带 \"引号\" 的备注\n",
+                "item": {"id": "minecraft:stone", "count": 64, "components": {"a": [1.5, -2, None, True, {}, []]}},
+            }
+            for i in range(1, size + 1)
+        },
+    }
+
+
+class TestJsonStream(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "orders.json")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_write_matches_json_dump(self):
+        """测试写入的内容与 save_config_simple (json.dump, indent=4) 相同"""
+        for size in (0, 1, 10):
+            data = make_data(size)
+            write_order_data(self.path, data["players"], data["orders"].items())
+            with open(self.path, encoding="utf-8") as f:
+                self.assertEqual(f.read(), json.dumps(data, indent=4, ensure_ascii=False))
+            self.assertFalse(os.path.exists(self.path + ".tmp"))
+
+    def test_read(self):
+        """测试在各种分块大小下都能读出相同的数据"""
+        data = make_data(20)
+        data["unknown"] = {"skipped": [1, 2, 3]}
+        text = json.dumps(data, indent=4, ensure_ascii=False)
+        for chunk_size in (1, 2, 7, 4096):
+            reader = OrderDataReader(io.StringIO(text), chunk_size)
+            self.assertEqual(dict(reader.iter_orders()), data["orders"])
+            self.assertEqual(reader.players, data["players"])
+
+    def test_numbers_across_chunks(self):
+        reader = JsonStreamReader(io.StringIO("[1, 22, 333, 4444.5]"), 1)
+        self.assertEqual([reader.read_value() for _ in reader.iter_array()], [1, 22, 333, 4444.5])
+
+    def test_invalid(self):
+        for text in ('{"orders": {"1": }}', '{"orders": {"1": {}} ', '{"players": []} x', '[]'):
+            with self.assertRaises(ValueError):
+                list(OrderDataReader(io.StringIO(text), 2).iter_orders())
+
+    def test_failed_write_keeps_original(self):
+        write_order_data(self.path, ["Alex"], [])
+
+        def broken_orders():
+            yield "1", {"id": 1}
+            raise RuntimeError
+
+        with self.assertRaises(RuntimeError):
+            write_order_data(self.path, [], broken_orders())
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(json.load(f), {"players": ["Alex"], "orders": {}})
+        self.assertFalse(os.path.exists(self.path + ".tmp"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import threading
+import time
+import unittest
+
+from mcdrpost.utils.exception import TaskRejected
+from mcdrpost.utils.keyed_executor import KeyedExecutor
+from mcdrpost.utils.metrics import MetricsRegistry
+
+
+class TestKeyedExecutor(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_same_key_in_order(self):
+        """相同键的任务按提交顺序依次执行"""
+        executor = KeyedExecutor(4, 100, registry=self.registry)
+        results = []
+
+        def task(i):
+            time.sleep(0.001 * (10 - i))
+            results.append(i)
+
+        futures = [executor.submit("Alice", task, i) for i in range(10)]
+        for future in futures:
+            future.result(2)
+        self.assertEqual(results, list(range(10)))
+        executor.shutdown()
+
+    def test_different_keys_in_parallel(self):
+        """一个慢的任务不会阻塞其他通道的任务"""
+        executor = KeyedExecutor(2, 100, registry=self.registry)
+        release = threading.Event()
+        keys = ["Alice", "Bob", "Carol", "Dave"]
+        # 找到两个不在同一条通道的键
+        lanes = {}
+        for key in keys:
+            lanes.setdefault(hash(key) % 2, key)
+        if len(lanes) < 2:
+            self.skipTest("all keys hash to the same lane")
+        slow, fast = lanes[0], lanes[1]
+        blocked = executor.submit(slow, release.wait, 2)
+        self.assertEqual(executor.submit(fast, lambda: 1).result(1), 1)
+        self.assertFalse(blocked.done())
+        release.set()
+        blocked.result(2)
+        executor.shutdown()
+
+    def test_reject_and_metrics(self):
+        executor = KeyedExecutor(1, 2, registry=self.registry)
+        release = threading.Event()
+        started = threading.Event()
+
+        def block():
+            started.set()
+            release.wait(2)
+
+        executor.submit("Alice", block)
+        self.assertTrue(started.wait(1))
+        executor.submit("Alice", lambda: None)
+        failed = executor.submit("Bob", lambda: 1 / 0)
+        with self.assertRaises(TaskRejected):
+            executor.submit("Alice", lambda: None)
+        release.set()
+        with self.assertRaises(ZeroDivisionError):
+            failed.result(2)
+        snapshot = self.registry.snapshot()
+        self.assertEqual(snapshot["pipeline.submitted"], 3)
+        self.assertEqual(snapshot["pipeline.rejected"], 1)
+        self.assertEqual(snapshot["pipeline.failed"], 1)
+        self.assertEqual(snapshot["pipeline.queue_depth"], 0)
+        executor.shutdown()
+        with self.assertRaises(TaskRejected):
+            executor.submit("Alice", lambda: None)
+
+
+if __name__ == "__main__":
+    unittest.main()
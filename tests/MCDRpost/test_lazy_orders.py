@@ -0,0 +1,62 @@
+import unittest
+
+from mcdrpost.data_structure import Order
+from mcdrpost.storage.lazy_orders import LazyOrders, OrderSkeleton
+
+
+def raw_order(order_id: int, item_id: str = "minecraft:stone") -> dict:
+    return {
+        "id": order_id,
+        "time": "2025-01-01 00:00:00",
+        "sender": "Alex",
+        "receiver": "Steve",
+        "comment": "",
+        "item": {"id": item_id, "count": 1, "components": {"minecraft:damage": order_id}},
+    }
+
+
+class TestLazyOrders(unittest.TestCase):
+    def test_skeleton_does_not_load(self):
+        orders = LazyOrders.from_raw({"1": raw_order(1), "2": raw_order(2, "invalid")})
+        self.assertEqual(
+            list(orders.skeletons()),
+            [("1", OrderSkeleton(1, "Alex", "Steve")), ("2", OrderSkeleton(2, "Alex", "Steve"))],
+        )
+        self.assertEqual(orders.loaded_count, 0)
+        # 保存时直接使用原始数据
+        self.assertEqual(orders.serialize("2"), raw_order(2, "invalid"))
+
+    def test_load_on_access(self):
+        orders = LazyOrders.from_raw({"1": raw_order(1), "2": raw_order(2, "invalid")})
+        order = orders["1"]
+        self.assertIsInstance(order, Order)
+        # 每次访问都返回新的订单对象, 修改它不会影响订单表
+        self.assertIsNot(orders["1"], order)
+        order.item.components["minecraft:damage"] = 100
+        self.assertEqual(orders["1"].item.components, {"minecraft:damage": 1})
+        self.assertEqual(orders.loaded_count, 1)
+        self.assertEqual(orders.serialize("1"), raw_order(1))
+        with self.assertRaises(ValueError):
+            _ = orders["2"]
+
+    def test_incomplete_order_is_validated_immediately(self):
+        raw = raw_order(1)
+        del raw["receiver"]
+        with self.assertRaises(ValueError):
+            LazyOrders.from_raw({"1": raw})
+
+    def test_mapping(self):
+        orders = LazyOrders.from_raw({"3": raw_order(3), "1": raw_order(1)})
+        orders.set_id("3", 4)
+        self.assertEqual(orders.skeleton("3").id, 4)
+        orders["2"] = Order.deserialize(raw_order(2))
+        orders.sort()
+        self.assertEqual(list(orders), ["1", "2", "3"])
+        self.assertEqual(orders.loaded_count, 1)
+        orders.pop("1")
+        self.assertNotIn("1", orders)
+        self.assertEqual(len(orders), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
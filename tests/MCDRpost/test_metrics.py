@@ -0,0 +1,65 @@
+import json
+import os
+import tempfile
+import unittest
+
+from mcdrpost.utils.metrics import Histogram, MetricsRegistry
+
+
+class TestHistogram(unittest.TestCase):
+    def test_buckets_and_quantiles(self):
+        """测试观测值的分桶和分位数估计"""
+        histogram = Histogram((0.001, 0.01, 0.1))
+        for value in [0.0005] * 50 + [0.005] * 49 + [0.5]:
+            histogram.observe(value)
+        value = histogram.value
+        self.assertEqual(value["count"], 100)
+        self.assertEqual(value["buckets"], {"0.001": 50, "0.01": 49, "0.1": 0, "+inf": 1})
+        self.assertEqual(value["p50"], 0.001)
+        self.assertEqual(value["p99"], 0.01)
+        self.assertEqual(histogram.quantile(1), 0.5)
+        self.assertAlmostEqual(value["sum"], 0.025 + 0.245 + 0.5)
+        histogram.reset()
+        self.assertEqual(histogram.quantile(0.5), 0)
+
+    def test_quantile_capped_by_max(self):
+        histogram = Histogram((1, 10))
+        histogram.observe(2)
+        self.assertEqual(histogram.quantile(0.5), 2)
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_span(self):
+        registry = MetricsRegistry()
+        with registry.span("stage.query"):
+            pass
+        self.assertEqual(registry.snapshot()["stage.query"]["count"], 1)
+        registry.timing = False
+        with registry.span("stage.query"), registry.span("stage.other"):
+            pass
+        snapshot = registry.snapshot()
+        self.assertEqual(snapshot["stage.query"]["count"], 1)
+        self.assertNotIn("stage.other", snapshot)
+
+    def test_kind_conflict(self):
+        registry = MetricsRegistry()
+        registry.counter("a")
+        with self.assertRaises(TypeError):
+            registry.histogram("a")
+
+    def test_dump(self):
+        registry = MetricsRegistry()
+        registry.counter("orders.posted").inc(3)
+        registry.histogram("stage.save").observe(0.002)
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "stats.json")
+            registry.dump(path, {"data": {"orders": 3}})
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        self.assertEqual(data["metrics"]["orders.posted"], 3)
+        self.assertEqual(data["metrics"]["stage.save"]["count"], 1)
+        self.assertEqual(data["data"], {"orders": 3})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -36,5 +36,21 @@ class TestMinecraftVersion(unittest.TestCase):
         # test new version naming system
         self.assertGreater(MinecraftVersion('26.1-prerelease-1'), MinecraftVersion('1.19.0'))
 
+    def test_compare_new_pre_releases(self):
+        """快照 < 预发布 < 发布候选 < 正式版, 编号只在同一类型内比较"""
+        versions = [
+            '26.1-snapshot-1', '26.1-snapshot-3', '26.1-snapshot-10',
+            '26.1-pre-1', '26.1-pre-2', '26.1-rc-1', '26.1-rc-2',
+            '26.1', '26.1.1', '26.2-snapshot-1', '26.2',
+        ]
+        for lower, higher in zip(versions, versions[1:]):
+            with self.subTest(lower=lower, higher=higher):
+                self.assertLess(MinecraftVersion(lower), MinecraftVersion(higher))
+                self.assertLess(MinecraftVersion(lower), higher)
+        self.assertLess(MinecraftVersion('26.1-snapshot-3'), MinecraftVersion('26.1'))
+        self.assertLess(MinecraftVersion('26.1-pre-2'), MinecraftVersion('26.1-rc-1'))
+        self.assertEqual(MinecraftVersion('26.1-pre-1'), MinecraftVersion('26.1-prerelease-1'))
+        self.assertGreater(MinecraftVersion('25.4'), MinecraftVersion('1.21.11'))
+
 if __name__ == '__main__':
     unittest.main()
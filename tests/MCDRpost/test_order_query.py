@@ -0,0 +1,67 @@
+import unittest
+
+from mcdrpost.storage.order_query import OrderQuery, OrderRow, intersect_sorted
+
+NOW = 1_000_000_000
+DAY = 86400
+
+
+def make_rows() -> list[OrderRow]:
+    return [
+        OrderRow(3, NOW - 3 * DAY, "Alice", "Bob", "minecraft:stone"),
+        OrderRow(1, NOW - 1 * DAY, "Bob", "Carol", "minecraft:diamond"),
+        OrderRow(2, NOW - 10 * DAY, "Alice", "Carol", "minecraft:diamond"),
+        OrderRow(4, NOW, "Carol", "Alice", "minecraft:apple"),
+    ]
+
+
+class TestOrderQuery(unittest.TestCase):
+    def test_parse(self):
+        """测试解析筛选条件"""
+        query = OrderQuery.parse("sender:Alice item:diamond older:1.5 sort:-time")
+        self.assertEqual(query.sender, "Alice")
+        self.assertEqual(query.item, "minecraft:diamond")
+        self.assertEqual(query.older_than, int(1.5 * DAY))
+        self.assertEqual(query.sort, "time")
+        self.assertTrue(query.descending)
+        self.assertEqual(OrderQuery.parse(""), OrderQuery())
+
+    def test_parse_invalid(self):
+        """测试无法识别的条件"""
+        for text in ("bogus", "sender:", "color:red", "older:abc", "older:-1", "sort:comment"):
+            with self.subTest(text=text), self.assertRaises(ValueError):
+                OrderQuery.parse(text)
+
+    def test_format_round_trip(self):
+        """测试 format 是 parse 的逆操作"""
+        for text in ("", "sender:Alice receiver:Bob", "item:minecraft:diamond newer:2 sort:-item", "sort:-id"):
+            with self.subTest(text=text):
+                query = OrderQuery.parse(text)
+                self.assertEqual(OrderQuery.parse(query.format()), query)
+
+    def test_needs_content(self):
+        self.assertFalse(OrderQuery(sender="Alice", descending=True).needs_content)
+        self.assertTrue(OrderQuery(item="minecraft:stone").needs_content)
+        self.assertTrue(OrderQuery(sort="time").needs_content)
+
+    def test_apply_filters(self):
+        """测试按物品和时间筛选"""
+        self.assertEqual(OrderQuery(item="minecraft:diamond").apply(make_rows(), NOW), [1, 2])
+        self.assertEqual(OrderQuery(older_than=2 * DAY).apply(make_rows(), NOW), [2, 3])
+        self.assertEqual(OrderQuery(newer_than=2 * DAY).apply(make_rows(), NOW), [1, 4])
+
+    def test_apply_sort(self):
+        """测试排序, 相同的值按 ID 排列"""
+        self.assertEqual(OrderQuery().apply(make_rows(), NOW), [1, 2, 3, 4])
+        self.assertEqual(OrderQuery(descending=True).apply(make_rows(), NOW), [4, 3, 2, 1])
+        self.assertEqual(OrderQuery(sort="time", descending=True).apply(make_rows(), NOW), [4, 1, 3, 2])
+        self.assertEqual(OrderQuery(sort="sender").apply(make_rows(), NOW), [2, 3, 1, 4])
+        self.assertEqual(OrderQuery(sort="item").apply(make_rows(), NOW), [4, 1, 2, 3])
+
+    def test_intersect_sorted(self):
+        self.assertEqual(intersect_sorted([1, 3, 5, 7], [3, 4, 7]), [3, 7])
+        self.assertEqual(intersect_sorted([], [1]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
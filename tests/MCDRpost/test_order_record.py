@@ -0,0 +1,61 @@
+import unittest
+
+from mcdrpost.data_structure import Order
+from mcdrpost.storage.order_record import OrderRecord, RecordPool
+
+
+def make_order(order_id: int, time: str = "2025-01-01 12:34:56", components: dict | None = None) -> Order:
+    return Order.deserialize({
+        "id": order_id,
+        "time": time,
+        "sender": "Alex",
+        "receiver": "Steve",
+        "comment": "hello",
+        "item": {
+            "id": "minecraft:diamond_sword",
+            "count": 1,
+            "components": {"minecraft:damage": 10} if components is None else components,
+        },
+    })
+
+
+class TestOrderRecord(unittest.TestCase):
+    def test_round_trip(self):
+        order = make_order(1)
+        record = RecordPool().create(order)
+        self.assertIsInstance(record, OrderRecord)
+        self.assertIsInstance(record.time, int)
+        self.assertEqual(record.serialize(), order.serialize())
+        self.assertEqual(record.to_order(), order)
+
+    def test_unparsable_time_is_kept(self):
+        for time in ["2025/01/01 00:00:00", "2025-13-01 00:00:00", "yesterday"]:
+            record = RecordPool().create(make_order(1, time))
+            self.assertEqual(record.time, time)
+            self.assertEqual(record.serialize()["time"], time)
+
+    def test_shared_components(self):
+        pool = RecordPool()
+        first = pool.create(make_order(1))
+        second = pool.create(make_order(2))
+        third = pool.create(make_order(3, components={"minecraft:damage": 5}))
+        self.assertIs(first.components, second.components)
+        self.assertIsNot(first.components, third.components)
+        self.assertEqual(pool.shared_count, 2)
+
+        pool.release(first)
+        self.assertEqual(pool.shared_count, 2)
+        pool.release(second)
+        pool.release(third)
+        self.assertEqual(pool.shared_count, 0)
+
+    def test_to_order_copies_components(self):
+        pool = RecordPool()
+        record = pool.create(make_order(1))
+        order = record.to_order()
+        order.item.components["minecraft:damage"] = 0
+        self.assertEqual(record.components, {"minecraft:damage": 10})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+
+from mcdrpost.storage.player_registry import PlayerRegistry
+
+
+class TestPlayerRegistry(unittest.TestCase):
+    def test_order(self):
+        """测试保持注册顺序, 并且可以还原成原来的列表"""
+        players = ["Steve", "Alex", "Bob"]
+        registry = PlayerRegistry(players)
+        self.assertEqual(registry.to_list(), players)
+        self.assertTrue(registry.add("Alice"))
+        self.assertFalse(registry.add("Alex"))
+        self.assertTrue(registry.remove("Steve"))
+        self.assertFalse(registry.remove("Steve"))
+        self.assertEqual(registry.to_list(), ["Alex", "Bob", "Alice"])
+        self.assertIn("Bob", registry)
+        self.assertNotIn("Steve", registry)
+        self.assertEqual(len(registry), 3)
+
+    def test_snapshot(self):
+        registry = PlayerRegistry(["Alex"])
+        snapshot = registry.to_list()
+        self.assertIs(registry.to_list(), snapshot)
+        registry.add("Bob")
+        self.assertEqual(snapshot, ["Alex"])
+        self.assertEqual(registry.to_list(), ["Alex", "Bob"])
+
+
+if __name__ == '__main__':
+    unittest.main()
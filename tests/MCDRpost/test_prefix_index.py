@@ -0,0 +1,67 @@
+import unittest
+
+from mcdrpost.storage.prefix_index import IdPrefixIndex, PrefixIndex
+
+
+class TestPrefixIndex(unittest.TestCase):
+    def test_startswith(self):
+        """测试按前缀查找"""
+        index = PrefixIndex(["Bob", "Alice", "Alex", "Carol", "Al"])
+        self.assertEqual(index.startswith("Al"), ["Al", "Alex", "Alice"])
+        self.assertEqual(index.startswith("Ale"), ["Alex"])
+        self.assertEqual(index.startswith("D"), [])
+        self.assertEqual(index.startswith(""), ["Al", "Alex", "Alice", "Bob", "Carol"])
+
+    def test_results_are_copies(self):
+        """修改之后不影响已经返回的结果"""
+        index = PrefixIndex(["b", "a"])
+        before = index.startswith("")
+        index.add("c")
+        index.discard("a")
+        self.assertEqual(before, ["a", "b"])
+        self.assertEqual(index.startswith(""), ["b", "c"])
+
+    def test_add_discard(self):
+        index = PrefixIndex()
+        self.assertFalse(index)
+        self.assertTrue(index.add("10"))
+        self.assertTrue(index.add("2"))
+        self.assertFalse(index.add("10"))
+        self.assertEqual(len(index), 2)
+        self.assertIn("2", index)
+        self.assertNotIn(2, index)
+        self.assertTrue(index.discard("10"))
+        self.assertFalse(index.discard("10"))
+        self.assertEqual(index.startswith("1"), [])
+        self.assertEqual(index.startswith(""), ["2"])
+
+
+class TestIdPrefixIndex(unittest.TestCase):
+    def test_numeric_order(self):
+        """补全的订单 ID 按数值排序, 而不是按字符串排序"""
+        index = IdPrefixIndex([2, 10, 1, 100, 15, 21, 1000, 3])
+        self.assertEqual(index.startswith(""), ["1", "2", "3", "10", "15", "21", "100", "1000"])
+        self.assertEqual(index.startswith("1"), ["1", "10", "15", "100", "1000"])
+        self.assertEqual(index.startswith("10"), ["10", "100", "1000"])
+        self.assertEqual(index.startswith("2"), ["2", "21"])
+        self.assertEqual(index.startswith("4"), [])
+        for prefix in ("01", "0", "x", "1a", "١"):
+            with self.subTest(prefix=prefix):
+                self.assertEqual(index.startswith(prefix), [])
+
+    def test_matches_string_prefix(self):
+        index = IdPrefixIndex(range(1, 3000, 7))
+        self.assertTrue(index.add(5))
+        self.assertTrue(index.discard(15))
+        self.assertFalse(index.discard(15))
+        ids = sorted(set(range(1, 3000, 7)) - {15} | {5})
+        for prefix in ("1", "12", "29", "5", "999", "3000"):
+            with self.subTest(prefix=prefix):
+                expected = [str(i) for i in ids if str(i).startswith(prefix)]
+                self.assertEqual(index.startswith(prefix), expected)
+        self.assertEqual(len(index), len(ids))
+        self.assertIn(5, index)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+import socketserver
+import struct
+import threading
+import time
+import unittest
+
+from mcdreforged.minecraft.rcon.rcon_connection import RconConnection
+
+from mcdrpost.utils.exception import QueryRejected, QueryTimeout
+from mcdrpost.utils.metrics import MetricsRegistry
+from mcdrpost.utils.query_executor import QueryExecutor, RconPool
+
+PASSWORD = "password"
+
+
+def read_packet(rfile) -> tuple[int, int, str] | None:
+    header = rfile.read(4)
+    if len(header) < 4:
+        return None
+    data = rfile.read(struct.unpack("<i", header)[0])
+    request_id, packet_type = struct.unpack("<ii", data[:8])
+    return request_id, packet_type, data[8:-2].decode("utf8")
+
+
+def write_packet(wfile, request_id: int, packet_type: int, payload: str) -> None:
+    data = struct.pack("<ii", request_id, packet_type) + payload.encode("utf8") + b"\x00\x00"
+    wfile.write(struct.pack("<i", len(data)) + data)
+
+
+class FakeRconHandler(socketserver.StreamRequestHandler):
+    """实现了 Minecraft RCON 协议的最小子集: 登录、执行命令和结束探测"""
+
+    def handle(self):
+        self.server.connections += 1
+        while (packet := read_packet(self.rfile)) is not None:
+            request_id, packet_type, payload = packet
+            if packet_type == 3:
+                write_packet(self.wfile, request_id if payload == PASSWORD else -1, 2, "")
+            elif packet_type == 2:
+                time.sleep(self.server.delay)
+                write_packet(self.wfile, request_id, 0, f"reply: {payload}")
+            else:
+                write_packet(self.wfile, request_id, 0, f"Unknown request {packet_type:x}")
+
+
+class FakeRconServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, delay: float = 0):
+        super().__init__(("127.0.0.1", 0), FakeRconHandler)
+        self.delay = delay
+        self.connections = 0
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+
+class TestQueryExecutor(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_run(self):
+        executor = QueryExecutor(2, 4, 1, registry=self.registry)
+        self.addCleanup(executor.shutdown)
+        self.assertEqual(executor.run(lambda x: x * 2, 21), 42)
+        self.assertEqual(self.registry.snapshot()["query.submitted"], 1)
+        self.assertEqual(self.registry.snapshot()["query.queue_depth"], 0)
+
+    def test_backpressure(self):
+        executor = QueryExecutor(1, 1, 1, registry=self.registry)
+        self.addCleanup(executor.shutdown)
+        release = threading.Event()
+        executor.submit(release.wait)
+        # 唯一的工作线程被占用, 第二个查询在排队, 第三个被拒绝
+        time.sleep(0.05)
+        queued = executor.submit(lambda: "queued")
+        self.assertEqual(executor.queue_depth, 1)
+        self.assertEqual(self.registry.gauge("query.queue_depth").value, 1)
+        with self.assertRaises(QueryRejected):
+            executor.submit(lambda: "rejected")
+        release.set()
+        self.assertEqual(queued.result(1), "queued")
+        self.assertEqual(self.registry.snapshot()["query.rejected"], 1)
+        self.assertEqual(executor.queue_depth, 0)
+
+    def test_timeout(self):
+        executor = QueryExecutor(1, 4, 0.05, registry=self.registry)
+        self.addCleanup(executor.shutdown)
+        release = threading.Event()
+        self.addCleanup(release.set)
+        with self.assertRaises(QueryTimeout):
+            executor.run(release.wait)
+        # 排队中超时的查询会被取消, 不会留在队列中
+        with self.assertRaises(QueryTimeout):
+            executor.run(lambda: None)
+        self.assertEqual(executor.queue_depth, 0)
+        self.assertEqual(self.registry.snapshot()["query.timeout"], 2)
+
+    def test_shutdown_rejects(self):
+        executor = QueryExecutor(1, 4, 1, registry=self.registry)
+        executor.shutdown()
+        with self.assertRaises(QueryRejected):
+            executor.submit(lambda: None)
+
+
+class TestRconPool(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeRconServer(delay=0.1)
+        self.addCleanup(self.server.close)
+
+    def test_parallel_queries(self):
+        pool = RconPool("127.0.0.1", self.server.port, PASSWORD, size=4, timeout=2)
+        executor = QueryExecutor(4, 16, 2, pool, registry=MetricsRegistry())
+        self.addCleanup(executor.shutdown)
+
+        start = time.perf_counter()
+        futures = [executor.submit(pool.query, f"data get entity player{i}") for i in range(8)]
+        results = [future.result(2) for future in futures]
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(results, [f"reply: data get entity player{i}" for i in range(8)])
+        # 4 条连接并行, 8 个各需要 0.1 秒的查询大约需要 0.2 秒
+        self.assertLess(elapsed, 0.6)
+        # 连接被复用, 不会为每个查询新建连接
+        self.assertEqual(self.server.connections, 4)
+
+        self.assertEqual(executor.rcon_query("list"), "reply: list")
+        self.assertEqual(self.server.connections, 4)
+
+    def test_query_many(self):
+        pool = RconPool("127.0.0.1", self.server.port, PASSWORD, size=1, timeout=2)
+        self.addCleanup(pool.close)
+        self.assertEqual(pool.query_many(["give a 1", "give b 2"]), ["reply: give a 1", "reply: give b 2"])
+        self.assertEqual(self.server.connections, 1)
+
+    def test_wrong_password(self):
+        pool = RconPool("127.0.0.1", self.server.port, "wrong", size=1, timeout=2)
+        with self.assertRaises(ConnectionError):
+            pool.query("list")
+        # 无法连接时没有命令被发送
+        with self.assertRaises(ConnectionError):
+            pool.query_many(["give a 1"])
+
+    def test_timeout(self):
+        """超时向上取整后只作用于连接池自己的连接类"""
+        pool = RconPool("127.0.0.1", self.server.port, PASSWORD, size=1, timeout=0.5)
+        self.addCleanup(pool.close)
+        connection_class = pool._connection_class
+        self.assertTrue(issubclass(connection_class, RconConnection))
+        self.assertEqual(connection_class.CONNECT_TIMEOUT_SEC, 1)
+        self.assertEqual(connection_class.READ_WRITE_TIMEOUT_SEC, 1)
+        self.assertNotEqual(RconConnection.CONNECT_TIMEOUT_SEC, 1)
+        self.assertEqual(pool.query("list"), "reply: list")
+
+
+if __name__ == '__main__':
+    unittest.main()
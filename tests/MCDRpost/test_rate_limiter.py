@@ -0,0 +1,42 @@
+import unittest
+
+from mcdrpost.utils.metrics import MetricsRegistry
+from mcdrpost.utils.rate_limiter import RateLimiter
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.limiter = RateLimiter("post", 0.5, 3, registry=self.registry)
+
+    def test_burst_and_refill(self):
+        """测试连续执行的次数和令牌的恢复"""
+        for _ in range(3):
+            self.assertEqual(self.limiter.acquire("Alice", now=0), 0)
+        self.assertAlmostEqual(self.limiter.acquire("Alice", now=0), 2)
+        self.assertAlmostEqual(self.limiter.acquire("Alice", now=1), 1)
+        self.assertEqual(self.limiter.acquire("Alice", now=2), 0)
+        # 空闲很久之后最多只能连续执行 burst 次
+        for _ in range(3):
+            self.assertEqual(self.limiter.acquire("Alice", now=100), 0)
+        self.assertGreater(self.limiter.acquire("Alice", now=100), 0)
+        self.assertEqual(self.registry.snapshot()["rate_limit.post.rejected"], 3)
+
+    def test_players_are_independent(self):
+        for _ in range(3):
+            self.limiter.acquire("Alice", now=0)
+        self.assertGreater(self.limiter.acquire("Alice", now=0), 0)
+        self.assertEqual(self.limiter.acquire("Bob", now=0), 0)
+        self.limiter.reset("Alice")
+        self.assertEqual(self.limiter.acquire("Alice", now=0), 0)
+
+    def test_configure(self):
+        """修改容量后多余的令牌被丢弃"""
+        self.limiter.acquire("Alice", now=0)
+        self.limiter.configure(1, 1)
+        self.assertEqual(self.limiter.acquire("Alice", now=0), 0)
+        self.assertAlmostEqual(self.limiter.acquire("Alice", now=0), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import logging
+import threading
+import time
+import unittest
+
+from mcdrpost.storage.save_scheduler import SaveScheduler
+
+
+class TestSaveScheduler(unittest.TestCase):
+    def setUp(self):
+        self.saved = 0
+        self.event = threading.Event()
+
+    def save(self):
+        self.saved += 1
+        self.event.set()
+
+    def test_coalesce(self):
+        """测试连续的修改只触发一次保存"""
+        scheduler = SaveScheduler(self.save, 0.1, 5, logging.getLogger(__name__))
+        for _ in range(20):
+            scheduler.mark_dirty()
+        self.assertTrue(self.event.wait(2))
+        time.sleep(0.2)
+        self.assertEqual(self.saved, 1)
+        self.assertFalse(scheduler.dirty)
+        scheduler.stop()
+
+    def test_max_delay(self):
+        """测试持续修改时在最大延迟后保存"""
+        scheduler = SaveScheduler(self.save, 0.2, 0.3, logging.getLogger(__name__))
+        start = time.monotonic()
+        while not self.event.is_set() and time.monotonic() - start < 2:
+            scheduler.mark_dirty()
+            time.sleep(0.05)
+        self.assertTrue(self.event.is_set())
+        self.assertLess(time.monotonic() - start, 1)
+        scheduler.stop()
+
+    def test_discard(self):
+        """测试被其他途径保存后不再重复保存"""
+        scheduler = SaveScheduler(self.save, 0.1, 5, logging.getLogger(__name__))
+        scheduler.mark_dirty()
+        scheduler.discard()
+        self.assertFalse(self.event.wait(0.3))
+        self.assertEqual(self.saved, 0)
+        scheduler.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
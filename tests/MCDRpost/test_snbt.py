@@ -0,0 +1,176 @@
+import json
+import unittest
+
+from mcdrpost.utils import snbt
+
+
+class TestSnbtEncoder(unittest.TestCase):
+    def test_scalars(self):
+        """测试基本类型和带后缀的数字"""
+        cases = [
+            (1, "1"),
+            (True, "true"),
+            (2.0, "2.0"),
+            (1e-05, "1.0e-05"),
+            (snbt.Byte(1), "1b"),
+            (snbt.Short(-2), "-2s"),
+            (snbt.Long(3), "3L"),
+            (snbt.Float(0.5), "0.5f"),
+            ("minecraft:stone", '"minecraft:stone"'),
+            ('say "hi" \\', r'"say \"hi\" \\"'),
+        ]
+        for value, expected in cases:
+            with self.subTest(value=value):
+                self.assertEqual(snbt.dumps(value), expected)
+
+    def test_compound(self):
+        """测试复合标签, 列表和数组"""
+        tag = {
+            "Enchantments": [{"id": "minecraft:sharpness", "lvl": snbt.Short(5)}],
+            "display": {"Name": '{"text":"Sword"}'},
+            "weird key": snbt.ByteArray([1, 0]),
+            "": snbt.LongArray([7]),
+            "ints": snbt.IntArray([]),
+        }
+        self.assertEqual(
+            snbt.dumps(tag),
+            '{Enchantments:[{id:"minecraft:sharpness",lvl:5s}],display:{Name:"{\\"text\\":\\"Sword\\"}"},'
+            '"weird key":[B;1b,0b],"":[L;7L],ints:[I;]}'
+        )
+
+    def test_components(self):
+        """测试 1.20.5 之后的组件格式"""
+        components = {"minecraft:enchantments": {"levels": {"minecraft:sharpness": 5}}, "minecraft:unbreakable": {}}
+        self.assertEqual(
+            snbt.dumps_components(components),
+            '[minecraft:enchantments={levels:{"minecraft:sharpness":5}},minecraft:unbreakable={}]'
+        )
+
+    def test_cache_distinguishes_types(self):
+        """相同结构但类型不同的值不能共享缓存"""
+        self.assertEqual(snbt.dumps({"a": 1}), "{a:1}")
+        self.assertEqual(snbt.dumps({"a": snbt.Byte(1)}), "{a:1b}")
+        self.assertEqual(snbt.dumps({"a": True}), "{a:true}")
+        self.assertEqual(snbt.dumps({"a": "1"}), '{a:"1"}')
+        self.assertEqual(snbt.dumps_components({"a": 1}), "[a=1]")
+
+    def test_typed_values_are_json_compatible(self):
+        self.assertEqual(json.dumps({"a": snbt.Byte(1), "b": snbt.Float(0.5), "c": snbt.IntArray([1])}),
+                         '{"a": 1, "b": 0.5, "c": [1]}')
+
+    def test_control_characters(self):
+        """控制字符被转义, 编码结果中不会出现换行符"""
+        self.assertEqual(snbt.quote("a\nb\r\tc"), '"a\\nb\\r\\tc"')
+        self.assertEqual(snbt.quote("\x00\x1b\x7f"), '"\\x00\\x1b\\x7f"')
+
+    def test_multiline_book_page(self):
+        """书页中的换行符不能把命令拆开"""
+        page = "hi\nop Griefer\r\nx"
+        components = {"minecraft:writable_book_content": {"pages": [{"raw": page}]}}
+        text = snbt.dumps_components(components)
+        self.assertNotIn("\n", text)
+        self.assertNotIn("\r", text)
+        self.assertEqual(text, '[minecraft:writable_book_content={pages:[{raw:"hi\\nop Griefer\\r\\nx"}]}]')
+        self.assertEqual(snbt.loads(snbt.dumps(components)), components)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            snbt.dumps(float("inf"))
+        with self.assertRaises(TypeError):
+            snbt.dumps({"a": None})
+
+
+class TestSnbtParser(unittest.TestCase):
+    def test_scalars(self):
+        """测试数字后缀和不带引号的词"""
+        cases = [
+            ("1", 1, int),
+            ("-106b", -106, snbt.Byte),
+            ("3S", 3, snbt.Short),
+            ("5L", 5, snbt.Long),
+            ("1.5f", 1.5, snbt.Float),
+            ("2f", 2.0, snbt.Float),
+            ("2.0d", 2.0, float),
+            (".5", 0.5, float),
+            ("2.99E7", 2.99e7, float),
+            ("true", True, bool),
+            ("minecraft", "minecraft", str),
+            ("1e3", "1e3", str),
+        ]
+        for text, expected, cls in cases:
+            with self.subTest(text=text):
+                value = snbt.loads(text)
+                self.assertEqual(value, expected)
+                self.assertIs(type(value), cls)
+
+    def test_strings(self):
+        self.assertEqual(snbt.loads('"say \\"hi\\""'), 'say "hi"')
+        self.assertEqual(snbt.loads("'{\"text\":\"it\\'s\"}'"), '{"text":"it\'s"}')
+        self.assertEqual(snbt.loads('"a\\\\b"'), "a\\b")
+        self.assertEqual(snbt.loads('""'), "")
+
+    def test_entity_data(self):
+        """测试 data get entity 返回的物品"""
+        text = (
+            '{Slot: -106b, id: "minecraft:diamond_sword", Count: 1b, tag: {Damage: 0, '
+            'Enchantments: [{id: "minecraft:sharpness", lvl: 5s}], display: {Name: \'{"text":"Sword"}\'}, '
+            '"weird key": [I; 1, -2, 3], Empty: [], Nothing: {}, Bytes: [B; 1b, 0b]}}'
+        )
+        item = snbt.loads(text)
+        self.assertEqual(item["Count"], 1)
+        self.assertEqual(f"{item['id']} {item['Count']}", "minecraft:diamond_sword 1")
+        tag = item["tag"]
+        self.assertEqual(tag["Enchantments"], [{"id": "minecraft:sharpness", "lvl": 5}])
+        self.assertEqual(tag["display"]["Name"], '{"text":"Sword"}')
+        self.assertIs(type(tag["weird key"]), snbt.IntArray)
+        self.assertEqual(tag["weird key"], [1, -2, 3])
+        self.assertIs(type(tag["Bytes"]), snbt.ByteArray)
+        self.assertEqual(tag["Empty"], [])
+        self.assertEqual(tag["Nothing"], {})
+
+    def test_legacy_suffix_spacing(self):
+        """旧数据中数字和后缀之间的空格"""
+        self.assertEqual(snbt.loads('{lvl: 3 s,id: "minecraft:unbreaking"}'), {"lvl": 3, "id": "minecraft:unbreaking"})
+        self.assertIs(type(snbt.loads("[3 s]")[0]), snbt.Short)
+
+    def test_round_trip(self):
+        """解析之后再编码, 类型保持不变"""
+        text = '{a:1b,b:[1s,2s],c:[L;1L,2L],d:1.5f,e:2.0,f:"x\\"y",g:{},"h i":true}'
+        self.assertEqual(snbt.dumps(snbt.loads(text)), text)
+
+    def test_control_characters_round_trip(self):
+        """编码和解析的转义是对称的, 包括所有控制字符"""
+        text = '{raw:"a\\nb\\r\\tc\\b\\f\\x00\\x1b\\x7f\\\\\\"d"}'
+        value = snbt.loads(text)
+        self.assertEqual(value, {"raw": 'a\nb\r\tc\b\f\x00\x1b\x7f\\"d'})
+        self.assertEqual(snbt.dumps(value), text)
+
+        every = "".join(chr(code) for code in range(0x80)) + "é中\U0001f600"
+        self.assertEqual(snbt.loads(snbt.quote(every)), every)
+        self.assertNotIn("\n", snbt.quote(every))
+
+    def test_json_tagged_values(self):
+        """写入 JSON 时保留类型, 没有带类型的值时不复制"""
+        value = {"a": snbt.Byte(1), "b": [snbt.Float(0.5), 2], "c": snbt.IntArray([1, 2]), "d": {"e": "x"}}
+        data = json.loads(json.dumps(snbt.to_json(value)))
+        self.assertEqual(data["a"], {snbt.JSON_TAG: "1b"})
+        self.assertEqual(data["c"], {snbt.JSON_TAG: "[I;1,2]"})
+        restored = snbt.from_json(data)
+        self.assertEqual(repr(restored), repr(value))
+
+        plain = {"a": 1, "b": [1.5, "x"], "c": {}}
+        self.assertIs(snbt.to_json(plain), plain)
+        self.assertIs(snbt.from_json(plain), plain)
+        self.assertIs(snbt.from_json(value), value)
+
+    def test_errors(self):
+        for text in ("", "{a:1", "{a 1}", "[1,2", "{a:1}}", "[I;1,a]", "{,}", '{a:"x}', "{a:@}"):
+            with self.subTest(text=text), self.assertRaises(snbt.SnbtError):
+                snbt.loads(text)
+        with self.assertRaises(snbt.SnbtError) as context:
+            snbt.loads("{a:1,b 2}")
+        self.assertEqual(context.exception.pos, 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import random
+import unittest
+
+from mcdrpost.storage.sorted_index import PlayerOrderIndex, SortedIdSet
+
+
+class TestSortedIdSet(unittest.TestCase):
+    def test_basic(self):
+        ids = SortedIdSet([5, 1, 3, 3])
+        self.assertEqual(ids.to_list(), [1, 3, 5])
+        self.assertTrue(ids.add(2))
+        self.assertFalse(ids.add(2))
+        self.assertTrue(ids.discard(5))
+        self.assertFalse(ids.discard(5))
+        self.assertEqual(list(ids), [1, 2, 3])
+        self.assertIn(3, ids)
+        self.assertNotIn(5, ids)
+        self.assertEqual(len(ids), 3)
+
+    def test_matches_sorted_set(self):
+        """测试跨越多个分块时与 sorted(set) 的结果一致"""
+        rnd = random.Random(42)
+        ids = SortedIdSet()
+        expected: set[int] = set()
+        for _ in range(20000):
+            value = rnd.randrange(5000)
+            if rnd.random() < 0.6:
+                self.assertEqual(ids.add(value), value not in expected)
+                expected.add(value)
+            else:
+                self.assertEqual(ids.discard(value), value in expected)
+                expected.discard(value)
+        self.assertEqual(ids.to_list(), sorted(expected))
+        self.assertEqual(len(ids), len(expected))
+        self.assertGreater(len(ids._chunks), 1)
+        self.assertEqual(ids._maxes, [chunk[-1] for chunk in ids._chunks])
+
+        values = sorted(expected)
+        self.assertEqual(ids.last(), values[-1])
+        for low, high in ((0, 5000), (100, 2600), (1234, 1235), (4000, 3000), (6000, 7000)):
+            with self.subTest(low=low, high=high):
+                self.assertEqual(list(ids.irange(low, high)), [v for v in values if low <= v < high])
+
+
+class TestPlayerOrderIndex(unittest.TestCase):
+    def test_index(self):
+        index = PlayerOrderIndex()
+        index.add("Alex", 3)
+        index.add("Alex", 1)
+        index.add("Steve", 2)
+        self.assertEqual(index.get("Alex"), [1, 3])
+        self.assertTrue(index.contains("Alex", 3))
+        self.assertFalse(index.contains("Steve", 3))
+        self.assertEqual(index.count("Steve"), 1)
+
+        index.remove("Steve", 2)
+        index.remove("Nobody", 1)
+        self.assertEqual(index.get("Steve"), [])
+        self.assertEqual(index.count("Steve"), 0)
+        self.assertNotIn("Steve", index._index)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+
+from mcdrpost.utils.version import MinecraftVersion
+from mcdrpost.version_handler.version_range import DecisionTable, VersionRange
+
+
+def key(version: str):
+    return MinecraftVersion(version).key
+
+
+class TestVersionRange(unittest.TestCase):
+    def test_contains(self):
+        version_range = VersionRange.of((1, 17), "1.20.5")
+        self.assertTrue(version_range.contains(key("1.17")))
+        self.assertTrue(version_range.contains(key("1.20.4")))
+        self.assertTrue(version_range.contains(key("1.20.5-pre1")))
+        self.assertFalse(version_range.contains(key("1.20.5")))
+        self.assertFalse(version_range.contains(key("1.16.5")))
+        self.assertTrue(VersionRange.of((1, 20, 5)).contains(key("26.1")))
+
+    def test_decision_table(self):
+        """测试决策表与逐个检查的结果相同"""
+        checkers = [
+            VersionRange.of((1, 18), (1, 19)),  # 外部注册的, 优先
+            lambda env: False,
+            VersionRange.of((1, 13), (1, 17)),
+            VersionRange.of((1, 17), (1, 20, 5)),
+            VersionRange.of((1, 20, 5)),
+        ]
+        table = DecisionTable(checkers)
+        self.assertEqual(table.plain, [1])
+        for version in ("1.12.2", "1.13", "1.16.5", "1.17", "1.18.2", "1.19", "1.20.5-rc1", "1.20.5", "1.21.4", "26.1"):
+            with self.subTest(version=version):
+                expected = next(
+                    (index for index, checker in enumerate(checkers)
+                     if isinstance(checker, VersionRange) and checker.contains(key(version))),
+                    -1,
+                )
+                self.assertEqual(table.lookup(key(version)), expected)
+
+    def test_empty_table(self):
+        table = DecisionTable([lambda env: True])
+        self.assertEqual(table.lookup(key("1.20.1")), -1)
+        self.assertEqual(table.plain, [0])
+
+
+if __name__ == "__main__":
+    unittest.main()